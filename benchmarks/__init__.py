@@ -0,0 +1,2 @@
+# VideoSlicer/benchmarks/__init__.py
+"""Performance benchmarks for scene detection and sequence extraction."""
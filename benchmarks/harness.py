@@ -0,0 +1,211 @@
+"""Measurement helpers and result files for the benchmark suite."""
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import psutil
+
+# Direction of improvement for every metric that is compared between runs
+HIGHER_IS_BETTER = {'frames_per_second', 'realtime_factor', 'recall', 'precision'}
+LOWER_IS_BETTER = {'wall_seconds', 'peak_rss_mb', 'process_spawns', 'output_bytes'}
+
+
+class SpawnCounter:
+    """Context manager counting child processes started through subprocess."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._original_popen = None
+
+    def __enter__(self):
+        counts = self.counts
+        original_popen = subprocess.Popen
+        self._original_popen = original_popen
+
+        class CountingPopen(original_popen):
+            def __init__(self, args, *popen_args, **popen_kwargs):
+                program = args[0] if isinstance(args, (list, tuple)) else str(args).split()[0]
+                counts[os.path.basename(str(program))] += 1
+                super().__init__(args, *popen_args, **popen_kwargs)
+
+        # subprocess.run() looks Popen up on the module, so this also catches run()
+        subprocess.Popen = CountingPopen
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        subprocess.Popen = self._original_popen
+        return False
+
+    @property
+    def total(self):
+        """Total number of processes spawned."""
+        return sum(self.counts.values())
+
+
+class PeakRSSSampler:
+    """Context manager sampling peak resident memory of this process and its children."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak_self = 0
+        self.peak_tree = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._process = psutil.Process()
+
+    def _sample(self):
+        rss_self = self._process.memory_info().rss
+        rss_tree = rss_self
+        for child in self._process.children(recursive=True):
+            try:
+                rss_tree += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        self.peak_self = max(self.peak_self, rss_self)
+        self.peak_tree = max(self.peak_tree, rss_tree)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+def measure(func, *args, **kwargs):
+    """Run a function while recording wall time, CPU time, peak RSS and spawns.
+
+    Args:
+        func: Callable to measure
+        *args: Positional arguments for the callable
+        **kwargs: Keyword arguments for the callable
+
+    Returns:
+        tuple: (result, stats) where stats is a dict of measurements
+    """
+    process = psutil.Process()
+    cpu_before = process.cpu_times()
+    with SpawnCounter() as spawns, PeakRSSSampler() as rss:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        wall = time.perf_counter() - start
+    cpu_after = process.cpu_times()
+
+    cpu_self = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    cpu_children = ((cpu_after.children_user - cpu_before.children_user)
+                    + (cpu_after.children_system - cpu_before.children_system))
+    stats = {
+        'wall_seconds': wall,
+        'cpu_seconds': cpu_self,
+        'child_cpu_seconds': cpu_children,
+        'peak_rss_mb': rss.peak_self / (1024 * 1024),
+        'peak_rss_tree_mb': rss.peak_tree / (1024 * 1024),
+        'process_spawns': spawns.total,
+        'spawns_by_program': dict(spawns.counts),
+    }
+    return result, stats
+
+
+def collect_metadata():
+    """Describe the machine and software versions a run was made with."""
+    meta = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        import cv2
+        meta['opencv'] = cv2.__version__
+    except ImportError:
+        meta['opencv'] = None
+    try:
+        version = subprocess.run(["ffmpeg", "-version"], stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE, text=True)
+        meta['ffmpeg'] = version.stdout.splitlines()[0] if version.stdout else None
+    except OSError:
+        meta['ffmpeg'] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        meta['git_commit'] = commit.stdout.strip() or None
+    except OSError:
+        meta['git_commit'] = None
+    return meta
+
+
+def write_results(path, meta, results):
+    """Write benchmark results as JSON.
+
+    Args:
+        path: Output file path
+        meta: Run metadata from collect_metadata()
+        results: List of result records
+    """
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+
+
+def load_results(path):
+    """Load a results file written by write_results()."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _result_key(record):
+    return (record['suite'], record['clip'], record.get('variant', ''))
+
+
+def compare_results(baseline, current, tolerance=0.10):
+    """Compare two result sets and list metrics that regressed.
+
+    Args:
+        baseline: Results dict loaded from the baseline file
+        current: Results dict of the current run
+        tolerance: Allowed relative change before a metric counts as regressed
+
+    Returns:
+        list: Regression dicts with suite, clip, variant, metric, baseline and current values
+    """
+    baseline_records = {_result_key(r): r for r in baseline['results']}
+    regressions = []
+
+    for record in current['results']:
+        base = baseline_records.get(_result_key(record))
+        if base is None:
+            continue
+        for metric, value in record['metrics'].items():
+            base_value = base['metrics'].get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(base_value, (int, float)):
+                continue
+            if base_value == 0:
+                continue
+            change = (value - base_value) / abs(base_value)
+            if (metric in HIGHER_IS_BETTER and change < -tolerance) or \
+               (metric in LOWER_IS_BETTER and change > tolerance):
+                regressions.append({
+                    'suite': record['suite'],
+                    'clip': record['clip'],
+                    'variant': record.get('variant', ''),
+                    'metric': metric,
+                    'baseline': base_value,
+                    'current': value,
+                    'change': change,
+                })
+    return regressions
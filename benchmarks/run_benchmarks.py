@@ -0,0 +1,464 @@
+"""Run the VideoSlicer benchmark suite.
+
+Usage (from the project root):
+    python -m benchmarks.run_benchmarks --profile quick --output results.json
+    python -m benchmarks.run_benchmarks --compare baseline.json
+"""
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from benchmarks.harness import (
+    collect_metadata,
+    compare_results,
+    load_results,
+    measure,
+    write_results,
+)
+from benchmarks.synthetic import PROFILES, ensure_clip
+from core.resources import CPUBudget
+from core.video_processor import H26X_SPEED_TIERS, PRORES_ENCODERS, VideoProcessor
+
+DEFAULT_CLIPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".clips")
+
+# Output formats and qualities exercised by the extraction suite
+EXTRACTION_FORMATS = ["prores", "h264", "h265"]
+EXTRACTION_QUALITIES = ["low", "medium", "high"]
+
+# Codecs compared across the encode speed tiers
+SPEED_TIER_FORMATS = ["h264", "h265"]
+
+# Quality settings exercised per ProRes encoder, labelled with the profile they select
+PRORES_QUALITIES = [("low", "proxy"), ("medium", "standard"), ("high", "hq")]
+
+
+def _median_run(repeat, func, *args, **kwargs):
+    """Run a measurement several times and keep the run with the median wall time."""
+    runs = [measure(func, *args, **kwargs) for _ in range(repeat)]
+    median_wall = statistics.median(stats['wall_seconds'] for _, stats in runs)
+    return min(runs, key=lambda run: abs(run[1]['wall_seconds'] - median_wall))
+
+
+def _match_cuts(detected, expected, tolerance):
+    """Count detected cuts lying within tolerance seconds of an expected cut."""
+    matched = 0
+    remaining = list(expected)
+    for timestamp in detected:
+        for cut in remaining:
+            if abs(timestamp - cut) <= tolerance:
+                remaining.remove(cut)
+                matched += 1
+                break
+    return matched
+
+
+def bench_detection(processor, clips, args):
+    """Measure scene detection throughput and accuracy on every clip."""
+    results = []
+    for spec, path in clips:
+        analyzed_frames = int(min(args.max_duration, spec.duration) * spec.fps)
+        expected = [cut for cut in spec.cut_points if cut < args.max_duration]
+
+        scene_changes, stats = _median_run(
+            args.repeat, processor.detect_scene_changes,
+            path, threshold=args.threshold, max_duration=args.max_duration
+        )
+
+        matched = _match_cuts(scene_changes, expected, tolerance=1.5 / spec.fps)
+        metrics = dict(stats)
+        metrics.update({
+            'frames_analyzed': analyzed_frames,
+            'frames_per_second': analyzed_frames / stats['wall_seconds'],
+            'cuts_expected': len(expected),
+            'cuts_detected': len(scene_changes),
+            'recall': matched / len(expected) if expected else 1.0,
+            'precision': matched / len(scene_changes) if scene_changes else 1.0,
+        })
+        results.append({'suite': 'detection', 'clip': spec.name, 'variant': '',
+                        'spec': spec.to_dict(), 'metrics': metrics})
+        print(f"detection  {spec.name:<34} {metrics['frames_per_second']:8.1f} fps  "
+              f"peak {metrics['peak_rss_mb']:7.1f} MB  recall {metrics['recall']:.2f}")
+    return results
+
+
+def bench_extraction(processor, clips, args):
+    """Measure encode realtime factor for every output format and quality."""
+    _, _, codec_support = processor.check_ffmpeg_available()
+    results = []
+    for spec, path in clips:
+        start_time = spec.cut_points[0]
+        for output_format in EXTRACTION_FORMATS:
+            if not codec_support.get(output_format):
+                print(f"extraction {spec.name:<34} {output_format}: encoder not available, skipped")
+                continue
+            for quality in EXTRACTION_QUALITIES:
+                output_dir = tempfile.mkdtemp(prefix="videoslicer_bench_")
+                try:
+                    output_paths, stats = _median_run(
+                        args.repeat, processor.extract_sequences,
+                        path, output_dir, [start_time],
+                        sequence_length=args.sequence_length,
+                        num_sequences=args.num_sequences,
+                        output_format=output_format,
+                        quality=quality,
+                    )
+                    encoded_seconds = args.sequence_length * len(output_paths)
+                    metrics = dict(stats)
+                    metrics.update({
+                        'sequences': len(output_paths),
+                        'encoded_seconds': encoded_seconds,
+                        'realtime_factor': encoded_seconds / stats['wall_seconds'],
+                        'output_bytes': sum(os.path.getsize(p) for p in output_paths),
+                    })
+                finally:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+
+                variant = f"{output_format}/{quality}"
+                results.append({'suite': 'extraction', 'clip': spec.name, 'variant': variant,
+                                'spec': spec.to_dict(), 'metrics': metrics})
+                print(f"extraction {spec.name:<34} {variant:<14} {metrics['realtime_factor']:6.2f}x realtime  "
+                      f"{metrics['output_bytes'] / (1024 * 1024):8.1f} MB  "
+                      f"{metrics['process_spawns']} spawns")
+    return results
+
+
+def _first_usable_cut(processor, path, threshold, max_duration, video_duration, required_duration,
+                      goal_directed):
+    """Find the first cut followed by required_duration seconds, with or without early exit."""
+    if goal_directed:
+        scenes = processor.iter_scene_changes(path, threshold, max_duration,
+                                              required_duration=required_duration)
+        try:
+            return next(scenes, None)
+        finally:
+            scenes.close()
+    scene_changes = processor.detect_scene_changes(path, threshold, max_duration)
+    return next((cut for cut in scene_changes if cut + required_duration <= video_duration), None)
+
+
+def bench_first_cut(processor, clips, args):
+    """Compare a full detection pass with goal-directed detection of the first usable cut."""
+    required = args.sequence_length * args.num_sequences
+    results = []
+    for spec, path in clips:
+        duration = min(args.max_duration, spec.duration)
+        for variant, goal_directed in (("full", False), ("goal", True)):
+            cut, stats = _median_run(
+                args.repeat, _first_usable_cut, processor, path, args.threshold,
+                duration, spec.duration, required, goal_directed
+            )
+            metrics = dict(stats)
+            metrics['cut_found'] = 1.0 if cut is not None else 0.0
+            results.append({'suite': 'first_cut', 'clip': spec.name, 'variant': variant,
+                            'spec': spec.to_dict(), 'metrics': metrics})
+            found = f"{cut:.2f} s" if cut is not None else "none"
+            print(f"first_cut  {spec.name:<34} {variant:<5} {stats['wall_seconds']:7.2f} s  cut {found}")
+    return results
+
+
+def bench_speed_tiers(processor, clips, args):
+    """Compare encode realtime factor and output size of the H.264/H.265 speed tiers."""
+    _, _, codec_support = processor.check_ffmpeg_available()
+    results = []
+    table = []
+    for spec, path in clips:
+        start_time = spec.cut_points[0]
+        for output_format in SPEED_TIER_FORMATS:
+            if not codec_support.get(output_format):
+                print(f"speed_tiers {spec.name:<33} {output_format}: encoder not available, skipped")
+                continue
+            for tier in H26X_SPEED_TIERS:
+                output_dir = tempfile.mkdtemp(prefix="videoslicer_bench_")
+                try:
+                    output_paths, stats = _median_run(
+                        args.repeat, processor.extract_sequences,
+                        path, output_dir, [start_time],
+                        sequence_length=args.sequence_length,
+                        num_sequences=args.num_sequences,
+                        output_format=output_format,
+                        quality="medium",
+                        speed_tier=tier,
+                    )
+                    encoded_seconds = args.sequence_length * len(output_paths)
+                    metrics = dict(stats)
+                    metrics.update({
+                        'sequences': len(output_paths),
+                        'encoded_seconds': encoded_seconds,
+                        'realtime_factor': encoded_seconds / stats['wall_seconds'],
+                        'output_bytes': sum(os.path.getsize(p) for p in output_paths),
+                    })
+                finally:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+
+                variant = f"{output_format}/{tier}"
+                results.append({'suite': 'speed_tiers', 'clip': spec.name, 'variant': variant,
+                                'spec': spec.to_dict(), 'metrics': metrics})
+                table.append((spec.name, variant, metrics['realtime_factor'],
+                              metrics['output_bytes'] / (1024 * 1024)))
+
+    if table:
+        print(f"{'clip':<34} {'codec/tier':<16} {'realtime':>9} {'size MB':>9}")
+        for clip, variant, realtime_factor, size_mb in table:
+            print(f"{clip:<34} {variant:<16} {realtime_factor:8.2f}x {size_mb:9.2f}")
+    return results
+
+
+def bench_prores_encoders(processor, clips, args):
+    """Measure encode frames/s and output size of every available ProRes encoder and profile."""
+    encoders = [name for name in PRORES_ENCODERS if name in processor.available_prores_encoders()]
+    if not encoders:
+        print("prores_encoders: no ProRes encoder available, skipped")
+        return []
+    results = []
+    for spec, path in clips:
+        start_time = spec.cut_points[0]
+        for encoder in encoders:
+            for quality, profile_name in PRORES_QUALITIES:
+                output_dir = tempfile.mkdtemp(prefix="videoslicer_bench_")
+                try:
+                    output_paths, stats = _median_run(
+                        args.repeat, processor.extract_sequences,
+                        path, output_dir, [start_time],
+                        sequence_length=args.sequence_length,
+                        num_sequences=args.num_sequences,
+                        output_format="prores",
+                        quality=quality,
+                        prores_encoder=encoder,
+                    )
+                    encoded_frames = int(args.sequence_length * spec.fps) * len(output_paths)
+                    metrics = dict(stats)
+                    metrics.update({
+                        'sequences': len(output_paths),
+                        'encoded_frames': encoded_frames,
+                        'frames_per_second': encoded_frames / stats['wall_seconds'],
+                        'output_bytes': sum(os.path.getsize(p) for p in output_paths),
+                    })
+                finally:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+
+                variant = f"{encoder}/{profile_name}"
+                results.append({'suite': 'prores_encoders', 'clip': spec.name, 'variant': variant,
+                                'spec': spec.to_dict(), 'metrics': metrics})
+                print(f"prores     {spec.name:<34} {variant:<18} {metrics['frames_per_second']:8.1f} fps  "
+                      f"{metrics['output_bytes'] / (1024 * 1024):8.1f} MB")
+    return results
+
+
+def bench_chunked_detection(processor, clips, args):
+    """Compare sequential whole-video detection with chunked analysis in worker processes."""
+    results = []
+    for spec, path in clips:
+        analyzed_frames = int(spec.duration * spec.fps)
+        baseline = None
+        for workers in (1, args.workers):
+            scene_changes, stats = _median_run(
+                args.repeat, processor.detect_scene_changes,
+                path, threshold=args.threshold, max_duration=None, workers=workers
+            )
+            if baseline is None:
+                baseline = scene_changes
+            metrics = dict(stats)
+            metrics.update({
+                'frames_per_second': analyzed_frames / stats['wall_seconds'],
+                'matches_sequential': 1.0 if scene_changes == baseline else 0.0,
+            })
+            variant = f"workers={workers}"
+            results.append({'suite': 'chunked_detection', 'clip': spec.name, 'variant': variant,
+                            'spec': spec.to_dict(), 'metrics': metrics})
+            print(f"chunked    {spec.name:<34} {variant:<10} {metrics['frames_per_second']:8.1f} fps  "
+                  f"{'same cuts' if metrics['matches_sequential'] else 'DIFFERENT cuts'}")
+    return results
+
+
+def bench_chunked_encode(processor, clips, args):
+    """Compare a single encode of a long sequence with GOP-aligned chunked encoding."""
+    _, _, codec_support = processor.check_ffmpeg_available()
+    results = []
+    for spec, path in clips:
+        start_time = spec.cut_points[0]
+        sequence_length = min(args.chunked_length, spec.duration - start_time)
+        for output_format in ("prores", "h264"):
+            if not codec_support.get(output_format):
+                print(f"chunked_encode {spec.name:<30} {output_format}: encoder not available, skipped")
+                continue
+            # The single-pass encode is kept as the reference the chunked encode is compared with
+            output_dirs = []
+            reference = None
+            try:
+                for chunks in (1, args.workers):
+                    output_dir = tempfile.mkdtemp(prefix="videoslicer_bench_")
+                    output_dirs.append(output_dir)
+                    output_paths, stats = _median_run(
+                        args.repeat, processor.extract_sequences,
+                        path, output_dir, [start_time],
+                        sequence_length=sequence_length,
+                        num_sequences=1,
+                        output_format=output_format,
+                        quality="high",
+                        encode_chunks=chunks,
+                    )
+                    comparison = {'frames': 0, 'frame_count_matches': False, 'timing_matches': False,
+                                  'hashes_match': False}
+                    if output_paths:
+                        if reference is None:
+                            reference = output_paths[0]
+                        comparison = processor.compare_frames(reference, output_paths[0])
+
+                    metrics = dict(stats)
+                    metrics['realtime_factor'] = sequence_length * len(output_paths) / stats['wall_seconds']
+                    metrics.update({key: float(value) for key, value in comparison.items()})
+                    variant = f"{output_format}/chunks={chunks}"
+                    results.append({'suite': 'chunked_encode', 'clip': spec.name, 'variant': variant,
+                                    'spec': spec.to_dict(), 'metrics': metrics})
+                    print(f"chunked_encode {spec.name:<30} {variant:<18} "
+                          f"{metrics['realtime_factor']:6.2f}x realtime  {comparison['frames']} frames  "
+                          f"timing {'ok' if comparison['timing_matches'] else 'DIFFERS'}  "
+                          f"hashes {'equal' if comparison['hashes_match'] else 'differ'}")
+            finally:
+                for output_dir in output_dirs:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+    return results
+
+
+def _concurrent_extract(processor, path, start_time, jobs, output_format, sequence_length):
+    """Encode the same sequence in several concurrent jobs; returns the sequences written."""
+    output_dirs = [tempfile.mkdtemp(prefix="videoslicer_bench_") for _ in range(jobs)]
+
+    def run_job(output_dir):
+        processor.begin_job(os.path.basename(path))
+        try:
+            return processor.extract_sequences(path, output_dir, [start_time],
+                                               sequence_length=sequence_length, num_sequences=1,
+                                               output_format=output_format, quality="medium")
+        finally:
+            processor.end_job()
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return sum(len(paths) for paths in executor.map(run_job, output_dirs))
+    finally:
+        for output_dir in output_dirs:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def bench_cpu_governor(processor, clips, args):
+    """Compare the aggregate throughput of concurrent jobs with and without the CPU budget."""
+    _, _, codec_support = processor.check_ffmpeg_available()
+    opencv_threads = cv2.getNumThreads()
+    results = []
+    for spec, path in clips:
+        start_time = spec.cut_points[0]
+        sequence_length = min(args.sequence_length, spec.duration - start_time)
+        for output_format in ("h264", "prores"):
+            if not codec_support.get(output_format):
+                print(f"cpu_governor {spec.name:<32} {output_format}: encoder not available, skipped")
+                continue
+            unmanaged = None
+            for governed in (False, True):
+                if governed:
+                    processor.cpu_budget = CPUBudget()
+                    processor.cpu_budget.expect(args.jobs)
+                    processor.cpu_budget.configure_opencv(args.jobs)
+                try:
+                    sequences, stats = _median_run(args.repeat, _concurrent_extract, processor, path,
+                                                   start_time, args.jobs, output_format, sequence_length)
+                finally:
+                    processor.cpu_budget = None
+                    cv2.setNumThreads(opencv_threads)
+
+                metrics = dict(stats)
+                metrics['realtime_factor'] = sequence_length * sequences / stats['wall_seconds']
+                if unmanaged is None:
+                    unmanaged = metrics['realtime_factor']
+                variant = f"{output_format}/jobs={args.jobs}/{'governed' if governed else 'unmanaged'}"
+                results.append({'suite': 'cpu_governor', 'clip': spec.name, 'variant': variant,
+                                'spec': spec.to_dict(), 'metrics': metrics})
+                print(f"cpu_governor {spec.name:<32} {variant:<28} {metrics['realtime_factor']:6.2f}x realtime  "
+                      f"({metrics['realtime_factor'] / unmanaged:.2f}x unmanaged)")
+    return results
+
+
+# Registered benchmark suites, run in this order
+SUITES = {
+    'detection': bench_detection,
+    'extraction': bench_extraction,
+    'first_cut': bench_first_cut,
+    'speed_tiers': bench_speed_tiers,
+    'prores_encoders': bench_prores_encoders,
+    'chunked_detection': bench_chunked_detection,
+    'chunked_encode': bench_chunked_encode,
+    'cpu_governor': bench_cpu_governor,
+}
+
+
+def main(argv=None):
+    """Generate the synthetic clips, run the selected suites and write results."""
+    parser = argparse.ArgumentParser(description="VideoSlicer benchmarks")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick",
+                        help="Synthetic clip set to benchmark")
+    parser.add_argument("--suites", default=",".join(SUITES),
+                        help="Comma-separated suites to run")
+    parser.add_argument("--clips-dir", default=DEFAULT_CLIPS_DIR,
+                        help="Directory to cache generated clips in")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="Path of the JSON results file")
+    parser.add_argument("--compare", default=None,
+                        help="Baseline results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Relative change tolerated before reporting a regression")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per measurement; the median run is kept")
+    parser.add_argument("--threshold", type=float, default=30.0)
+    parser.add_argument("--max-duration", type=float, default=40.0)
+    parser.add_argument("--sequence-length", type=float, default=5.0)
+    parser.add_argument("--num-sequences", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                        help="Worker processes (chunked_detection) and chunks (chunked_encode)")
+    parser.add_argument("--chunked-length", type=float, default=30.0,
+                        help="Sequence length encoded by the chunked_encode suite")
+    parser.add_argument("--jobs", type=int, default=4,
+                        help="Concurrent jobs run by the cpu_governor suite")
+    args = parser.parse_args(argv)
+
+    suites = [name.strip() for name in args.suites.split(",") if name.strip()]
+    unknown = [name for name in suites if name not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(unknown)}")
+
+    # Keep the processor quiet; its per-frame logging would distort the timings
+    logger = logging.getLogger("benchmarks.video_processor")
+    logger.setLevel(logging.WARNING)
+    processor = VideoProcessor(logger=logger)
+
+    print(f"Preparing {args.profile} clip set in {args.clips_dir}")
+    clips = [(spec, ensure_clip(spec, args.clips_dir)) for spec in PROFILES[args.profile]]
+
+    results = []
+    for name in suites:
+        results.extend(SUITES[name](processor, clips, args))
+
+    run = {'meta': collect_metadata(), 'results': results}
+    run['meta']['profile'] = args.profile
+    write_results(args.output, run['meta'], results)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        regressions = compare_results(load_results(args.compare), run, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['suite']} {r['clip']} {r['variant']} {r['metric']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.1%})")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
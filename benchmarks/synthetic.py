@@ -0,0 +1,191 @@
+"""Deterministic synthetic test clips with known cut points.
+
+Clips are rendered from FFmpeg lavfi sources instead of being stored in the
+repository, so every machine benchmarks exactly the same content.
+"""
+import os
+import subprocess
+
+# Bump when the generated content changes so stale cached clips are rebuilt
+CLIP_VERSION = 1
+
+# Visually distinct lavfi sources, cycled through for consecutive scenes
+SCENE_SOURCES = [
+    ("testsrc2", ""),
+    ("smptehdbars", ""),
+    ("color", "c=0xE0E0E0"),
+    ("rgbtestsrc", ""),
+    ("color", "c=0x101060"),
+    ("yuvtestsrc", ""),
+]
+
+# Sine frequencies (Hz) per scene so the audio track changes with each cut
+SCENE_TONES = [220, 440, 660, 880, 330, 550]
+
+# Encoder settings used to render the synthetic clips
+CODECS = {
+    'h264': {'extension': '.mp4', 'audio': ['-c:a', 'aac', '-b:a', '128k']},
+    'hevc': {'extension': '.mp4', 'audio': ['-c:a', 'aac', '-b:a', '128k']},
+    'prores': {'extension': '.mov', 'audio': ['-c:a', 'pcm_s16le']},
+}
+
+
+class ClipSpec:
+    """Description of a synthetic clip and its known scene cuts."""
+
+    def __init__(self, width, height, fps=25, codec='h264', gop=25,
+                 scene_length=5.0, num_scenes=10):
+        """Initialize the clip specification.
+
+        Args:
+            width: Frame width in pixels
+            height: Frame height in pixels
+            fps: Frame rate
+            codec: Encoder key from CODECS ('h264', 'hevc', 'prores')
+            gop: Keyframe interval in frames (ignored for intra-only codecs)
+            scene_length: Length of every scene in seconds
+            num_scenes: Number of scenes in the clip
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown synthetic clip codec: {codec}")
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.codec = codec
+        self.gop = gop
+        self.scene_length = scene_length
+        self.num_scenes = num_scenes
+
+    @property
+    def name(self):
+        """Stable identifier used for file names and result keys."""
+        return f"{self.width}x{self.height}_{self.fps}fps_{self.codec}_gop{self.gop}"
+
+    @property
+    def duration(self):
+        """Total clip duration in seconds."""
+        return self.scene_length * self.num_scenes
+
+    @property
+    def total_frames(self):
+        """Total number of frames in the clip."""
+        return int(round(self.duration * self.fps))
+
+    @property
+    def cut_points(self):
+        """Timestamps (in seconds) of the scene cuts in the clip."""
+        return [i * self.scene_length for i in range(1, self.num_scenes)]
+
+    def to_dict(self):
+        """Serialize the specification for result files."""
+        return {
+            'name': self.name,
+            'width': self.width,
+            'height': self.height,
+            'fps': self.fps,
+            'codec': self.codec,
+            'gop': self.gop,
+            'duration': self.duration,
+            'cut_points': self.cut_points,
+        }
+
+
+# Clip sets selectable from the command line
+PROFILES = {
+    'quick': [
+        ClipSpec(640, 360, codec='h264', gop=25),
+        ClipSpec(1920, 1080, codec='h264', gop=250),
+        ClipSpec(1920, 1080, codec='hevc', gop=50),
+        ClipSpec(1920, 1080, codec='prores', gop=1),
+    ],
+    'full': [
+        ClipSpec(640, 360, codec='h264', gop=25),
+        ClipSpec(1280, 720, fps=50, codec='h264', gop=12),
+        ClipSpec(1920, 1080, codec='h264', gop=250),
+        ClipSpec(1920, 1080, codec='hevc', gop=50),
+        ClipSpec(1920, 1080, codec='prores', gop=1),
+        ClipSpec(3840, 2160, codec='h264', gop=250),
+        ClipSpec(3840, 2160, codec='hevc', gop=250),
+    ],
+}
+
+
+def _video_codec_args(spec):
+    """Build the FFmpeg video encoder arguments for a clip."""
+    if spec.codec == 'h264':
+        return [
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+            "-g", str(spec.gop), "-keyint_min", str(spec.gop), "-sc_threshold", "0",
+            "-pix_fmt", "yuv420p",
+        ]
+    if spec.codec == 'hevc':
+        return [
+            "-c:v", "libx265", "-preset", "veryfast", "-crf", "20",
+            "-x265-params", f"keyint={spec.gop}:min-keyint={spec.gop}:scenecut=0:log-level=error",
+            "-tag:v", "hvc1", "-pix_fmt", "yuv420p",
+        ]
+    return ["-c:v", "prores_ks", "-profile:v", "2", "-pix_fmt", "yuv422p10le"]
+
+
+def build_clip_command(spec, output_path):
+    """Build the FFmpeg command that renders a synthetic clip.
+
+    Args:
+        spec: ClipSpec describing the clip
+        output_path: Path of the clip to write
+
+    Returns:
+        list: FFmpeg command
+    """
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"]
+    size = f"{spec.width}x{spec.height}"
+
+    concat_inputs = ""
+    for i in range(spec.num_scenes):
+        source, options = SCENE_SOURCES[i % len(SCENE_SOURCES)]
+        source_args = f"size={size}:rate={spec.fps}:duration={spec.scene_length}"
+        if options:
+            source_args = f"{options}:{source_args}"
+        tone = SCENE_TONES[i % len(SCENE_TONES)]
+
+        cmd.extend(["-f", "lavfi", "-i", f"{source}={source_args}"])
+        cmd.extend(["-f", "lavfi", "-i",
+                    f"sine=frequency={tone}:sample_rate=48000:duration={spec.scene_length}"])
+        concat_inputs += f"[{2 * i}:v][{2 * i + 1}:a]"
+
+    filter_graph = (f"{concat_inputs}concat=n={spec.num_scenes}:v=1:a=1[v][a];"
+                    f"[v]format=yuv420p,setsar=1[vout]")
+    cmd.extend(["-filter_complex", filter_graph, "-map", "[vout]", "-map", "[a]"])
+    cmd.extend(_video_codec_args(spec))
+    cmd.extend(CODECS[spec.codec]['audio'])
+    cmd.extend(["-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact"])
+    cmd.append(output_path)
+    return cmd
+
+
+def ensure_clip(spec, clips_dir):
+    """Render a synthetic clip unless a cached copy already exists.
+
+    Args:
+        spec: ClipSpec describing the clip
+        clips_dir: Directory holding generated clips
+
+    Returns:
+        str: Path to the clip
+    """
+    os.makedirs(clips_dir, exist_ok=True)
+    filename = f"{spec.name}_v{CLIP_VERSION}{CODECS[spec.codec]['extension']}"
+    output_path = os.path.join(clips_dir, filename)
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        return output_path
+
+    # Render to a temporary name so an interrupted run never leaves a truncated clip
+    partial_path = output_path + ".partial" + CODECS[spec.codec]['extension']
+    process = subprocess.run(build_clip_command(spec, partial_path),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if process.returncode != 0:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        raise RuntimeError(f"Could not generate synthetic clip {spec.name}: {process.stderr.strip()}")
+    os.replace(partial_path, output_path)
+    return output_path
@@ -63,6 +63,13 @@ class ConfigManager:
             'sequence_length': DEFAULT_SEQUENCE_LENGTH,
             'num_sequences': DEFAULT_NUM_SEQUENCES,
             'scene_threshold': DEFAULT_SCENE_THRESHOLD,
+            'audio_weight': 0.0,  # Weight of audio novelty in scene detection (0 = visual only)
+            'scene_selection': 'first',  # 'first' usable cut or 'best' scenes across the video
+            'analysis_workers': 1,  # Processes analyzing chunks of one video in 'best' selection (1 = sequential)
+            'encode_speed_tier': 'standard',  # H.264/H.265 speed tier: 'draft', 'standard' or 'archival'
+            'prores_encoder': 'auto',  # 'auto', 'prores_ks' (quality) or 'prores_aw' (speed)
+            'encode_chunks': 1,  # GOP-aligned chunks encoded in parallel per long sequence (1 = one encode)
+            'renditions': [],  # Renditions per sequence from one decode, e.g. DELIVERY_RENDITIONS; empty = one output
             'max_analysis_duration': MAX_ANALYSIS_DURATION,
             'output_format': DEFAULT_OUTPUT_FORMAT,
             'quality': DEFAULT_QUALITY,
@@ -71,7 +78,31 @@ class ConfigManager:
             'recent_files': [],
             'batch_settings': {
                 'parallel_processing': True,
-                'max_workers': 2
+                'max_workers': 2,
+                'deduplicate': True,
+                'verify_duplicates': False,
+                'sniff_content': False,
+                'memory_budget_mb': 1024
+            },
+            'cpu_governor': {
+                'enabled': True,  # Share CPU threads between parallel batch jobs
+                'nice': 0,  # Niceness of batch FFmpeg processes (0 = unchanged)
+                'low_io_priority': False  # Idle I/O class for batch FFmpeg processes
+            },
+            'storyboard_settings': {
+                'enabled': False,  # Contact sheet per video, sprite + WebVTT track per sequence
+                'sheet_columns': 4,
+                'sheet_tile_size': [320, 180],
+                'sheet_max_tiles': 24,
+                'sprite_interval': 2.0,
+                'sprite_columns': 10,
+                'sprite_tile_size': [160, 90]
+            },
+            'metrics_settings': {
+                'enabled': False,
+                'port': 9464,
+                'json_path': None,
+                'dump_interval': 15.0
             }
         }
         
@@ -0,0 +1,216 @@
+"""Streaming audio novelty analysis for audio-aware scene detection."""
+import logging
+import subprocess
+
+import numpy as np
+
+from core import metrics
+
+# Analysis sample rate; speech and music boundaries are well represented at 16 kHz mono
+SAMPLE_RATE = 16000
+
+# STFT frame and hop in samples (64 ms frames every 32 ms)
+FRAME_SIZE = 1024
+HOP_SIZE = 512
+
+# Seconds of PCM read from ffmpeg per chunk
+CHUNK_SECONDS = 1.0
+
+# Weight of the newest chunk in the running feature statistics
+STATS_SMOOTHING = 0.1
+
+# Novelty (in standard deviations above the running mean) that counts as an audio cut
+AUDIO_NOVELTY_THRESHOLD = 4.0
+
+# Novelty the curve must fall below after a cut before audio can trigger another one
+AUDIO_NOVELTY_RELEASE = 2.0
+
+# Minimum seconds after a scene change before audio may contribute to the next one
+MIN_AUDIO_CUT_GAP = 1.0
+
+# Lower bounds of the feature standard deviations. Without them, statistics seeded
+# from leading silence (near-zero variance) turn the start of the audio into
+# seconds of extreme novelty. Both are well below the spread of steady noise or music.
+MIN_FLUX_STD = 0.02
+MIN_LEVEL_STD = 0.5  # dB
+
+_EPSILON = 1e-10
+
+
+def _frames(samples, frame_size, hop_size):
+    """View a 1-D sample buffer as overlapping frames without copying."""
+    count = 1 + (len(samples) - frame_size) // hop_size
+    stride = samples.strides[0]
+    return np.lib.stride_tricks.as_strided(samples, shape=(count, frame_size),
+                                           strides=(hop_size * stride, stride), writeable=False)
+
+
+class _RunningStats:
+    """Exponentially weighted mean and variance of a feature, updated per chunk."""
+
+    def __init__(self, min_std, smoothing=STATS_SMOOTHING):
+        self.min_std = min_std
+        self.smoothing = smoothing
+        self.mean = None
+        self.var = None
+
+    def zscore(self, values):
+        """Standardize values against the statistics of earlier chunks, then update them."""
+        chunk_mean = float(values.mean())
+        chunk_var = float(values.var())
+        if self.mean is None:
+            self.mean, self.var = chunk_mean, chunk_var
+        scores = (values - self.mean) / max(np.sqrt(self.var), self.min_std)
+        self.mean += self.smoothing * (chunk_mean - self.mean)
+        self.var += self.smoothing * (chunk_var - self.var)
+        return scores
+
+
+def iter_audio_novelty(video_path, max_duration=None, sample_rate=SAMPLE_RATE,
+                       frame_size=FRAME_SIZE, hop_size=HOP_SIZE, chunk_seconds=CHUNK_SECONDS):
+    """Stream an audio novelty curve for a video.
+
+    PCM is read from ffmpeg in fixed-size chunks. For every STFT frame the
+    spectral flux and the change in RMS level are computed with NumPy over
+    the whole chunk at once, standardized against running statistics and
+    averaged. Only one chunk plus one frame of overlap is held in memory,
+    whatever the length of the file.
+
+    Args:
+        video_path: Path to the input video
+        max_duration: Optional number of seconds to analyze from the start
+        sample_rate: Sample rate the audio is resampled to
+        frame_size: STFT frame size in samples
+        hop_size: Hop between frames in samples
+        chunk_seconds: Seconds of audio processed per chunk
+
+    Yields:
+        tuple: (timestamp in seconds, novelty in standard deviations). Nothing is
+               yielded for files without an audio stream.
+    """
+    logger = logging.getLogger(__name__)
+    cmd = ["ffmpeg", "-v", "error", "-i", video_path]
+    if max_duration:
+        cmd.extend(["-t", str(max_duration)])
+    cmd.extend(["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "-"])
+
+    metrics.FFMPEG_SPAWNS.inc()
+    metrics.FFMPEG_PROCESSES.inc()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        window = np.hanning(frame_size).astype(np.float32)
+        chunk_bytes = int(chunk_seconds * sample_rate) // hop_size * hop_size * 2
+        carry = np.zeros(0, dtype=np.float32)
+        consumed = 0  # Samples before the start of carry
+        previous_spectrum = None
+        previous_level = None
+        flux_stats = _RunningStats(MIN_FLUX_STD)
+        level_stats = _RunningStats(MIN_LEVEL_STD)
+        analyzed = False
+
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            samples = np.frombuffer(data[:len(data) // 2 * 2], dtype='<i2').astype(np.float32) / 32768.0
+            buffer = np.concatenate((carry, samples))
+            if len(buffer) < frame_size:
+                carry = buffer
+                continue
+
+            frames = _frames(buffer, frame_size, hop_size)
+            count = len(frames)
+
+            # Log-compressed magnitude spectra; flux sums the per-bin increases
+            spectrum = np.log1p(np.abs(np.fft.rfft(frames * window, axis=1)))
+            if previous_spectrum is None:
+                previous_spectrum = spectrum[:1]
+            flux = np.maximum(np.diff(spectrum, axis=0, prepend=previous_spectrum), 0).mean(axis=1)
+
+            # RMS level in dB and its change from the previous frame
+            level = 10 * np.log10(np.mean(frames ** 2, axis=1) + _EPSILON)
+            if previous_level is None:
+                previous_level = level[0]
+            level_change = np.abs(np.diff(level, prepend=previous_level))
+
+            novelty = (flux_stats.zscore(flux) + level_stats.zscore(level_change)) / 2
+            starts = consumed + np.arange(count) * hop_size
+            timestamps = (starts + frame_size / 2) / sample_rate
+            analyzed = True
+            for timestamp, value in zip(timestamps.tolist(), novelty.tolist()):
+                yield timestamp, value
+
+            previous_spectrum = spectrum[-1:]
+            previous_level = level[-1]
+            # Keep the samples the next frame still overlaps
+            next_start = count * hop_size
+            carry = buffer[next_start:].copy()
+            consumed += next_start
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        metrics.FFMPEG_PROCESSES.dec()
+        if not analyzed:
+            logger.info(f"No audio stream analyzed in {video_path}")
+
+
+class AudioNoveltyCursor:
+    """Follows a novelty stream in step with the video frames of a detection pass.
+
+    Novelty stays high for a while after a boundary, until the running
+    statistics catch up. The cursor therefore applies hysteresis: once the
+    curve reaches the cut threshold it is reported as 0 until it has fallen
+    below the release level again, so one boundary yields one audio cut.
+    """
+
+    def __init__(self, novelty, threshold=AUDIO_NOVELTY_THRESHOLD, release=AUDIO_NOVELTY_RELEASE):
+        """Initialize the cursor.
+
+        Args:
+            novelty: Iterator of (timestamp, novelty) tuples, e.g. from iter_audio_novelty()
+            threshold: Novelty that counts as a boundary and latches the cursor
+            release: Novelty below which a latched cursor reports novelty again
+        """
+        self._novelty = iter(novelty)
+        self._pending = None
+        self._exhausted = False
+        self.threshold = threshold
+        self.release = release
+        self._latched = False
+
+    def advance(self, timestamp):
+        """Consume the curve up to a timestamp.
+
+        Args:
+            timestamp: Time of the current video frame in seconds
+
+        Returns:
+            float: Highest novelty since the previous call (0.0 if none, or while
+                   latched after a boundary)
+        """
+        peak = 0.0
+        while not self._exhausted:
+            if self._pending is None:
+                try:
+                    self._pending = next(self._novelty)
+                except StopIteration:
+                    self._exhausted = True
+                    break
+            if self._pending[0] > timestamp:
+                break
+            value = self._pending[1]
+            self._pending = None
+            if self._latched:
+                self._latched = value >= self.release
+                continue
+            peak = max(peak, value)
+            self._latched = value >= self.threshold
+        return peak
+
+    def close(self):
+        """Stop the underlying stream (terminating its ffmpeg process)."""
+        close = getattr(self._novelty, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,447 @@
+"""Batch processing of multiple videos."""
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+
+from constants import MAX_ANALYSIS_DURATION
+from core import metrics
+from core.disk_space import DiskSpaceGovernor, OutputSizeEstimator
+from core.fingerprint import group_duplicates, link_outputs
+from core.instrumentation import BatchInstrumentation, format_summary
+from core.resources import DEFAULT_WORKER_NICE, CPUBudget, MemoryBudget, MemoryGovernor
+from core.storyboard import (
+    SHEET_COLUMNS,
+    SHEET_MAX_TILES,
+    SHEET_TILE_SIZE,
+    SPRITE_COLUMNS,
+    SPRITE_INTERVAL,
+    SPRITE_TILE_SIZE,
+    build_contact_sheet,
+    build_sprite_track,
+)
+from core.video_processor import DEFAULT_SPEED_TIER, VideoProcessor
+
+
+class BatchProcessor:
+    """Runs scene detection and sequence extraction over a batch of videos."""
+
+    def __init__(self, processor=None, logger=None, estimator=None, min_free_bytes=1024 ** 3,
+                 space_poll_interval=5.0):
+        """Initialize the batch processor.
+
+        Args:
+            processor: Optional VideoProcessor instance. If None, a new one will be created.
+            logger: Optional logger instance used when creating the processor.
+            estimator: Optional OutputSizeEstimator. If None, a new one will be created.
+            min_free_bytes: Free space the batch never reserves on the output disk.
+            space_poll_interval: Seconds between free space checks while admission is paused.
+        """
+        self.processor = processor or VideoProcessor(logger)
+        self.logger = self.processor.logger
+        self.estimator = estimator or OutputSizeEstimator()
+        self.min_free_bytes = min_free_bytes
+        self.space_poll_interval = space_poll_interval
+        self.batch_instrumentation = None
+        self._queued = 0
+        self._queued_lock = threading.Lock()  # Worker threads dequeue concurrently
+
+    def start_batch(self, job_count=0):
+        """Start collecting timing totals for a new batch.
+
+        Args:
+            job_count: Number of jobs queued in the batch, for the queue metrics
+        """
+        self.batch_instrumentation = BatchInstrumentation()
+        with self._queued_lock:
+            self._queued = job_count
+            metrics.JOBS_QUEUED.inc(job_count)
+
+    def finish_batch(self):
+        """Finish the current batch and log its timing summary.
+
+        Returns:
+            dict: The batch summary, or None if no batch was started
+        """
+        if self.batch_instrumentation is None:
+            return None
+        summary = self.batch_instrumentation.finish()
+        self.batch_instrumentation = None
+
+        # Jobs never started (e.g. after a cancel) leave the queue with the batch
+        with self._queued_lock:
+            metrics.JOBS_QUEUED.dec(self._queued)
+            self._queued = 0
+        self.logger.info(format_summary(summary))
+        return summary
+
+    @staticmethod
+    def get_output_dir(output_folder, video_path):
+        """Return the folder a video's sequences are written to."""
+        base_name = os.path.splitext(os.path.basename(video_path))[0]
+        return os.path.join(output_folder, f"{base_name}_sequences")
+
+    def process_batch(self, video_files, output_folder, sequence_length, threshold, num_sequences,
+                      output_format, quality, max_workers=1, status_callback=None,
+                      progress_callback=None, should_stop=None, deduplicate=True,
+                      verify_duplicates=False, memory_budget_mb=None, audio_weight=0.0,
+                      scene_selection="first", speed_tier=DEFAULT_SPEED_TIER, prores_encoder="auto",
+                      renditions=None, storyboard=None, analysis_workers=1,
+                      encode_chunks=1, cpu_governor=None):
+        """Process a batch of videos with disk-space- and memory-aware admission.
+
+        Jobs start in order, up to max_workers at a time, and only while their
+        estimated output fits in the free space left after the reservations of
+        the jobs already running. Otherwise admission pauses until a running
+        job finishes or space is freed, then resumes by itself.
+
+        Each worker gets a memory budget. The worker count is capped by the
+        available system memory, and a job is only started next to running
+        ones while the process RSS leaves room for another budget.
+
+        With the CPU governor enabled, the workers share the CPU: each job's
+        FFmpeg and OpenCV thread counts are sized for the jobs running at
+        once instead of each assuming it owns the machine.
+
+        With deduplicate, files with identical content are processed once and
+        the other copies receive hard links to (or references of) its outputs.
+
+        Args:
+            video_files: Paths of the videos to process
+            output_folder: Base output folder of the batch
+            sequence_length: Length of each sequence in seconds
+            threshold: Threshold for scene change detection
+            num_sequences: Number of consecutive sequences to extract
+            output_format: Output format (prores, h264, h265)
+            quality: Quality setting (low, medium, high)
+            max_workers: Maximum number of videos processed in parallel
+            status_callback: Optional callback(file_path, status, detail). status is
+                             'waiting_for_space', 'processing', 'completed' (detail:
+                             output paths) or 'failed' (detail: error message).
+            progress_callback: Optional callback(file_path, percent) for per-file progress
+            should_stop: Optional callable returning True to stop admitting new jobs
+            deduplicate: Collapse files with the same content fingerprint into one job
+            verify_duplicates: Confirm fingerprint matches with a full-file hash
+            memory_budget_mb: Optional per-worker memory budget in MB; defaults to
+                              the processor's budget
+            audio_weight: Weight of audio novelty in scene detection (0 disables it)
+            scene_selection: 'first' for consecutive sequences from the first usable cut,
+                             'best' for the best-scoring scenes across the whole video
+            speed_tier: H.264/H.265 encode speed tier ('draft', 'standard', 'archival')
+            prores_encoder: 'auto' to choose the ProRes encoder per job, or an encoder name
+            renditions: Optional list of renditions written per sequence from one decode
+                        (see DELIVERY_RENDITIONS); replaces output_format and quality
+            storyboard: Optional storyboard settings (the 'storyboard_settings' config
+                        section). When enabled, each video gets a contact sheet and each
+                        sequence a sprite sheet with a WebVTT thumbnail track.
+            analysis_workers: Worker processes analyzing timeline chunks of one video
+                              in 'best' scene selection (1 = sequential)
+            encode_chunks: GOP-aligned chunks encoded in parallel per long sequence
+                           (1 = one encode per sequence)
+            cpu_governor: Optional CPU governor settings (the 'cpu_governor' config
+                          section): 'enabled', 'nice' and 'low_io_priority'
+
+        Returns:
+            dict: Maps each finished file path to its output paths (empty on failure)
+        """
+        notify = status_callback or (lambda file_path, status, detail=None: None)
+        governor = DiskSpaceGovernor(output_folder, self.min_free_bytes)
+
+        # Maps each file that will be processed to the duplicates sharing its outputs
+        duplicates = {}
+        jobs = list(video_files)
+        if deduplicate and len(video_files) > 1:
+            jobs = []
+            for group in group_duplicates(video_files, verify=verify_duplicates):
+                jobs.append(group[0])
+                if len(group) > 1:
+                    duplicates[group[0]] = group[1:]
+                    self.logger.info(f"{os.path.basename(group[0])} has {len(group) - 1} duplicate(s); "
+                                     f"processing it once")
+        pending = deque(jobs)
+
+        # Fit the worker count to the memory budget (the processor's own budget is restored
+        # when the batch ends)
+        previous_memory_budget = self.processor.memory_budget
+        if memory_budget_mb:
+            self.processor.memory_budget = MemoryBudget(memory_budget_mb * 1024 * 1024)
+        budget = self.processor.memory_budget
+        workers = budget.max_workers(max(1, max_workers))
+        if workers < max_workers:
+            self.logger.warning(f"Running {workers} instead of {max_workers} workers to stay within "
+                                f"{budget.budget_bytes / 1024 ** 2:.0f} MB per worker")
+        max_workers = workers
+        memory_governor = MemoryGovernor(budget, max_workers)
+
+        # Share the CPU between the workers for the duration of the batch
+        previous_cpu_budget = self.processor.cpu_budget
+        opencv_threads = cv2.getNumThreads()
+        cpu_budget = None
+        if cpu_governor and cpu_governor.get('enabled'):
+            cpu_budget = CPUBudget(nice=cpu_governor.get('nice', DEFAULT_WORKER_NICE),
+                                   low_io_priority=cpu_governor.get('low_io_priority', False))
+            cpu_budget.configure_opencv(max_workers)
+            self.processor.cpu_budget = cpu_budget
+
+        waiting_for_memory = False
+        running = {}  # Maps future to (file_path, reservation)
+        results = {}
+        waiting_for = None
+
+        def finish(file_path, output_paths, error=None):
+            results[file_path] = output_paths
+            if output_paths:
+                notify(file_path, 'completed', output_paths)
+            else:
+                notify(file_path, 'failed', error or "")
+            for duplicate in duplicates.pop(file_path, []):
+                metrics.JOBS_TOTAL.inc(status="deduplicated")
+                if not output_paths:
+                    results[duplicate] = []
+                    notify(duplicate, 'failed', f"Duplicate of {os.path.basename(file_path)}, which failed")
+                    continue
+                try:
+                    results[duplicate] = link_outputs(
+                        output_paths,
+                        os.path.splitext(os.path.basename(file_path))[0],
+                        self.get_output_dir(output_folder, duplicate),
+                        os.path.splitext(os.path.basename(duplicate))[0])
+                    notify(duplicate, 'completed', results[duplicate])
+                except OSError as e:
+                    results[duplicate] = []
+                    notify(duplicate, 'failed', str(e))
+
+        self.start_batch(len(jobs))
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while pending or running:
+                    stopping = should_stop is not None and should_stop()
+
+                    # Admit jobs while there are free workers and enough disk space
+                    while pending and not stopping and len(running) < max_workers:
+                        if not memory_governor.can_admit(len(running)):
+                            if not waiting_for_memory:
+                                waiting_for_memory = True
+                                self.logger.warning("Pausing batch admission: running jobs use the "
+                                                    "memory budget of the idle workers")
+                            break
+                        waiting_for_memory = False
+                        file_path = pending[0]
+                        output_dir = self.get_output_dir(output_folder, file_path)
+                        try:
+                            if renditions:
+                                # Full-size estimates per rendition; scaled renditions make this conservative
+                                estimate = sum(
+                                    self.estimator.estimate_job_bytes(
+                                        file_path, sequence_length, num_sequences,
+                                        rendition['format'], rendition.get('quality', 'medium'))
+                                    for rendition in renditions)
+                            else:
+                                estimate = self.estimator.estimate_job_bytes(
+                                    file_path, sequence_length, num_sequences, output_format, quality)
+                        except Exception as e:
+                            pending.popleft()
+                            finish(file_path, [], str(e))
+                            continue
+
+                        reservation = governor.try_reserve(output_dir, estimate)
+                        if reservation is None:
+                            if waiting_for != file_path:
+                                waiting_for = file_path
+                                self.logger.warning(
+                                    f"Pausing batch: {os.path.basename(file_path)} needs about "
+                                    f"{estimate / 1024 ** 2:.0f} MB but only "
+                                    f"{max(governor.available_bytes(), 0) / 1024 ** 2:.0f} MB are free")
+                                notify(file_path, 'waiting_for_space')
+                            break
+
+                        if waiting_for == file_path:
+                            self.logger.info("Enough disk space available, resuming batch")
+                        waiting_for = None
+                        pending.popleft()
+                        if cpu_budget is not None:
+                            cpu_budget.expect(min(max_workers, len(running) + 1 + len(pending)))
+                        notify(file_path, 'processing')
+                        file_progress = None
+                        if progress_callback:
+                            file_progress = lambda p, f=file_path: progress_callback(f, p)
+                        future = executor.submit(
+                            self._process_single_video, file_path, output_folder, sequence_length,
+                            threshold, num_sequences, output_format, quality, file_progress,
+                            audio_weight, scene_selection, speed_tier, prores_encoder, renditions,
+                            storyboard, analysis_workers, encode_chunks)
+                        running[future] = (file_path, reservation)
+
+                    if not running:
+                        if stopping or not pending:
+                            break
+                        # Nothing in flight and the next job does not fit: poll until space frees up
+                        time.sleep(self.space_poll_interval)
+                        continue
+
+                    done, _ = wait(running, timeout=self.space_poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path, reservation = running.pop(future)
+                        governor.release(reservation)
+                        try:
+                            success, output_paths = future.result()
+                        except Exception as e:
+                            finish(file_path, [], str(e))
+                            continue
+                        # Mixed renditions would skew the per-format size history
+                        if success and not renditions:
+                            self.estimator.record_output(file_path, output_paths, sequence_length,
+                                                         output_format, quality)
+                        finish(file_path, output_paths)
+        finally:
+            self.processor.memory_budget = previous_memory_budget
+            self.processor.cpu_budget = previous_cpu_budget
+            cv2.setNumThreads(opencv_threads)
+            self.estimator.save_history()
+            self.finish_batch()
+
+        return results
+
+    def _process_single_video(self, video_path, output_folder, sequence_length, threshold,
+                              num_sequences, output_format, quality, progress_callback=None,
+                              audio_weight=0.0, scene_selection="first",
+                              speed_tier=DEFAULT_SPEED_TIER, prores_encoder="auto", renditions=None,
+                              storyboard=None, analysis_workers=1, encode_chunks=1):
+        """Detect scenes in one video and extract its sequences.
+
+        Sequences are written to a '<name>_sequences' subfolder of output_folder.
+
+        Args:
+            video_path: Path to the input video
+            output_folder: Base output folder of the batch
+            sequence_length: Length of each sequence in seconds
+            threshold: Threshold for scene change detection
+            num_sequences: Number of consecutive sequences to extract
+            output_format: Output format (prores, h264, h265)
+            quality: Quality setting (low, medium, high)
+            progress_callback: Optional callback receiving progress from 0 to 100
+            audio_weight: Weight of audio novelty in scene detection (0 disables it)
+            scene_selection: 'first' or 'best' (see process_batch)
+            speed_tier: H.264/H.265 encode speed tier
+            prores_encoder: 'auto' or a ProRes encoder name
+            renditions: Optional list of renditions per sequence
+            storyboard: Optional storyboard settings (see process_batch)
+            analysis_workers: Worker processes for chunked whole-video analysis
+            encode_chunks: Chunks encoded in parallel per long sequence
+
+        Returns:
+            tuple: (success, output_paths)
+        """
+        file_output_dir = self.get_output_dir(output_folder, video_path)
+
+        with self._queued_lock:
+            if self._queued > 0:
+                self._queued -= 1
+                metrics.JOBS_QUEUED.dec()
+        metrics.JOBS_RUNNING.inc()
+        output_paths = []
+
+        self.processor.begin_job(os.path.basename(video_path))
+        try:
+            detection_progress = (lambda p: progress_callback(p * 0.5)) if progress_callback else None
+            mode = "consecutive"
+            if scene_selection == "best":
+                # Score candidate windows across the whole video; one sequence per chosen scene
+                scene_changes = self.processor.select_scenes(
+                    video_path,
+                    num_sequences,
+                    sequence_length,
+                    threshold,
+                    progress_callback=detection_progress,
+                    audio_weight=audio_weight,
+                    workers=analysis_workers
+                )
+                mode = "selected"
+            else:
+                # Extraction consumes the cuts as they are found and stops detection at the first usable one
+                scene_changes = self.processor.iter_scene_changes(
+                    video_path,
+                    threshold,
+                    max_duration=MAX_ANALYSIS_DURATION,
+                    progress_callback=detection_progress,
+                    audio_weight=audio_weight,
+                    required_duration=sequence_length * num_sequences
+                )
+            output_paths = self.processor.extract_sequences(
+                video_path,
+                file_output_dir,
+                scene_changes,
+                sequence_length,
+                num_sequences,
+                output_format,
+                quality,
+                progress_callback=(lambda p: progress_callback(50 + p * 0.5)) if progress_callback else None,
+                mode=mode,
+                speed_tier=speed_tier,
+                prores_encoder=prores_encoder,
+                renditions=renditions,
+                encode_chunks=encode_chunks
+            )
+            if output_paths and storyboard and storyboard.get('enabled'):
+                self._write_storyboards(video_path, file_output_dir, output_paths, scene_changes,
+                                        renditions, storyboard)
+        finally:
+            job = self.processor.end_job()
+            if job is not None:
+                if self.batch_instrumentation is not None:
+                    self.batch_instrumentation.add_job(job)
+                budget_bytes = self.processor.memory_budget.budget_bytes
+                if job.rss_growth > budget_bytes:
+                    self.logger.warning(f"{job.name} grew RSS by {job.rss_growth / 1024 ** 2:.0f} MB, "
+                                        f"over its budget of {budget_bytes / 1024 ** 2:.0f} MB")
+            metrics.JOBS_RUNNING.dec()
+            metrics.JOBS_TOTAL.inc(status="completed" if output_paths else "failed")
+
+        return bool(output_paths), output_paths
+
+    def _write_storyboards(self, video_path, output_dir, output_paths, scene_changes, renditions,
+                           settings):
+        """Write the contact sheet of a video and the sprite tracks of its sequences.
+
+        Failures are logged and do not fail the job.
+
+        Args:
+            video_path: Path to the input video
+            output_dir: Folder the sequences were written to
+            output_paths: Paths of the extracted sequences
+            scene_changes: Scene change timestamps, if a full list was detected
+            renditions: Renditions per sequence, if any
+            settings: Storyboard settings
+        """
+        base_name = os.path.splitext(os.path.basename(video_path))[0]
+        try:
+            build_contact_sheet(
+                video_path,
+                os.path.join(output_dir, f"{base_name}_contact_sheet.jpg"),
+                scene_changes=scene_changes if isinstance(scene_changes, list) else None,
+                tile_size=tuple(settings.get('sheet_tile_size', SHEET_TILE_SIZE)),
+                columns=settings.get('sheet_columns', SHEET_COLUMNS),
+                max_tiles=settings.get('sheet_max_tiles', SHEET_MAX_TILES),
+                thumbnail_cache=self.processor.thumbnail_cache
+            )
+
+            # Renditions of a sequence share its timeline; the last (usually smallest) one is decoded
+            sequence_paths = {}
+            for path in output_paths:
+                match = re.search(r"_seq_(\d+)", os.path.basename(path)) if renditions else None
+                sequence_paths[match.group(1) if match else path] = path
+            for sequence_path in sequence_paths.values():
+                build_sprite_track(
+                    sequence_path,
+                    output_dir,
+                    os.path.splitext(os.path.basename(sequence_path))[0],
+                    interval=settings.get('sprite_interval', SPRITE_INTERVAL),
+                    tile_size=tuple(settings.get('sprite_tile_size', SPRITE_TILE_SIZE)),
+                    columns=settings.get('sprite_columns', SPRITE_COLUMNS)
+                )
+        except Exception as e:
+            self.logger.error(f"Error writing storyboards for {os.path.basename(video_path)}: {str(e)}")
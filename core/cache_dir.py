@@ -0,0 +1,55 @@
+"""Size-bounded cache directories with least-recently-used eviction."""
+import os
+
+# Share of the size bound an overflowing cache directory is pruned down to
+EVICTION_TARGET = 0.9
+
+
+def cache_entries(cache_dir):
+    """List the files of a cache directory, including its subfolders.
+
+    Args:
+        cache_dir: Cache directory
+
+    Returns:
+        list: (path, size in bytes, mtime) tuples
+    """
+    entries = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def evict_lru(entries, total_bytes, max_bytes):
+    """Delete least recently used files once a cache exceeds its bound.
+
+    Caches touch a file's mtime whenever it is read, so the oldest mtime is
+    the least recently used entry. Files are deleted until the cache is
+    down to EVICTION_TARGET of the bound.
+
+    Args:
+        entries: (path, size, mtime) tuples from cache_entries()
+        total_bytes: Current size of the cache
+        max_bytes: Upper bound for the cache
+
+    Returns:
+        int: Size of the cache after eviction
+    """
+    if total_bytes <= max_bytes:
+        return total_bytes
+    target = max_bytes * EVICTION_TARGET
+    for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+        if total_bytes <= target:
+            break
+        try:
+            os.unlink(path)
+            total_bytes -= size
+        except OSError:
+            pass
+    return total_bytes
@@ -0,0 +1,126 @@
+"""Parallel analysis of one long video in timeline chunks."""
+import bisect
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from core.resources import open_capture
+
+# Shortest chunk worth a worker process; shorter videos are analyzed sequentially
+MIN_CHUNK_SECONDS = 30.0
+
+
+def plan_chunks(frame_count, chunks, keyframes=None):
+    """Split the analyzed frames of a video into contiguous chunks.
+
+    Frame 0 has no predecessor to differ from, so the chunks cover frames
+    1 to frame_count - 1. With keyframes, a chunk boundary is moved so the
+    frame a worker seeks to is the nearest keyframe, and the worker does not
+    decode frames from an earlier keyframe only to throw them away. Bounds
+    with no keyframe within a quarter chunk stay where they are, so the
+    chunks stay balanced.
+
+    Args:
+        frame_count: Number of frames to analyze
+        chunks: Number of chunks wanted
+        keyframes: Optional sorted frame numbers of the keyframes
+
+    Returns:
+        list: (start, end) frame ranges, end exclusive, in timeline order
+    """
+    frames = frame_count - 1
+    chunks = max(1, min(chunks, frames))
+    if frames <= 0:
+        return []
+    bounds = [1 + frames * i // chunks for i in range(chunks + 1)]
+    if keyframes:
+        tolerance = frames / chunks / 4
+        for i in range(1, chunks):
+            seek = bounds[i] - 1
+            position = bisect.bisect_left(keyframes, seek)
+            nearby = [keyframes[p] for p in (position - 1, position) if 0 <= p < len(keyframes)]
+            nearest = min(nearby, key=lambda keyframe: abs(keyframe - seek))
+            if abs(nearest - seek) <= tolerance and bounds[i - 1] < nearest + 1 < frame_count:
+                bounds[i] = nearest + 1
+        bounds = sorted(set(bounds))
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+
+def analyze_chunk(video_path, start, end, decode_end, analysis_size, threshold, lookahead_frames,
+                  threads=None):
+    """Compute the detection signals of one chunk; runs in a worker process.
+
+    The worker seeks to the frame before start (one frame of overlap, so the
+    first difference matches the sequential pass) and decodes on to
+    decode_end, past end by the flash look-ahead, so candidates near the end
+    of the chunk can still be checked.
+
+    Args:
+        video_path: Path to the input video
+        start: First frame whose difference is computed
+        end: Frame after the last one whose difference is computed
+        decode_end: Frame after the last one decoded (end plus the look-ahead, clipped)
+        analysis_size: Optional (width, height) frames are shrunk to before analysis
+        threshold: Scene change threshold; frames above it get a flash check value
+        lookahead_frames: Frames between a candidate cut and its flash check
+        threads: Optional decoder and OpenCV threads of the worker; None keeps the
+                 defaults (one per core)
+
+    Returns:
+        dict: 'start', 'diffs' and 'levels' (float64 arrays for frames start.. up to
+              the last frame read before end), 'reverts' (maps a frame above the
+              threshold to the mean difference between the frame lookahead_frames
+              later and the frame before it) and the decode/convert/diff seconds
+    """
+    timings = {'decode': 0.0, 'convert': 0.0, 'diff': 0.0}
+    diffs = []
+    levels = []
+    reverts = {}
+    pending = set()
+    history = deque(maxlen=lookahead_frames + 1)  # (index, gray) of the latest frames
+
+    if threads:
+        cv2.setNumThreads(threads)
+    cap = open_capture(video_path, threads)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+        for index in range(start - 1, decode_end):
+            began = time.perf_counter()
+            ret, frame = cap.read()
+            timings['decode'] += time.perf_counter() - began
+            if not ret:
+                break
+
+            began = time.perf_counter()
+            if analysis_size:
+                frame = cv2.resize(frame, analysis_size, interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            timings['convert'] += time.perf_counter() - began
+
+            began = time.perf_counter()
+            if history and index < end:
+                mean_diff = np.mean(cv2.absdiff(gray, history[-1][1]))
+                diffs.append(mean_diff)
+                levels.append(float(gray.mean()))
+                if lookahead_frames > 0 and mean_diff > threshold:
+                    pending.add(index)
+            if index - lookahead_frames in pending:
+                # history[0] is the frame before the candidate
+                reverts[index - lookahead_frames] = float(np.mean(cv2.absdiff(gray, history[0][1])))
+                pending.discard(index - lookahead_frames)
+            history.append((index, gray))
+            timings['diff'] += time.perf_counter() - began
+    finally:
+        cap.release()
+
+    return {
+        'start': start,
+        'diffs': np.array(diffs, dtype=np.float64),
+        'levels': np.array(levels, dtype=np.float64),
+        'reverts': reverts,
+        'timings': timings,
+    }
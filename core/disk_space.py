@@ -0,0 +1,273 @@
+"""Output size estimation and disk space reservations for batch runs."""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+import cv2
+
+from utils import get_free_disk_space
+
+# Extracted sequences are scaled down to fit within HD
+MAX_OUTPUT_WIDTH = 1920
+MAX_OUTPUT_HEIGHT = 1080
+
+# Published ProRes target bitrates in Mbit/s at 1920x1080 29.97 fps, by the
+# profile extract_sequences() selects for each quality (0=Proxy, 2=422, 3=HQ)
+PRORES_PROFILE_MBPS = {
+    'low': 45.0,
+    'medium': 147.0,
+    'high': 220.0,
+}
+PRORES_REFERENCE_PIXEL_RATE = 1920 * 1080 * 29.97
+
+# Starting bits per pixel for the CRF encodes until real outputs have been observed
+CRF_SEED_BITS_PER_PIXEL = {
+    'h264': {'low': 0.05, 'medium': 0.10, 'high': 0.20},
+    'h265': {'low': 0.03, 'medium': 0.06, 'high': 0.12},
+}
+
+# Audio bitrates in bytes per second (ProRes copies the source audio, assume PCM)
+AUDIO_BYTES_PER_SECOND = {
+    'prores': 48000 * 2 * 2,
+    'h264': 128000 // 8,
+    'h265': 128000 // 8,
+}
+
+# Weight of the newest observation in the bitrate history average
+HISTORY_SMOOTHING = 0.3
+
+# Estimates are padded so a single noisy sequence does not overrun the reservation
+SAFETY_MARGIN = 1.2
+
+
+def _normalize_format(output_format):
+    return 'h264' if output_format == 'mp4' else output_format
+
+
+def get_output_dimensions(width, height):
+    """Return the frame size extract_sequences() writes for a source size."""
+    if width > MAX_OUTPUT_WIDTH or height > MAX_OUTPUT_HEIGHT:
+        return MAX_OUTPUT_WIDTH, MAX_OUTPUT_HEIGHT
+    return width, height
+
+
+class OutputSizeEstimator:
+    """Estimates extracted sequence sizes from per-format bitrate models.
+
+    ProRes starts from the published profile bitrates; every format then
+    learns from the sizes of sequences actually written, which is what makes
+    the CRF estimates usable. The learned history is kept across runs.
+    """
+
+    def __init__(self, history_path=None):
+        """Initialize the estimator.
+
+        Args:
+            history_path: JSON file storing observed bitrates. If None, uses
+                          ~/.video_slicer/bitrate_history.json.
+        """
+        self.logger = logging.getLogger(__name__)
+        if history_path is None:
+            history_path = os.path.join(str(Path.home()), '.video_slicer', 'bitrate_history.json')
+        self.history_path = history_path
+        self._lock = threading.Lock()
+        self.history = self._load_history()
+
+    def _load_history(self):
+        try:
+            if os.path.exists(self.history_path):
+                with open(self.history_path, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading bitrate history: {str(e)}")
+        return {}
+
+    def save_history(self):
+        """Persist the observed bitrates."""
+        with self._lock:
+            history = dict(self.history)
+        try:
+            os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+            with open(self.history_path, 'w') as f:
+                json.dump(history, f, indent=4)
+        except Exception as e:
+            self.logger.error(f"Error saving bitrate history: {str(e)}")
+
+    def bits_per_pixel(self, output_format, quality):
+        """Return the modelled bits per output pixel for a format and quality."""
+        output_format = _normalize_format(output_format)
+        with self._lock:
+            learned = self.history.get(f"{output_format}:{quality}")
+        if learned is not None:
+            return learned
+        if output_format == 'prores':
+            return PRORES_PROFILE_MBPS.get(quality, PRORES_PROFILE_MBPS['medium']) * 1e6 / PRORES_REFERENCE_PIXEL_RATE
+        seeds = CRF_SEED_BITS_PER_PIXEL.get(output_format, CRF_SEED_BITS_PER_PIXEL['h264'])
+        return seeds.get(quality, seeds['medium'])
+
+    def estimate_bytes(self, width, height, fps, seconds, output_format, quality):
+        """Estimate the size of encoded output.
+
+        Args:
+            width: Source frame width
+            height: Source frame height
+            fps: Source frame rate
+            seconds: Total encoded duration in seconds
+            output_format: Output format (prores, h264, h265)
+            quality: Quality setting (low, medium, high)
+
+        Returns:
+            int: Estimated size in bytes, including the safety margin
+        """
+        out_width, out_height = get_output_dimensions(width, height)
+        video_bits = self.bits_per_pixel(output_format, quality) * out_width * out_height * fps * seconds
+        audio_bytes = AUDIO_BYTES_PER_SECOND.get(_normalize_format(output_format), 128000 // 8) * seconds
+        return int((video_bits / 8 + audio_bytes) * SAFETY_MARGIN)
+
+    def estimate_job_bytes(self, video_path, sequence_length, num_sequences, output_format, quality):
+        """Estimate the output size of extracting sequences from a video.
+
+        Args:
+            video_path: Path to the input video
+            sequence_length: Length of each sequence in seconds
+            num_sequences: Number of sequences to extract
+            output_format: Output format (prores, h264, h265)
+            quality: Quality setting (low, medium, high)
+
+        Returns:
+            int: Estimated size in bytes
+        """
+        cap = cv2.VideoCapture(video_path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open video file: {video_path}")
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        finally:
+            cap.release()
+        return self.estimate_bytes(width, height, fps, sequence_length * num_sequences,
+                                   output_format, quality)
+
+    def record_output(self, video_path, output_paths, sequence_length, output_format, quality):
+        """Learn from the sizes of sequences that were actually written.
+
+        Args:
+            video_path: Path to the input video the sequences came from
+            output_paths: Paths of the written sequences
+            sequence_length: Length of each sequence in seconds
+            output_format: Output format (prores, h264, h265)
+            quality: Quality setting (low, medium, high)
+        """
+        if not output_paths:
+            return
+        cap = cv2.VideoCapture(video_path)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        cap.release()
+
+        output_format = _normalize_format(output_format)
+        out_width, out_height = get_output_dimensions(width, height)
+        seconds = sequence_length * len(output_paths)
+        total_bytes = sum(os.path.getsize(p) for p in output_paths if os.path.exists(p))
+        audio_bytes = AUDIO_BYTES_PER_SECOND.get(output_format, 128000 // 8) * seconds
+        pixels = out_width * out_height * fps * seconds
+        if pixels <= 0:
+            return
+        observed = max(total_bytes - audio_bytes, 0) * 8 / pixels
+
+        key = f"{output_format}:{quality}"
+        with self._lock:
+            previous = self.history.get(key)
+            if previous is None:
+                self.history[key] = observed
+            else:
+                self.history[key] = previous + HISTORY_SMOOTHING * (observed - previous)
+
+
+class _Reservation:
+    """Space reserved for one in-flight job."""
+
+    def __init__(self, output_dir, nbytes):
+        self.output_dir = output_dir
+        self.nbytes = nbytes
+        self.baseline = _directory_size(output_dir)
+
+    def outstanding(self):
+        """Reserved bytes not yet written to disk."""
+        written = max(_directory_size(self.output_dir) - self.baseline, 0)
+        return max(self.nbytes - written, 0)
+
+
+def _directory_size(path):
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return total
+
+
+class DiskSpaceGovernor:
+    """Admits jobs only while their estimated output fits on the output disk."""
+
+    def __init__(self, output_folder, min_free_bytes=1024 ** 3):
+        """Initialize the governor.
+
+        Args:
+            output_folder: Folder the batch writes to
+            min_free_bytes: Free space always kept in reserve
+        """
+        self.output_folder = output_folder
+        self.min_free_bytes = min_free_bytes
+        self._reservations = set()
+        self._lock = threading.Lock()
+
+    def _free_space(self):
+        # The output folder may not exist yet; measure its nearest existing parent
+        path = os.path.abspath(self.output_folder)
+        while not os.path.exists(path) and os.path.dirname(path) != path:
+            path = os.path.dirname(path)
+        return get_free_disk_space(path)
+
+    def available_bytes(self):
+        """Free space left after in-flight reservations and the reserve."""
+        with self._lock:
+            outstanding = sum(r.outstanding() for r in self._reservations)
+        return self._free_space() - outstanding - self.min_free_bytes
+
+    def try_reserve(self, output_dir, nbytes):
+        """Reserve space for a job if it fits.
+
+        Args:
+            output_dir: Folder the job writes its sequences to
+            nbytes: Estimated output size in bytes
+
+        Returns:
+            Reservation token, or None if there is not enough space right now
+        """
+        with self._lock:
+            outstanding = sum(r.outstanding() for r in self._reservations)
+            available = self._free_space() - outstanding - self.min_free_bytes
+            if nbytes > available:
+                return None
+            reservation = _Reservation(output_dir, nbytes)
+            self._reservations.add(reservation)
+            return reservation
+
+    def release(self, reservation):
+        """Release the space reserved for a finished job."""
+        with self._lock:
+            self._reservations.discard(reservation)
+
+    @property
+    def in_flight(self):
+        """Number of jobs currently holding a reservation."""
+        with self._lock:
+            return len(self._reservations)
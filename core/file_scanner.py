@@ -0,0 +1,143 @@
+"""Parallel directory scanning for video files."""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from constants import VIDEO_EXTENSIONS
+
+# Directories listed concurrently; listing is I/O bound, so this helps most on network shares
+DEFAULT_SCAN_WORKERS = 8
+
+# Files reported to the caller per chunk
+DEFAULT_CHUNK_SIZE = 200
+
+# Bytes read from the start of a file to recognise its container
+SNIFF_BYTES = 16
+
+
+def sniff_video(path):
+    """Check whether a file looks like a video container from its first bytes.
+
+    Recognises ISO BMFF (MP4/MOV), Matroska/WebM, AVI, ASF (WMV), MPEG
+    program streams and MPEG transport streams.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        bool: True if the header matches a known video container
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(SNIFF_BYTES)
+    except OSError:
+        return False
+    if len(header) < 12:
+        return False
+    if header[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip'):
+        return True
+    if header[:4] == b'\x1a\x45\xdf\xa3':
+        return True
+    if header[:4] == b'RIFF' and header[8:12] == b'AVI ':
+        return True
+    if header[:4] == b'\x30\x26\xb2\x75':
+        return True
+    if header[:4] == b'\x00\x00\x01\xba':
+        return True
+    if header[0] == 0x47:
+        return _looks_like_transport_stream(path)
+    return False
+
+
+def _looks_like_transport_stream(path):
+    """Confirm an MPEG-TS candidate by checking the sync byte of the next packets."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(188 * 3 + 1)
+    except OSError:
+        return False
+    return len(data) > 188 * 2 and all(data[i] == 0x47 for i in (0, 188, 376))
+
+
+def _scan_directory(directory, extensions, sniff):
+    """List one directory.
+
+    Returns:
+        tuple: (matching file paths, subdirectory paths)
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # Symlinked directories are not followed, which rules out loops
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        if sniff:
+                            if sniff_video(entry.path):
+                                files.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in extensions:
+                            files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"Could not scan {directory}: {e}")
+    files.sort()
+    return files, subdirs
+
+
+def scan_videos(folder, extensions=None, sniff=False, max_workers=DEFAULT_SCAN_WORKERS,
+                chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, should_stop=None):
+    """Find video files below a folder, listing subdirectories in parallel.
+
+    Every directory is listed by a pool task with os.scandir, and the
+    subdirectories it finds are submitted as new tasks, so a wide tree keeps
+    all workers busy. Results are reported in chunks as they arrive.
+
+    Args:
+        folder: Folder to scan
+        extensions: File extensions to match (defaults to VIDEO_EXTENSIONS)
+        sniff: Match files by their header bytes instead of their extension
+        max_workers: Number of directories listed concurrently
+        chunk_size: Number of paths passed to on_chunk at a time
+        on_chunk: Optional callback receiving lists of found paths
+        should_stop: Optional callable; scanning stops when it returns True
+
+    Returns:
+        list: Paths of all video files found, without duplicates
+    """
+    extensions = frozenset(ext.lower() for ext in (extensions or VIDEO_EXTENSIONS))
+    found = []
+    seen = set()
+    chunk = []
+
+    def report(paths):
+        for path in paths:
+            if path in seen:
+                continue
+            seen.add(path)
+            found.append(path)
+            chunk.append(path)
+        if on_chunk and len(chunk) >= chunk_size:
+            on_chunk(list(chunk))
+            chunk.clear()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {executor.submit(_scan_directory, folder, extensions, sniff)}
+        while running:
+            if should_stop and should_stop():
+                for future in running:
+                    future.cancel()
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                report(files)
+                for subdir in subdirs:
+                    running.add(executor.submit(_scan_directory, subdir, extensions, sniff))
+
+    if on_chunk and chunk:
+        on_chunk(list(chunk))
+    return found
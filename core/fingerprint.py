@@ -0,0 +1,180 @@
+"""Content fingerprints for recognising the same video under different paths."""
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Bytes hashed from the head, middle and tail of a file for the sampled fingerprint
+SAMPLE_BLOCK_SIZE = 1024 * 1024
+
+# Read size for full-file hashing
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def sampled_fingerprint(path, block_size=SAMPLE_BLOCK_SIZE):
+    """Compute a fast fingerprint from the file size and three sampled blocks.
+
+    Two files with different fingerprints always differ; equal fingerprints
+    are treated as duplicates unless confirmed with full_hash().
+
+    Args:
+        path: Path to the file
+        block_size: Bytes read from the head, middle and tail
+
+    Returns:
+        str: Fingerprint of the form '<size>-<hex digest>'
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(size.to_bytes(8, 'little'))
+    with open(path, 'rb') as f:
+        if size <= 3 * block_size:
+            digest.update(f.read())
+        else:
+            for offset in (0, (size - block_size) // 2, size - block_size):
+                f.seek(offset)
+                digest.update(f.read(block_size))
+    return f"{size}-{digest.hexdigest()}"
+
+
+def full_hash(path):
+    """Hash the whole file with xxhash if installed, otherwise BLAKE2.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        str: Hex digest prefixed with the algorithm name
+    """
+    if xxhash is not None:
+        digest, name = xxhash.xxh3_128(), "xxh3"
+    else:
+        digest, name = hashlib.blake2b(digest_size=16), "blake2b"
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return f"{name}:{digest.hexdigest()}"
+
+
+class FingerprintMemo:
+    """Sampled fingerprints memoized by path, size and modification time.
+
+    Caches keyed by file content look the fingerprint up on every access;
+    the file is only read again once it changed.
+    """
+
+    def __init__(self):
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the sampled fingerprint of a file.
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            str: The fingerprint (see sampled_fingerprint())
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            fingerprint = self._fingerprints.get(key)
+        if fingerprint is None:
+            fingerprint = sampled_fingerprint(path)
+            with self._lock:
+                self._fingerprints[key] = fingerprint
+        return fingerprint
+
+
+def group_duplicates(paths, verify=False, max_workers=4):
+    """Group paths whose content is identical.
+
+    Args:
+        paths: File paths, in batch order
+        verify: Confirm sampled-fingerprint matches with a full-file hash
+        max_workers: Threads used for hashing
+
+    Returns:
+        list: Groups as lists of paths in their original order; the first path
+              of each group is the one to process, the others are duplicates
+    """
+    logger = logging.getLogger(__name__)
+
+    def safe_fingerprint(path):
+        try:
+            return sampled_fingerprint(path)
+        except OSError as e:
+            # Unreadable files are left to fail in processing, never merged
+            logger.warning(f"Could not fingerprint {path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fingerprints = list(executor.map(safe_fingerprint, paths))
+
+        groups = {}
+        for index, (path, fingerprint) in enumerate(zip(paths, fingerprints)):
+            key = fingerprint if fingerprint is not None else f"unique-{index}"
+            groups.setdefault(key, []).append(path)
+
+        if verify:
+            candidates = [path for group in groups.values() if len(group) > 1 for path in group]
+            hashes = dict(zip(candidates, executor.map(full_hash, candidates)))
+            verified = {}
+            for key, group in groups.items():
+                if len(group) == 1:
+                    verified[key] = group
+                    continue
+                for path in group:
+                    verified.setdefault((key, hashes[path]), []).append(path)
+            groups = verified
+
+    order = {path: index for index, path in enumerate(paths)}
+    return sorted(groups.values(), key=lambda group: order[group[0]])
+
+
+def link_outputs(source_paths, source_base, target_dir, target_base):
+    """Make a duplicate's outputs available without encoding them again.
+
+    Each output is hard-linked into target_dir under the duplicate's own
+    base name; where that is not possible a symlink is used, and as a last
+    resort the original output path is referenced directly.
+
+    Args:
+        source_paths: Output paths produced for the processed file
+        source_base: Base name of the processed file
+        target_dir: Output folder of the duplicate
+        target_base: Base name of the duplicate
+
+    Returns:
+        list: Output paths for the duplicate
+    """
+    logger = logging.getLogger(__name__)
+    os.makedirs(target_dir, exist_ok=True)
+    linked = []
+    for source in source_paths:
+        filename = os.path.basename(source)
+        if filename.startswith(source_base):
+            filename = target_base + filename[len(source_base):]
+        target = os.path.join(target_dir, filename)
+        if os.path.abspath(target) == os.path.abspath(source):
+            linked.append(source)
+            continue
+        if os.path.lexists(target):
+            os.unlink(target)
+        try:
+            os.link(source, target)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(source), target)
+            except OSError as e:
+                logger.warning(f"Could not link {source} to {target}, referencing original: {e}")
+                target = source
+        linked.append(target)
+    return linked
@@ -0,0 +1,353 @@
+"""Per-stage timing instrumentation and opt-in profiling for processing jobs."""
+import bisect
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from core.resources import RSS_MONITOR
+from utils import Timer
+
+# Stages reported by VideoProcessor, in pipeline order
+STAGES = ("probe", "decode", "convert", "diff", "encode", "mux", "progress_wait")
+
+# Environment variable selecting a profiler hook ('cprofile' or 'sampling')
+PROFILE_ENV_VAR = "VIDEO_SLICER_PROFILE"
+PROFILE_MODES = ("cprofile", "sampling")
+
+
+class Histogram:
+    """Duration histogram with fixed logarithmic buckets (in seconds)."""
+
+    BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+               0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Record a single duration."""
+        self.bucket_counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the observations of another histogram to this one."""
+        for i, bucket_count in enumerate(other.bucket_counts):
+            self.bucket_counts[i] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.BUCKETS[i] if i < len(self.BUCKETS) else self.max
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        """Serialize the histogram summary."""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'min': self.min or 0.0,
+            'max': self.max or 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+class CProfileHook:
+    """Profiler hook collecting one cProfile profile per stage.
+
+    Nested stages pause the enclosing stage's profiler, since only one
+    profiler can be active per thread.
+    """
+
+    def __init__(self):
+        self.profiles = {}
+        self._local = threading.local()
+        self._failed = False
+
+    def start(self, stage):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        try:
+            if stack:
+                stack[-1].disable()
+            profile = self.profiles.setdefault(stage, cProfile.Profile())
+            profile.enable()
+            stack.append(profile)
+        except ValueError:
+            # Another profiler is already active (e.g. a parallel job on Python 3.12+)
+            if not self._failed:
+                logging.getLogger(__name__).warning("cProfile hook unavailable: another profiler is active")
+                self._failed = True
+            stack.append(None)
+
+    def stop(self, stage):
+        stack = self._local.stack
+        profile = stack.pop()
+        if profile is not None:
+            profile.disable()
+        if stack and stack[-1] is not None:
+            stack[-1].enable()
+
+    def close(self, job_name, output_dir):
+        """Write one .prof file per stage and return their paths."""
+        os.makedirs(output_dir, exist_ok=True)
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in job_name)
+        paths = {}
+        for stage, profile in self.profiles.items():
+            path = os.path.join(output_dir, f"{safe_name}_{stage}.prof")
+            profile.dump_stats(path)
+            paths[stage] = path
+        return paths
+
+
+class SamplingProfilerHook:
+    """Profiler hook sampling the running thread's stack while a stage is active."""
+
+    def __init__(self, interval=0.005, top=10):
+        self.interval = interval
+        self.top = top
+        self.samples = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = {tid: stack[-1] for tid, stack in self._active.items() if stack}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stage in active.items():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                code = frame.f_code
+                location = f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}"
+                self.samples.setdefault(stage, Counter())[location] += 1
+
+    def start(self, stage):
+        with self._lock:
+            self._active.setdefault(threading.get_ident(), []).append(stage)
+
+    def stop(self, stage):
+        with self._lock:
+            self._active[threading.get_ident()].pop()
+
+    def close(self, job_name, output_dir):
+        """Stop sampling and return the hottest locations per stage."""
+        self._stop.set()
+        self._thread.join()
+        return {stage: counter.most_common(self.top) for stage, counter in self.samples.items()}
+
+
+def create_profiler_hook(mode):
+    """Create a profiler hook for a mode name, or None when profiling is off.
+
+    Args:
+        mode: 'cprofile', 'sampling' or None
+
+    Returns:
+        Profiler hook instance or None
+    """
+    if not mode:
+        return None
+    if mode == "cprofile":
+        return CProfileHook()
+    if mode == "sampling":
+        return SamplingProfilerHook()
+    raise ValueError(f"Unknown profiler mode: {mode}")
+
+
+class _StageTimer:
+    """Context manager timing one execution of a stage."""
+
+    __slots__ = ('job', 'stage', 'start')
+
+    def __init__(self, job, stage):
+        self.job = job
+        self.stage = stage
+
+    def __enter__(self):
+        if self.job.profiler is not None:
+            self.job.profiler.start(self.stage)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.job.add_time(self.stage, time.perf_counter() - self.start)
+        if self.job.profiler is not None:
+            self.job.profiler.stop(self.stage)
+        return False
+
+
+class JobInstrumentation:
+    """Timing histograms and counters collected while processing one job."""
+
+    def __init__(self, name, profile=None, profile_dir=None):
+        """Initialize the job instrumentation.
+
+        Args:
+            name: Job name, usually the input file name
+            profile: Optional profiler mode ('cprofile' or 'sampling')
+            profile_dir: Directory for profiler output (default: logs/profiles)
+        """
+        self.name = name
+        self.stages = {}
+        self.counters = Counter()
+        self.profiler = create_profiler_hook(profile)
+        self.profile_dir = profile_dir or os.path.join("logs", "profiles")
+        self.peak_rss = None
+        self.rss_growth = None
+        self._memory = RSS_MONITOR.track()
+        self.timer = Timer()
+        self.timer.start()
+
+    def stage(self, name):
+        """Return a context manager timing one execution of a stage."""
+        return _StageTimer(self, name)
+
+    def add_time(self, stage, seconds):
+        """Record a duration for a stage measured elsewhere."""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def count(self, name, value=1):
+        """Increment a counter."""
+        self.counters[name] += value
+
+    def finish(self):
+        """Stop the job clock and return its summary.
+
+        Returns:
+            dict: Summary with wall time, per-stage histograms, counters, peak RSS
+                  and profiler output
+        """
+        wall = self.timer.stop()
+        self.peak_rss, self.rss_growth = RSS_MONITOR.untrack(self._memory)
+        summary = {
+            'name': self.name,
+            'wall_seconds': wall,
+            'stages': {stage: h.to_dict() for stage, h in self._ordered_stages()},
+            'counters': dict(self.counters),
+            'peak_rss_mb': self.peak_rss / 1024 ** 2,
+            'rss_growth_mb': self.rss_growth / 1024 ** 2,
+        }
+        if self.profiler is not None:
+            summary['profile'] = self.profiler.close(self.name, self.profile_dir)
+        return summary
+
+    def _ordered_stages(self):
+        known = [(s, self.stages[s]) for s in STAGES if s in self.stages]
+        extra = [(s, h) for s, h in self.stages.items() if s not in STAGES]
+        return known + extra
+
+
+class BatchInstrumentation:
+    """Aggregates the job summaries of a batch run."""
+
+    def __init__(self):
+        self.jobs = []
+        self.stages = {}
+        self.counters = Counter()
+        self.peak_rss = 0
+        self.timer = Timer()
+        self.timer.start()
+        self._lock = threading.Lock()
+
+    def add_job(self, job):
+        """Fold a finished job's histograms and counters into the batch totals.
+
+        Args:
+            job: JobInstrumentation that has been finished
+        """
+        with self._lock:
+            self.jobs.append(job.name)
+            for stage, histogram in job.stages.items():
+                self.stages.setdefault(stage, Histogram()).merge(histogram)
+            self.counters.update(job.counters)
+            if job.peak_rss is not None:
+                self.peak_rss = max(self.peak_rss, job.peak_rss)
+
+    def finish(self):
+        """Stop the batch clock and return its summary."""
+        wall = self.timer.stop()
+        ordered = [s for s in STAGES if s in self.stages] + [s for s in self.stages if s not in STAGES]
+        return {
+            'name': f"batch of {len(self.jobs)} jobs",
+            'wall_seconds': wall,
+            'jobs': list(self.jobs),
+            'stages': {stage: self.stages[stage].to_dict() for stage in ordered},
+            'counters': dict(self.counters),
+            'peak_rss_mb': self.peak_rss / 1024 ** 2,
+        }
+
+
+def format_summary(summary):
+    """Format a job or batch summary as a table for the log.
+
+    Args:
+        summary: Dict returned by JobInstrumentation.finish() or BatchInstrumentation.finish()
+
+    Returns:
+        str: Multi-line summary
+    """
+    wall = summary['wall_seconds']
+    lines = [f"Timing summary for {summary['name']}: {wall:.2f} s wall time"]
+    lines.append(f"  {'stage':<14}{'count':>8}{'total s':>10}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}{'share':>8}")
+    for stage, h in summary['stages'].items():
+        share = h['total'] / wall * 100 if wall > 0 else 0.0
+        lines.append(f"  {stage:<14}{h['count']:>8}{h['total']:>10.2f}{h['mean'] * 1000:>10.2f}"
+                     f"{h['p95'] * 1000:>10.2f}{h['max'] * 1000:>10.2f}{share:>7.1f}%")
+    if summary['counters']:
+        counters = ", ".join(f"{k}={v}" for k, v in sorted(summary['counters'].items()))
+        lines.append(f"  counters: {counters}")
+    if summary.get('peak_rss_mb'):
+        memory = f"  memory: peak RSS {summary['peak_rss_mb']:.0f} MB"
+        if 'rss_growth_mb' in summary:
+            memory += f" (+{summary['rss_growth_mb']:.0f} MB during job)"
+        lines.append(memory)
+    profile = summary.get('profile')
+    if profile:
+        for stage, output in profile.items():
+            if isinstance(output, str):
+                lines.append(f"  profile {stage}: {output}")
+            else:
+                hottest = "; ".join(f"{location} ({samples})" for location, samples in output[:3])
+                lines.append(f"  samples {stage}: {hottest}")
+    return "\n".join(lines)
@@ -0,0 +1,269 @@
+"""Persistent keyframe and packet index of video files."""
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from core import metrics
+from core.cache_dir import cache_entries, evict_lru
+from core.fingerprint import FingerprintMemo
+
+# Bumped when the stored layout changes, so old cache files are rebuilt
+INDEX_VERSION = 2
+
+# Bit set in KeyframeIndex.flags for keyframe packets
+KEYFRAME_FLAG = 1
+
+# Indexes kept in memory by KeyframeIndexCache
+DEFAULT_MEMORY_ENTRIES = 16
+
+# Upper bound for the on-disk index cache
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+
+
+class KeyframeIndex:
+    """Video packets of one file as NumPy arrays sorted by presentation time.
+
+    Times are relative to the start of the video stream, the same timeline
+    as frame numbers divided by the frame rate. Lookups bisect the sorted
+    keyframe times, so they take O(log n) however long the file is.
+    """
+
+    def __init__(self, pts, pos, flags, start_time=0.0):
+        """Initialize the index.
+
+        Args:
+            pts: Presentation times in seconds relative to the stream start (float64), in any order
+            pos: Byte offsets of the packets in the file (int64, -1 if unknown)
+            flags: Packet flags (uint8, KEYFRAME_FLAG for keyframes)
+            start_time: Start time of the video stream in the container, in seconds
+        """
+        self.start_time = float(start_time)
+        order = np.argsort(pts, kind='stable')
+        self.pts = np.asarray(pts, dtype=np.float64)[order]
+        self.pos = np.asarray(pos, dtype=np.int64)[order]
+        self.flags = np.asarray(flags, dtype=np.uint8)[order]
+        keyframes = (self.flags & KEYFRAME_FLAG) != 0
+        self.keyframe_times = self.pts[keyframes]
+        self.keyframe_positions = self.pos[keyframes]
+
+    def __len__(self):
+        return len(self.pts)
+
+    def keyframe_at_or_before(self, timestamp):
+        """Return the time of the last keyframe at or before a timestamp.
+
+        Args:
+            timestamp: Time in seconds
+
+        Returns:
+            float: Keyframe time, or None if no keyframe precedes the timestamp
+        """
+        index = int(np.searchsorted(self.keyframe_times, timestamp, side='right')) - 1
+        return float(self.keyframe_times[index]) if index >= 0 else None
+
+    def keyframe_after(self, timestamp):
+        """Return the time of the first keyframe strictly after a timestamp, or None."""
+        index = int(np.searchsorted(self.keyframe_times, timestamp, side='right'))
+        return float(self.keyframe_times[index]) if index < len(self.keyframe_times) else None
+
+    def keyframes_between(self, start, end):
+        """Return the keyframe times in [start, end) as a NumPy array."""
+        lo, hi = np.searchsorted(self.keyframe_times, [start, end], side='left')
+        return self.keyframe_times[lo:hi]
+
+    def byte_offset(self, timestamp):
+        """Return the file offset of the keyframe at or before a timestamp, or None."""
+        index = int(np.searchsorted(self.keyframe_times, timestamp, side='right')) - 1
+        if index < 0 or self.keyframe_positions[index] < 0:
+            return None
+        return int(self.keyframe_positions[index])
+
+    def save(self, path):
+        """Write the index to a compressed .npz file (atomically, through a unique temp file)."""
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or None, suffix='.tmp',
+                                         delete=False) as f:
+            temp_path = f.name
+            np.savez_compressed(f, version=np.int32(INDEX_VERSION), start_time=np.float64(self.start_time),
+                                pts=self.pts, pos=self.pos, flags=self.flags)
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save(); returns None for other versions."""
+        with np.load(path) as data:
+            if int(data['version']) != INDEX_VERSION:
+                return None
+            return cls(data['pts'], data['pos'], data['flags'], float(data['start_time']))
+
+
+def _parse_fields(line):
+    """Split one line of ffprobe compact output into a dict of its fields."""
+    return dict(item.split('=', 1) for item in line.strip().split('|') if '=' in item)
+
+
+def _parse_packet(line):
+    """Parse one 'pts_time=...|pos=...|flags=...' line of ffprobe compact output."""
+    fields = _parse_fields(line)
+    pts_time = fields.get('pts_time', 'N/A')
+    if pts_time == 'N/A':
+        pts_time = fields.get('dts_time', 'N/A')
+    if pts_time == 'N/A':
+        return None
+    pos = fields.get('pos', 'N/A')
+    flags = KEYFRAME_FLAG if 'K' in fields.get('flags', '') else 0
+    return float(pts_time), int(pos) if pos.isdigit() else -1, flags
+
+
+def build_keyframe_index(video_path):
+    """Index the video packets of a file with ffprobe.
+
+    The packet list is streamed from ffprobe and parsed line by line into
+    compact typed arrays, so even long files never hold a text dump or a
+    list of Python objects in memory. The stream start time is read in the
+    same ffprobe call and subtracted, so the index uses the video timeline
+    and not the container's (MPEG-TS files, for example, often start at 1.4 s).
+
+    Args:
+        video_path: Path to the video file
+
+    Returns:
+        KeyframeIndex: The index of the first video stream
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,dts_time,pos,flags:stream=start_time",
+        "-of", "compact=p=0",
+        video_path,
+    ]
+    pts = array('d')
+    pos = array('q')
+    flags = array('B')
+    start_time = 0.0
+    metrics.FFMPEG_SPAWNS.inc()
+    metrics.FFMPEG_PROCESSES.inc()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            packet = _parse_packet(line)
+            if packet is None:
+                # The stream section follows the packets
+                value = _parse_fields(line).get('start_time', 'N/A')
+                if value != 'N/A':
+                    start_time = float(value)
+                continue
+            pts.append(packet[0])
+            pos.append(packet[1])
+            flags.append(packet[2])
+        stderr = process.stderr.read()
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.stderr.close()
+        process.wait()
+        metrics.FFMPEG_PROCESSES.dec()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {video_path}: {stderr.strip()}")
+
+    return KeyframeIndex(np.frombuffer(pts, dtype=np.float64) - start_time, np.frombuffer(pos, dtype=np.int64),
+                         np.frombuffer(flags, dtype=np.uint8), start_time)
+
+
+class KeyframeIndexCache:
+    """Keyframe indexes cached in memory and on disk by file content.
+
+    Entries are keyed by the sampled fingerprint, so renamed or copied files
+    share an index and edited files are indexed again.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        """Initialize the index cache.
+
+        Args:
+            cache_dir: Directory for cached indexes. If None, uses
+                       ~/.video_slicer/keyframe_index.
+            max_memory_entries: Number of indexes kept in memory
+            max_disk_bytes: Upper bound for the on-disk cache
+        """
+        self.logger = logging.getLogger(__name__)
+        if cache_dir is None:
+            cache_dir = os.path.join(str(Path.home()), '.video_slicer', 'keyframe_index')
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._fingerprints = FingerprintMemo()
+        self._lock = threading.Lock()
+
+    def fingerprint(self, video_path):
+        """Return the content fingerprint of a video, memoized by path, size and mtime."""
+        return self._fingerprints.get(video_path)
+
+    def _disk_path(self, fingerprint):
+        return os.path.join(self.cache_dir, f"{fingerprint}.npz")
+
+    def _remember(self, fingerprint, index):
+        with self._lock:
+            self._memory[fingerprint] = index
+            self._memory.move_to_end(fingerprint)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, video_path):
+        """Return the keyframe index of a video, building it on first use.
+
+        Args:
+            video_path: Path to the video file
+
+        Returns:
+            KeyframeIndex: The index
+        """
+        fingerprint = self.fingerprint(video_path)
+        with self._lock:
+            index = self._memory.get(fingerprint)
+            if index is not None:
+                self._memory.move_to_end(fingerprint)
+        if index is not None:
+            metrics.record_cache_lookup('keyframe_index_memory', True)
+            return index
+        metrics.record_cache_lookup('keyframe_index_memory', False)
+
+        path = self._disk_path(fingerprint)
+        try:
+            index = KeyframeIndex.load(path)
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, ValueError, KeyError):
+            index = None
+        metrics.record_cache_lookup('keyframe_index_disk', index is not None)
+
+        if index is None:
+            index = build_keyframe_index(video_path)
+            self.logger.info(f"Indexed {len(index)} packets ({len(index.keyframe_times)} keyframes) "
+                             f"of {os.path.basename(video_path)}")
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                index.save(path)
+                self._prune()
+            except OSError as e:
+                self.logger.warning(f"Could not write keyframe index cache entry: {e}")
+        self._remember(fingerprint, index)
+        return index
+
+    def _prune(self):
+        """Evict least recently used indexes once the disk bound is exceeded."""
+        entries = cache_entries(self.cache_dir)
+        evict_lru(entries, sum(size for _, size, _ in entries), self.max_disk_bytes)
@@ -0,0 +1,334 @@
+"""Process-wide metrics registry with Prometheus text and JSON exporters.
+
+Metrics are plain in-process counters, gauges and histograms. Callers update
+them at job, sequence or 100-frame granularity, never per frame, so the
+detection loop pays nothing for them.
+"""
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_METRICS_PORT = 9464
+DEFAULT_DUMP_INTERVAL = 15.0
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    type_name = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Return (suffix, labelvalues, extra_label, value) tuples for exposition."""
+        with self._lock:
+            return [("", key, None, value) for key, value in self._values.items()]
+
+    def to_dict(self):
+        """Serialize the metric for the JSON dump."""
+        with self._lock:
+            values = [{'labels': dict(zip(self.labelnames, key)), 'value': value}
+                      for key, value in self._values.items()]
+        return {'type': self.type_name, 'help': self.documentation, 'values': values}
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+
+class Histogram(_Metric):
+    """Histogram with cumulative buckets, as exposed by Prometheus."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(0.5, 1, 2, 5, 10)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'count': 0, 'sum': 0.0}
+            state['buckets'][bisect.bisect_left(self.buckets, value)] += 1
+            state['count'] += 1
+            state['sum'] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), state['buckets']):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, ("le", _format_value(float(bound))), cumulative))
+                samples.append(("_count", key, None, state['count']))
+                samples.append(("_sum", key, None, state['sum']))
+        return samples
+
+    def to_dict(self):
+        with self._lock:
+            values = [{'labels': dict(zip(self.labelnames, key)),
+                       'buckets': dict(zip([str(b) for b in self.buckets] + ["+Inf"], state['buckets'])),
+                       'count': state['count'], 'sum': state['sum']}
+                      for key, state in self._values.items()]
+        return {'type': self.type_name, 'help': self.documentation, 'values': values}
+
+
+class MetricsRegistry:
+    """Collection of named metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type_name}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Get or create a counter."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Get or create a gauge."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=(0.5, 1, 2, 5, 10)):
+        """Get or create a histogram."""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render_text(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, key, extra, value in metric.samples():
+                labels = _format_labels(metric.labelnames, key, extra)
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        """Serialize all metrics for the JSON dump."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {'timestamp': time.time(), 'metrics': {m.name: m.to_dict() for m in metrics}}
+
+
+# Default registry fed by VideoProcessor and BatchProcessor
+REGISTRY = MetricsRegistry()
+
+JOBS_QUEUED = REGISTRY.gauge("videoslicer_jobs_queued", "Batch jobs waiting to start")
+JOBS_RUNNING = REGISTRY.gauge("videoslicer_jobs_running", "Batch jobs currently processing")
+JOBS_TOTAL = REGISTRY.counter("videoslicer_jobs_total", "Finished batch jobs by outcome", ("status",))
+FRAMES_ANALYZED = REGISTRY.counter("videoslicer_frames_analyzed_total", "Frames analyzed by scene detection")
+DETECTION_FPS = REGISTRY.gauge("videoslicer_detection_frames_per_second", "Analysis speed of the last detection pass")
+ENCODE_REALTIME = REGISTRY.histogram("videoslicer_encode_realtime_factor",
+                                     "Encoded seconds per wall-clock second, per sequence", ("format",),
+                                     buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16))
+FFMPEG_PROCESSES = REGISTRY.gauge("videoslicer_ffmpeg_processes", "FFmpeg processes currently running")
+FFMPEG_SPAWNS = REGISTRY.counter("videoslicer_ffmpeg_spawns_total", "FFmpeg/FFprobe processes started")
+BYTES_WRITTEN = REGISTRY.counter("videoslicer_bytes_written_total", "Bytes of extracted sequences written")
+CACHE_LOOKUPS = REGISTRY.counter("videoslicer_cache_lookups_total", "Cache lookups by cache and result",
+                                 ("cache", "result"))
+STAGE_SECONDS = REGISTRY.counter("videoslicer_stage_seconds_total", "Wall time spent per processing stage",
+                                 ("stage",))
+
+
+def record_cache_lookup(cache, hit):
+    """Count a cache hit or miss for the cache hit-rate metrics."""
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path in ("/", "/metrics"):
+            body = self.registry.render_text().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body = json.dumps(self.registry.to_dict()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would otherwise flood stderr
+        pass
+
+
+class MetricsServer:
+    """HTTP endpoint serving /metrics (text exposition) and /metrics.json."""
+
+    def __init__(self, registry=None, host="127.0.0.1", port=DEFAULT_METRICS_PORT):
+        handler = type("MetricsHandler", (_MetricsHandler,), {'registry': registry or REGISTRY})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self._thread.start()
+        logging.getLogger(__name__).info(f"Serving metrics on http://{self.server.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonMetricsDumper:
+    """Periodically writes the registry to a JSON file."""
+
+    def __init__(self, path, registry=None, interval=DEFAULT_DUMP_INTERVAL):
+        self.path = path
+        self.registry = registry or REGISTRY
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def dump(self):
+        """Write the current metrics, replacing the file atomically through a unique temp file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+            temp_path = f.name
+            json.dump(self.registry.to_dict(), f, indent=2)
+        try:
+            os.replace(temp_path, self.path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error writing metrics dump: {str(e)}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.dump()
+
+
+def start_exporters(port=None, json_path=None, interval=DEFAULT_DUMP_INTERVAL, host="127.0.0.1"):
+    """Start the HTTP endpoint and/or JSON dumper for the default registry.
+
+    Each exporter is started on its own: if the HTTP port cannot be bound,
+    the JSON dumper still starts, and the failure is logged.
+
+    Args:
+        port: Local port for the text exposition endpoint, or None to disable it
+        json_path: Path of the periodic JSON dump, or None to disable it
+        interval: Seconds between JSON dumps
+        host: Interface to bind the HTTP endpoint to
+
+    Returns:
+        list: The started exporters (call stop() on each at shutdown)
+    """
+    exporters = []
+    if port is not None:
+        try:
+            exporters.append(MetricsServer(host=host, port=port).start())
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not serve metrics on {host}:{port}: {e}")
+    if json_path:
+        try:
+            exporters.append(JsonMetricsDumper(json_path, interval=interval).start())
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not start metrics dump to {json_path}: {e}")
+    return exporters
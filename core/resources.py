@@ -0,0 +1,341 @@
+"""Memory and CPU budgets for frame analysis and batch admission."""
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import psutil
+
+# Default memory budget of one detection/extraction worker
+DEFAULT_WORKER_BUDGET_MB = 1024
+
+# Frames the decoder keeps internally (references plus reordering), as YUV 4:2:0
+DECODER_BUFFERED_FRAMES = 8
+
+# Interpreter, OpenCV and FFmpeg bookkeeping attributed to each worker
+WORKER_OVERHEAD_BYTES = 64 * 1024 * 1024
+
+# Upper bound on decoded frames read ahead of the analysis
+MAX_PREFETCH = 4
+
+# Analysis resolution is never reduced below this width
+MIN_ANALYSIS_WIDTH = 320
+
+# Share of the currently available system memory a batch plans to use
+SYSTEM_MEMORY_SHARE = 0.8
+
+# Seconds between RSS samples while jobs are tracked
+RSS_SAMPLE_INTERVAL = 0.1
+
+# Niceness of FFmpeg processes started for batch jobs (0 keeps the priority of this process)
+DEFAULT_WORKER_NICE = 0
+
+DetectionPlan = namedtuple('DetectionPlan', 'width height prefetch estimated_bytes fits')
+
+ThreadPlan = namedtuple('ThreadPlan', 'threads filter_threads opencv_threads')
+
+
+def current_rss():
+    """Return the resident set size of this process in bytes."""
+    return psutil.Process().memory_info().rss
+
+
+def tree_rss():
+    """Return the resident set size of this process and all its children in bytes.
+
+    FFmpeg encodes run as child processes, so their memory counts against
+    the batch as well. Children that exit while being sampled are skipped.
+    """
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total
+
+
+class MemoryBudget:
+    """Chooses frame handling parameters that keep a worker under a memory budget."""
+
+    def __init__(self, budget_bytes=None):
+        """Initialize the budget.
+
+        Args:
+            budget_bytes: Bytes one worker may use. Defaults to DEFAULT_WORKER_BUDGET_MB.
+        """
+        self.budget_bytes = budget_bytes or DEFAULT_WORKER_BUDGET_MB * 1024 * 1024
+
+    def plan_detection(self, width, height):
+        """Pick the analysis resolution and prefetch depth for scene detection.
+
+        The decoder's buffers and one full-resolution BGR frame are fixed
+        costs. The analysis (previous and current gray frames plus their
+        difference) runs at full resolution when it fits, otherwise at
+        halved resolutions; whatever is left pays for prefetched frames.
+
+        Args:
+            width: Source frame width
+            height: Source frame height
+
+        Returns:
+            DetectionPlan: Analysis width and height, prefetch depth, estimated bytes,
+                           and whether the plan fits in the budget at all
+        """
+        bgr_bytes = width * height * 3
+        fixed = WORKER_OVERHEAD_BYTES + DECODER_BUFFERED_FRAMES * width * height * 3 // 2 + bgr_bytes
+
+        analysis_width, analysis_height = width, height
+        while True:
+            scaled = analysis_width != width
+            pixels = analysis_width * analysis_height
+            # Two gray frames and the difference image, plus the resized BGR frame when scaling
+            analysis = 3 * pixels + (3 * pixels if scaled else 0)
+            remaining = self.budget_bytes - fixed - analysis
+            if remaining >= 0 or analysis_width // 2 < MIN_ANALYSIS_WIDTH:
+                break
+            analysis_width = analysis_width // 4 * 2
+            analysis_height = analysis_height // 4 * 2
+
+        prefetch = max(0, min(MAX_PREFETCH, remaining // bgr_bytes)) if bgr_bytes else 0
+        return DetectionPlan(analysis_width, analysis_height, int(prefetch),
+                             fixed + analysis + int(prefetch) * bgr_bytes, remaining >= 0)
+
+    def max_workers(self, requested):
+        """Limit a worker count to what the available system memory can hold.
+
+        Args:
+            requested: Number of workers asked for
+
+        Returns:
+            int: Number of workers to run (at least 1)
+        """
+        available = psutil.virtual_memory().available * SYSTEM_MEMORY_SHARE
+        return max(1, min(requested, int(available // self.budget_bytes)))
+
+
+class MemoryGovernor:
+    """Admits batch jobs only while the process stays within its workers' budgets.
+
+    Memory is measured over the whole process tree, including the FFmpeg
+    processes the jobs start.
+    """
+
+    def __init__(self, budget, workers):
+        """Initialize the governor.
+
+        Args:
+            budget: MemoryBudget of one worker
+            workers: Number of workers the batch runs
+        """
+        self.budget = budget
+        self.limit = tree_rss() + budget.budget_bytes * workers
+
+    def can_admit(self, running):
+        """Check whether another job can start.
+
+        Args:
+            running: Number of jobs already running
+
+        Returns:
+            bool: True if the job fits; the first job is always admitted
+        """
+        if running == 0:
+            return True
+        return tree_rss() + self.budget.budget_bytes <= self.limit
+
+
+def open_capture(video_path, threads=None):
+    """Open a video with OpenCV, optionally limiting its decoder threads.
+
+    Args:
+        video_path: Path to the video file
+        threads: Decoder threads of the FFmpeg backend; None keeps OpenCV's default
+                 (one per core)
+
+    Returns:
+        cv2.VideoCapture: The capture (check isOpened())
+    """
+    if threads:
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_N_THREADS, int(threads)])
+        if cap.isOpened():
+            return cap
+        cap.release()
+    return cv2.VideoCapture(video_path)
+
+
+class CPUBudget:
+    """Shares the CPU threads of the machine among the jobs running at once.
+
+    FFmpeg encoders, filters and decoders and OpenCV each default to one
+    thread per core, so N parallel jobs ask for N times the machine and
+    lose throughput to context switches and cache thrashing. A job gets an
+    equal share of the cores when it starts, sized for the jobs running
+    then or the jobs the scheduler expects to run at once, whichever is
+    more; its FFmpeg processes can also be started at a lower CPU and I/O
+    priority so the desktop stays responsive.
+    """
+
+    def __init__(self, cpus=None, nice=DEFAULT_WORKER_NICE, low_io_priority=False):
+        """Initialize the budget.
+
+        Args:
+            cpus: Threads to share. Defaults to the logical CPU count.
+            nice: Niceness of job FFmpeg processes (0 leaves it unchanged)
+            low_io_priority: Run job FFmpeg processes in the idle I/O class where supported
+        """
+        self.cpus = cpus or os.cpu_count() or 1
+        self.nice = nice
+        self.low_io_priority = low_io_priority
+        self.logger = logging.getLogger(__name__)
+        self._running = 0
+        self._expected = 0
+        self._lock = threading.Lock()
+
+    def plan(self, jobs):
+        """Return the thread counts of one of several concurrent jobs.
+
+        Filters (scaling, splitting) run next to the encoder, so they get
+        half of the job's share.
+
+        Args:
+            jobs: Number of jobs sharing the CPU
+
+        Returns:
+            ThreadPlan: Encoder/decoder threads, filter threads and OpenCV threads
+        """
+        threads = max(1, self.cpus // max(1, jobs))
+        return ThreadPlan(threads, max(1, threads // 2), threads)
+
+    def expect(self, jobs):
+        """Tell the budget how many jobs are about to run concurrently.
+
+        Without this, the first job of a batch would take the whole machine
+        before the others start.
+
+        Args:
+            jobs: Number of jobs expected to run at once
+        """
+        with self._lock:
+            self._expected = jobs
+
+    def acquire(self):
+        """Register a starting job and return its thread plan."""
+        with self._lock:
+            self._running += 1
+            return self.plan(max(self._running, self._expected))
+
+    def release(self):
+        """Unregister a finished job."""
+        with self._lock:
+            self._running = max(0, self._running - 1)
+
+    @property
+    def running(self):
+        """Number of jobs currently holding a share."""
+        return self._running
+
+    def configure_opencv(self, jobs):
+        """Size OpenCV's process-wide thread pool for a number of concurrent jobs.
+
+        Args:
+            jobs: Number of jobs that will analyze frames at the same time
+        """
+        cv2.setNumThreads(self.plan(jobs).opencv_threads)
+
+    def apply_priority(self, pid):
+        """Lower the CPU and I/O priority of a job process as configured.
+
+        Failures (e.g. the process already exited) are logged and ignored.
+
+        Args:
+            pid: Process id of the FFmpeg process
+        """
+        if not self.nice and not self.low_io_priority:
+            return
+        try:
+            process = psutil.Process(pid)
+            if self.nice:
+                if os.name == 'nt':
+                    process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if self.nice > 0
+                                 else psutil.NORMAL_PRIORITY_CLASS)
+                else:
+                    process.nice(self.nice)
+            if self.low_io_priority and hasattr(process, 'ionice'):
+                if os.name == 'nt':
+                    process.ionice(psutil.IOPRIO_LOW)
+                else:
+                    process.ionice(psutil.IOPRIO_CLASS_IDLE)
+        except (psutil.Error, OSError, ValueError) as e:
+            self.logger.debug(f"Could not lower the priority of process {pid}: {e}")
+
+
+class _RSSTracker:
+    """Peak RSS observed while one job was running."""
+
+    __slots__ = ('start', 'peak')
+
+    def __init__(self, rss):
+        self.start = rss
+        self.peak = rss
+
+
+class RSSMonitor:
+    """Samples the process RSS in the background while any job is tracked.
+
+    Parallel workers share one process, so a job's peak is the process peak
+    seen during its lifetime; its growth over the RSS at its start is the
+    closer measure of what the job itself used.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._trackers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._process = psutil.Process()
+
+    def track(self):
+        """Start tracking a job and return its tracker."""
+        tracker = _RSSTracker(self._process.memory_info().rss)
+        with self._lock:
+            self._trackers.add(tracker)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return tracker
+
+    def untrack(self, tracker):
+        """Stop tracking a job.
+
+        Returns:
+            tuple: (peak RSS in bytes, growth over the RSS at the job's start in bytes)
+        """
+        rss = self._process.memory_info().rss
+        with self._lock:
+            self._trackers.discard(tracker)
+            tracker.peak = max(tracker.peak, rss)
+        return tracker.peak, tracker.peak - tracker.start
+
+    def _run(self):
+        while True:
+            try:
+                rss = self._process.memory_info().rss
+            except psutil.Error as e:
+                logging.getLogger(__name__).warning(f"RSS sampling stopped: {e}")
+                rss = None
+            with self._lock:
+                if rss is None or not self._trackers:
+                    self._thread = None
+                    return
+                for tracker in self._trackers:
+                    if rss > tracker.peak:
+                        tracker.peak = rss
+            time.sleep(self.interval)
+
+
+# Process-wide monitor shared by all jobs
+RSS_MONITOR = RSSMonitor()
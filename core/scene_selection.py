@@ -0,0 +1,164 @@
+"""Scored selection of the best sequence windows across a whole video."""
+import heapq
+from collections import deque
+
+# Mean gray level below which a frame counts as black
+BLACK_LEVEL = 16.0
+
+# Mean frame difference below which a frame counts as frozen
+FROZEN_DIFF = 0.5
+
+# Candidates kept per requested window, so overlap and spacing rules still leave enough to choose from
+CANDIDATE_POOL_FACTOR = 4
+
+# Recent frames kept to fill in windows whose cut was confirmed after a look-ahead
+RECENT_FRAMES = 256
+
+
+class _Window:
+    """Content statistics of a candidate window while its frames stream past."""
+
+    __slots__ = ('start', 'end', 'strength', 'frames', 'black', 'frozen')
+
+    def __init__(self, start, end, strength):
+        self.start = start
+        self.end = end
+        self.strength = strength
+        self.frames = 0
+        self.black = 0
+        self.frozen = 0
+
+    def add(self, is_black, is_frozen):
+        self.frames += 1
+        self.black += is_black
+        self.frozen += is_frozen
+
+    def score(self):
+        """Cut strength discounted by the share of black and frozen frames."""
+        if self.frames == 0:
+            return 0.0
+        usable = 1.0 - (self.black + self.frozen) / (2 * self.frames)
+        return self.strength * usable * usable
+
+
+class SceneSelector:
+    """Picks the best non-overlapping windows from a streamed detection pass.
+
+    Every scene change opens a candidate window of the requested length.
+    While its frames stream past, the window counts black and frozen
+    frames; when it closes it is scored and offered to a bounded min-heap,
+    so memory is O(k) in the number of windows requested no matter how long
+    the video is. finish() then picks windows greedily by score, skipping
+    overlaps and discounting windows close to ones already chosen, so the
+    selection spreads across the timeline.
+    """
+
+    def __init__(self, count, window_length, pool_factor=CANDIDATE_POOL_FACTOR):
+        """Initialize the selector.
+
+        Args:
+            count: Number of windows to select
+            window_length: Length of each window in seconds
+            pool_factor: Candidates kept per requested window
+        """
+        self.count = count
+        self.window_length = window_length
+        self.pool_size = max(count * pool_factor, count)
+        self._open = []
+        self._heap = []  # (score, start, end) min-heap of the best closed windows
+        self._recent = deque(maxlen=RECENT_FRAMES)
+        self._last_timestamp = 0.0
+
+    def add_frame(self, timestamp, diff, gray):
+        """Feed the statistics of one analyzed frame.
+
+        Args:
+            timestamp: Frame time in seconds
+            diff: Mean absolute difference to the previous frame
+            gray: Grayscale analysis frame (a NumPy array)
+        """
+        self.add_level(timestamp, diff, float(gray.mean()))
+
+    def add_level(self, timestamp, diff, level):
+        """Feed the statistics of one analyzed frame given its mean gray level.
+
+        Args:
+            timestamp: Frame time in seconds
+            diff: Mean absolute difference to the previous frame
+            level: Mean gray level of the frame
+        """
+        is_black = level < BLACK_LEVEL
+        is_frozen = diff < FROZEN_DIFF
+        self._recent.append((timestamp, diff, is_black, is_frozen))
+        self._last_timestamp = timestamp
+        still_open = []
+        for window in self._open:
+            if timestamp >= window.end:
+                self._offer(window)
+            else:
+                window.add(is_black, is_frozen)
+                still_open.append(window)
+        self._open = still_open
+
+    def add_cut(self, timestamp, strength=None):
+        """Open a candidate window at a scene change.
+
+        Frames already seen since the cut (e.g. during a confirmation
+        look-ahead) are counted into the window immediately.
+
+        Args:
+            timestamp: Time of the cut in seconds
+            strength: Cut strength; defaults to the largest frame difference around the cut
+        """
+        if strength is None:
+            strength = max((diff for ts, diff, _, _ in self._recent if abs(ts - timestamp) < 0.1),
+                           default=1.0)
+        window = _Window(timestamp, timestamp + self.window_length, max(strength, 1e-6))
+        for ts, _, is_black, is_frozen in self._recent:
+            if timestamp <= ts < window.end:
+                window.add(is_black, is_frozen)
+        self._open.append(window)
+
+    def _offer(self, window):
+        entry = (window.score(), window.start, window.end)
+        if len(self._heap) < self.pool_size:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def finish(self, duration=None):
+        """Close the stream and choose the windows.
+
+        Args:
+            duration: Video duration in seconds; windows running past it are dropped.
+                      Defaults to the time of the last frame seen.
+
+        Returns:
+            list: Start times of the selected windows in timeline order
+        """
+        duration = duration if duration is not None else self._last_timestamp
+        for window in self._open:
+            if window.end <= duration + 1e-6:
+                self._offer(window)
+        self._open = []
+
+        candidates = sorted(self._heap, reverse=True)
+        spacing = duration / self.count if self.count and duration > 0 else 0.0
+        selected = []
+        while candidates and len(selected) < self.count:
+            best_index = None
+            best_value = None
+            for index, (score, start, end) in enumerate(candidates):
+                if any(start < s_end and s_start < end for s_start, s_end in selected):
+                    continue
+                value = score
+                if spacing and selected:
+                    nearest = min(abs(start - s_start) for s_start, _ in selected)
+                    value *= min(1.0, nearest / spacing)
+                if best_value is None or value > best_value:
+                    best_index, best_value = index, value
+            if best_index is None:
+                break
+            _, start, end = candidates.pop(best_index)
+            selected.append((start, end))
+        return sorted(start for start, _ in selected)
@@ -0,0 +1,236 @@
+"""Contact sheets and sprite/WebVTT thumbnail tracks for review pages."""
+import glob
+import logging
+import math
+import os
+import subprocess
+
+import cv2
+from PIL import Image, ImageDraw
+
+from core import metrics
+from core.thumbnails import extract_thumbnails
+
+# Contact sheet defaults
+SHEET_TILE_SIZE = (320, 180)
+SHEET_COLUMNS = 4
+SHEET_MAX_TILES = 24
+
+# Sprite track defaults: one tile every SPRITE_INTERVAL seconds, at most SPRITE_MAX_ROWS rows per image
+SPRITE_INTERVAL = 2.0
+SPRITE_TILE_SIZE = (160, 90)
+SPRITE_COLUMNS = 10
+SPRITE_MAX_ROWS = 10
+
+# Gap between contact sheet tiles and its background color
+SHEET_SPACING = 4
+SHEET_BACKGROUND = (16, 16, 16)
+
+
+def _label(seconds):
+    """Format seconds as H:MM:SS.s for tile captions."""
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}:{minutes:02d}:{seconds:04.1f}"
+
+
+def _vtt_time(seconds):
+    """Format seconds as a WebVTT timestamp (HH:MM:SS.mmm)."""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def _video_duration(video_path):
+    """Return the duration of a video in seconds from its frame count."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) / fps
+    finally:
+        cap.release()
+
+
+def _sample(values, count):
+    """Pick count values spread evenly over a sorted list."""
+    if len(values) <= count:
+        return list(values)
+    step = len(values) / count
+    return [values[int(i * step)] for i in range(count)]
+
+
+def render_contact_sheet(tiles, columns=SHEET_COLUMNS, tile_size=SHEET_TILE_SIZE, label=True):
+    """Tile thumbnails into one contact sheet image.
+
+    Args:
+        tiles: List of (timestamp, PIL image) tuples in display order
+        columns: Number of tiles per row
+        tile_size: Size every tile is fitted into as (width, height)
+        label: Draw the timestamp into the corner of each tile
+
+    Returns:
+        PIL.Image: The contact sheet
+    """
+    tile_width, tile_height = tile_size
+    rows = max(1, math.ceil(len(tiles) / columns))
+    sheet = Image.new('RGB', (columns * tile_width + (columns + 1) * SHEET_SPACING,
+                              rows * tile_height + (rows + 1) * SHEET_SPACING), SHEET_BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    for index, (timestamp, image) in enumerate(tiles):
+        row, column = divmod(index, columns)
+        x = SHEET_SPACING + column * (tile_width + SHEET_SPACING)
+        y = SHEET_SPACING + row * (tile_height + SHEET_SPACING)
+        if image.size != tile_size:
+            image = image.copy()
+            image.thumbnail(tile_size)
+        sheet.paste(image, (x + (tile_width - image.width) // 2, y + (tile_height - image.height) // 2))
+        if label:
+            text = _label(timestamp)
+            left, top, right, bottom = draw.textbbox((0, 0), text)
+            draw.rectangle((x, y + tile_height - (bottom - top) - 6, x + (right - left) + 6, y + tile_height),
+                           fill=(0, 0, 0))
+            draw.text((x + 3, y + tile_height - (bottom - top) - 4), text, fill=(255, 255, 255))
+    return sheet
+
+
+def build_contact_sheet(video_path, output_path, scene_changes=None, thumbnails=None,
+                        tile_size=SHEET_TILE_SIZE, columns=SHEET_COLUMNS, max_tiles=SHEET_MAX_TILES,
+                        thumbnail_cache=None):
+    """Write a contact sheet with one tile per scene of a video.
+
+    Tiles come from thumbnails already produced by the detector when given.
+    Otherwise all tiles are extracted with a single open of the video (one
+    forward decode where scenes are close together), and with no scene list
+    the tiles are spread evenly over the video.
+
+    Args:
+        video_path: Path to the input video
+        output_path: Path of the image to write (format from its extension)
+        scene_changes: Optional scene change timestamps; the sheet also shows the first frame
+        thumbnails: Optional list of (timestamp, PIL image) tuples, e.g. from
+                    detect_scene_changes(thumbnail_size=...)
+        tile_size: Tile size as (width, height)
+        columns: Number of tiles per row
+        max_tiles: Maximum number of tiles; longer scene lists are sampled evenly
+        thumbnail_cache: Optional ThumbnailCache used instead of decoding directly
+
+    Returns:
+        str: output_path, or None if no frame could be read
+    """
+    logger = logging.getLogger(__name__)
+    if thumbnails:
+        tiles = _sample(sorted(thumbnails, key=lambda item: item[0]), max_tiles)
+    else:
+        if scene_changes:
+            timestamps = _sample(sorted(set([0.0] + list(scene_changes))), max_tiles)
+        else:
+            duration = _video_duration(video_path)
+            timestamps = [duration * i / max_tiles for i in range(max_tiles)]
+        if thumbnail_cache is not None:
+            tiles = thumbnail_cache.get_thumbnails(video_path, timestamps, tile_size)
+        else:
+            extracted = extract_thumbnails(video_path, timestamps, tile_size)
+            tiles = [(timestamp, extracted[timestamp]) for timestamp in timestamps if timestamp in extracted]
+
+    if not tiles:
+        logger.warning(f"No frames read for the contact sheet of {video_path}")
+        return None
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    render_contact_sheet(tiles, columns, tile_size).save(output_path, quality=85)
+    logger.info(f"Saved contact sheet with {len(tiles)} tiles to {output_path}")
+    return output_path
+
+
+def build_sprite_track(video_path, output_dir, base_name, start_time=0.0, duration=None,
+                       interval=SPRITE_INTERVAL, tile_size=SPRITE_TILE_SIZE, columns=SPRITE_COLUMNS,
+                       max_rows=SPRITE_MAX_ROWS):
+    """Write sprite sheets and a WebVTT thumbnail track for a video or a part of it.
+
+    A single FFmpeg pass samples one frame per interval (fps), fits it into
+    the tile size (scale + pad) and packs the tiles into sprite images
+    (tile). The WebVTT track then maps every interval to its tile with a
+    '#xywh=' media fragment, as used by web players for scrubbing previews.
+
+    Args:
+        video_path: Path to the input video
+        output_dir: Folder for the sprite images and the .vtt file
+        base_name: File name prefix of the outputs
+        start_time: Start of the covered range in seconds
+        duration: Length of the covered range in seconds; defaults to the rest of the video
+        interval: Seconds between two tiles
+        tile_size: Tile size as (width, height)
+        columns: Tiles per sprite row
+        max_rows: Maximum rows per sprite image; longer ranges use more images
+
+    Returns:
+        tuple: (sprite paths, vtt path), or None if FFmpeg failed
+    """
+    logger = logging.getLogger(__name__)
+    if duration is None:
+        duration = _video_duration(video_path) - start_time
+    frame_count = max(1, math.ceil(duration / interval))
+    rows = min(max_rows, math.ceil(frame_count / columns))
+    tile_width, tile_height = tile_size
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Remove sprites of an earlier run so stale images are not referenced
+    for stale in glob.glob(os.path.join(glob.escape(output_dir), f"{glob.escape(base_name)}_sprite_*.jpg")):
+        os.remove(stale)
+
+    video_filter = (f"fps=1/{interval},"
+                    f"scale={tile_width}:{tile_height}:force_original_aspect_ratio=decrease,"
+                    f"pad={tile_width}:{tile_height}:(ow-iw)/2:(oh-ih)/2,"
+                    f"tile={columns}x{rows}")
+    sprite_pattern = os.path.join(output_dir, f"{base_name}_sprite_%03d.jpg")
+    cmd = [
+        "ffmpeg", "-v", "error", "-y",
+        "-ss", str(start_time),
+        "-t", str(duration),
+        "-i", video_path,
+        "-vf", video_filter,
+        "-q:v", "4",
+        "-start_number", "0",
+        sprite_pattern,
+    ]
+    logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
+    metrics.FFMPEG_SPAWNS.inc()
+    metrics.FFMPEG_PROCESSES.inc()
+    try:
+        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except OSError as e:
+        logger.error(f"Error running FFmpeg for sprites: {str(e)}")
+        return None
+    finally:
+        metrics.FFMPEG_PROCESSES.dec()
+    if process.returncode != 0:
+        logger.error(f"FFmpeg failed to write sprites: {process.stderr.strip()}")
+        return None
+
+    per_sprite = columns * rows
+    sprite_paths = []
+    lines = ["WEBVTT", ""]
+    for index in range(frame_count):
+        sheet, position = divmod(index, per_sprite)
+        sprite_path = sprite_pattern % sheet
+        if not os.path.exists(sprite_path):
+            break
+        if not sprite_paths or sprite_paths[-1] != sprite_path:
+            sprite_paths.append(sprite_path)
+        row, column = divmod(position, columns)
+        cue_start = index * interval
+        cue_end = min((index + 1) * interval, duration)
+        lines.append(f"{_vtt_time(cue_start)} --> {_vtt_time(cue_end)}")
+        lines.append(f"{os.path.basename(sprite_path)}#xywh={column * tile_width},{row * tile_height},"
+                     f"{tile_width},{tile_height}")
+        lines.append("")
+
+    vtt_path = os.path.join(output_dir, f"{base_name}_thumbnails.vtt")
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    logger.info(f"Saved {len(sprite_paths)} sprite image(s) and {vtt_path}")
+    return sprite_paths, vtt_path
@@ -0,0 +1,252 @@
+"""Batched thumbnail extraction and a size-bounded thumbnail cache."""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import cv2
+from PIL import Image
+
+from core import metrics
+from core.cache_dir import cache_entries, evict_lru
+from core.fingerprint import FingerprintMemo
+
+# Default cache bounds
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+# Decode forward instead of seeking when the next timestamp is this close (seconds)
+SEQUENTIAL_DECODE_WINDOW = 2.0
+
+
+def frame_to_thumbnail(frame, size):
+    """Convert a BGR frame to a PIL thumbnail of the given size."""
+    # Shrinking with INTER_AREA before the color conversion touches far fewer pixels
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+
+
+def encode_thumbnail(image, image_format='JPEG', quality=85):
+    """Encode a thumbnail as compressed image bytes.
+
+    Args:
+        image: PIL image
+        image_format: 'JPEG' or 'WEBP'
+        quality: Encoder quality (0-100)
+
+    Returns:
+        bytes: Encoded image
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def extract_thumbnails(video_path, timestamps, size=(320, 180)):
+    """Extract thumbnails for many timestamps with a single open of the video.
+
+    Timestamps are visited in sorted order. Close timestamps are reached by
+    decoding forward rather than seeking, and timestamps falling on the same
+    frame share one decoded frame.
+
+    Args:
+        video_path: Path to the video file
+        timestamps: Timestamps in seconds
+        size: Thumbnail size as (width, height)
+
+    Returns:
+        dict: Maps each timestamp to a PIL image (timestamps that could not be read are omitted)
+    """
+    thumbnails = {}
+    if not timestamps:
+        return thumbnails
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        window = int(SEQUENTIAL_DECODE_WINDOW * fps)
+        position = 0  # Index of the next frame the decoder will return
+        last_frame_number = None
+        last_thumbnail = None
+
+        for timestamp in sorted(set(timestamps)):
+            frame_number = int(timestamp * fps)
+            if frame_number == last_frame_number:
+                if last_thumbnail is not None:
+                    thumbnails[timestamp] = last_thumbnail
+                continue
+
+            if frame_number < position or frame_number - position > window:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                position = frame_number
+            else:
+                # Skip intermediate frames without converting them
+                while position < frame_number and cap.grab():
+                    position += 1
+
+            ret, frame = cap.read()
+            last_frame_number = frame_number
+            if not ret:
+                last_thumbnail = None
+                continue
+            position = frame_number + 1
+            last_thumbnail = frame_to_thumbnail(frame, size)
+            thumbnails[timestamp] = last_thumbnail
+    finally:
+        cap.release()
+    return thumbnails
+
+
+class ThumbnailCache:
+    """Two-level (memory + disk) thumbnail cache keyed by file content.
+
+    Keys combine the file's sampled fingerprint, the timestamp and the
+    thumbnail size, so renamed or copied files share entries and edited
+    files never return stale images.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=DEFAULT_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_DISK_BYTES):
+        """Initialize the thumbnail cache.
+
+        Args:
+            cache_dir: Directory for cached JPEG files. If None, uses
+                       ~/.video_slicer/thumbnails.
+            max_memory_bytes: Upper bound for decoded thumbnails kept in memory
+            max_disk_bytes: Upper bound for the on-disk cache
+        """
+        self.logger = logging.getLogger(__name__)
+        if cache_dir is None:
+            cache_dir = os.path.join(str(Path.home()), '.video_slicer', 'thumbnails')
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._fingerprints = FingerprintMemo()
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def fingerprint(self, video_path):
+        """Return the content fingerprint of a video, memoized by path, size and mtime."""
+        return self._fingerprints.get(video_path)
+
+    @staticmethod
+    def _key(fingerprint, timestamp, size):
+        return (fingerprint, round(float(timestamp), 3), tuple(size))
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.jpg")
+
+    def _remember(self, key, image):
+        """Insert an image into the memory level, evicting least recently used entries."""
+        nbytes = image.width * image.height * len(image.getbands())
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = image
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.width * evicted.height * len(evicted.getbands())
+
+    def _lookup(self, key):
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+        if image is not None:
+            metrics.record_cache_lookup('thumbnail_memory', True)
+            return image
+        metrics.record_cache_lookup('thumbnail_memory', False)
+
+        path = self._disk_path(key)
+        try:
+            with Image.open(path) as stored:
+                image = stored.convert('RGB')
+            os.utime(path)  # Mark as recently used for disk eviction
+        except (OSError, ValueError):
+            metrics.record_cache_lookup('thumbnail_disk', False)
+            return None
+        metrics.record_cache_lookup('thumbnail_disk', True)
+        self._remember(key, image)
+        return image
+
+    def _store(self, key, image):
+        self._remember(key, image)
+        path = self._disk_path(key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A unique temp file per write, so workers storing the same entry do not collide
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+                temp_path = f.name
+                image.save(f, format='JPEG', quality=90)
+            os.replace(temp_path, path)
+            temp_path = None
+            self._account_disk(os.path.getsize(path))
+        except OSError as e:
+            self.logger.warning(f"Could not write thumbnail cache entry: {e}")
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+    def _account_disk(self, added):
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in cache_entries(self.cache_dir))
+            else:
+                self._disk_bytes += added
+            if self._disk_bytes > self.max_disk_bytes:
+                self._disk_bytes = evict_lru(cache_entries(self.cache_dir), self._disk_bytes,
+                                             self.max_disk_bytes)
+
+    def get_thumbnails(self, video_path, timestamps, size=(320, 180)):
+        """Get thumbnails for timestamps, extracting only the ones not cached.
+
+        Args:
+            video_path: Path to the video file
+            timestamps: Timestamps in seconds
+            size: Thumbnail size as (width, height)
+
+        Returns:
+            list: List of (timestamp, thumbnail) tuples in the order of timestamps
+        """
+        fingerprint = self.fingerprint(video_path)
+        found = {}
+        missing = []
+        for timestamp in timestamps:
+            image = self._lookup(self._key(fingerprint, timestamp, size))
+            if image is None:
+                missing.append(timestamp)
+            else:
+                found[timestamp] = image
+
+        if missing:
+            extracted = extract_thumbnails(video_path, missing, size)
+            for timestamp, image in extracted.items():
+                self._store(self._key(fingerprint, timestamp, size), image)
+            found.update(extracted)
+
+        return [(timestamp, found[timestamp]) for timestamp in timestamps if timestamp in found]
+
+    def put(self, video_path, timestamp, image, size=None):
+        """Store a thumbnail produced elsewhere (e.g. during scene detection).
+
+        Args:
+            video_path: Path to the video file
+            timestamp: Timestamp in seconds
+            image: PIL image
+            size: Cache size key; defaults to the image size
+        """
+        size = size or image.size
+        self._store(self._key(self.fingerprint(video_path), timestamp, size), image)
@@ -1,24 +1,203 @@
 """Core video processing functionality using OpenCV and FFmpeg."""
 import os
+import math
+import shutil
 import cv2
 import numpy as np
 import logging
+import asyncio
+import multiprocessing
+import queue
 import subprocess
 import tempfile
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from utils import setup_logger, format_time
+from core.instrumentation import JobInstrumentation, PROFILE_ENV_VAR, format_summary
+from core import metrics
+from core.keyframe_index import KeyframeIndexCache
+from core.chunked_analysis import MIN_CHUNK_SECONDS, analyze_chunk, plan_chunks
+from core.audio import AUDIO_NOVELTY_THRESHOLD, MIN_AUDIO_CUT_GAP, AudioNoveltyCursor, iter_audio_novelty
+from core.resources import MemoryBudget, open_capture
+from core.scene_selection import SceneSelector
+from core.thumbnails import ThumbnailCache, encode_thumbnail, extract_thumbnails, frame_to_thumbnail
+
+# Stage context used when no job is active on the current thread
+_NULL_STAGE = nullcontext()
+
+# Seconds after a candidate cut checked for a return to the previous shot (flash rejection)
+FLASH_LOOKAHEAD_SECONDS = 0.2
+
+# libx264/libx265 settings per encode speed tier. Sequences are short, so long
+# rate-control lookahead buys little; draft also uses sliced threads, which
+# start encoding in parallel at once instead of first filling frame threads.
+# tune applies to libx264 only.
+H26X_SPEED_TIERS = {
+    'draft': {'preset': 'veryfast', 'tune': None, 'lookahead': 10, 'sliced_threads': True},
+    'standard': {'preset': 'medium', 'tune': None, 'lookahead': None, 'sliced_threads': False},
+    'archival': {'preset': 'slow', 'tune': 'film', 'lookahead': 60, 'sliced_threads': False},
+}
+DEFAULT_SPEED_TIER = 'standard'
+
+# FFmpeg ProRes encoders and their output settings. prores_ks has per-slice rate
+# control and writes the Apple vendor tag; prores_aw (also registered as 'prores')
+# is several times faster at a small cost in quality per bit.
+PRORES_ENCODERS = {
+    'prores_ks': {'vendor': 'ap10', 'pix_fmt': 'yuv422p10le'},
+    'prores_aw': {'vendor': None, 'pix_fmt': 'yuv422p10le'},
+    'prores': {'vendor': None, 'pix_fmt': 'yuv422p10le'},
+}
+
+# ProRes 422 profile numbers, shared by all three encoders
+PRORES_PROFILES = {'proxy': '0', 'lt': '1', 'standard': '2', 'hq': '3'}
+
+# Lowest profile for which the 'auto' policy prefers quality (prores_ks) over throughput
+PRORES_KS_MIN_PROFILE = PRORES_PROFILES['hq']
+
+# Seconds without encoding progress after which an FFmpeg encode is stopped. Encodes are
+# not limited in run time, since long 4K or multi-rendition encodes take minutes.
+FFMPEG_STALL_TIMEOUT = 30.0
+
+# Shortest chunk of a sequence encoded on its own in chunked encoding
+MIN_ENCODE_CHUNK_SECONDS = 5.0
+
+# Frames checked on each side of a chunk boundary after a chunked encode
+BOUNDARY_CHECK_FRAMES = 2
+
+# Mean gray level difference by which a long-GOP output frame may look more like a
+# neighbouring source frame than like its own (coding noise on near-static content)
+BOUNDARY_MATCH_TOLERANCE = 1.0
+
+# Renditions of a typical delivery. height caps the output height; None keeps the
+# source size (scaled down to HD like single-output sequences).
+DELIVERY_RENDITIONS = [
+    {'name': 'master', 'format': 'prores', 'quality': 'high', 'height': None},
+    {'name': 'proxy', 'format': 'h264', 'quality': 'medium', 'height': 720},
+    {'name': 'preview', 'format': 'h264', 'quality': 'low', 'height': 360},
+]
 
 class VideoProcessor:
     """Class for processing videos, detecting scenes, and extracting sequences."""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, profile=None, thumbnail_cache=None, memory_budget=None,
+                 cpu_budget=None):
         """Initialize the VideoProcessor.
         
         Args:
             logger: Optional logger instance. If None, a new one will be created.
+            profile: Optional profiler hook run around each stage ('cprofile' or
+                     'sampling'). Defaults to the VIDEO_SLICER_PROFILE environment variable.
+            thumbnail_cache: Optional ThumbnailCache. If None, one is created on first use.
+            memory_budget: Optional MemoryBudget per job, which picks the analysis
+                           resolution and prefetch depth. Defaults to MemoryBudget().
+            cpu_budget: Optional CPUBudget shared by concurrent jobs, which sizes the
+                        FFmpeg and OpenCV thread counts of each job. If None, FFmpeg
+                        and OpenCV use their defaults (one thread per core).
         """
         self.logger = logger or setup_logger("video_processor")
+        self.profile = profile or os.environ.get(PROFILE_ENV_VAR) or None
+        self._thumbnail_cache = thumbnail_cache
+        self._keyframe_cache = None
+        self.memory_budget = memory_budget or MemoryBudget()
+        self.cpu_budget = cpu_budget
+        self._prores_encoders = None  # ProRes encoders of the installed FFmpeg, probed on first use
+        
+        # Jobs are tracked per thread so parallel batch workers can share a processor
+        self._local = threading.local()
+    
+    def begin_job(self, name):
+        """Start collecting per-stage timings for a job on the current thread.
+        
+        Args:
+            name: Job name used in the summary, usually the input file name
+            
+        Returns:
+            JobInstrumentation: The instrumentation of the new job
+        """
+        job = JobInstrumentation(name, profile=self.profile)
+        self._local.job = job
+        
+        # Take the job's share of the CPU for its whole lifetime
+        self._local.cpu_budget = self.cpu_budget
+        self._local.thread_plan = self.cpu_budget.acquire() if self.cpu_budget is not None else None
+        return job
+    
+    def end_job(self):
+        """Finish the current job and log its timing summary.
+        
+        Returns:
+            JobInstrumentation: The finished job, or None if no job was active
+        """
+        job = getattr(self._local, 'job', None)
+        if job is None:
+            return None
+        self._local.job = None
+        if self._local.cpu_budget is not None:
+            self._local.cpu_budget.release()
+        self._local.cpu_budget = None
+        self._local.thread_plan = None
+        job.summary = job.finish()
+        self.logger.info(format_summary(job.summary))
+        for stage, histogram in job.stages.items():
+            metrics.STAGE_SECONDS.inc(histogram.total, stage=stage)
+        return job
+    
+    @contextmanager
+    def _job_scope(self, name):
+        """Yield the active job, or run an implicit one-off job if none was begun."""
+        job = getattr(self._local, 'job', None)
+        if job is not None:
+            yield job
+            return
+        job = self.begin_job(name)
+        try:
+            yield job
+        finally:
+            self.end_job()
+    
+    @property
+    def current_job(self):
+        """The JobInstrumentation active on the current thread, if any."""
+        return getattr(self._local, 'job', None)
+    
+    def _stage(self, name):
+        """Time a stage on the current job; a no-op outside of a job."""
+        job = self.current_job
+        return job.stage(name) if job is not None else _NULL_STAGE
+    
+    def _count(self, name, value=1):
+        """Increment a counter on the current job, if any."""
+        job = self.current_job
+        if job is not None:
+            job.count(name, value)
+    
+    def _thread_plan(self):
+        """The ThreadPlan of the current job, or None without a CPU budget."""
+        return getattr(self._local, 'thread_plan', None)
+    
+    def _ffmpeg_thread_args(self, share=1):
+        """Return the FFmpeg thread options for the current job's share of the CPU.
+        
+        Args:
+            share: Number of FFmpeg processes the job runs at once, which split its threads
+            
+        Returns:
+            list: FFmpeg arguments, empty without a CPU budget
+        """
+        plan = self._thread_plan()
+        if plan is None:
+            return []
+        return ["-threads", str(max(1, plan.threads // share)),
+                "-filter_threads", str(max(1, plan.filter_threads // share))]
+    
+    def _lower_priority(self, process):
+        """Apply the CPU budget's nice/ionice settings to a job's FFmpeg process."""
+        budget = getattr(self._local, 'cpu_budget', None)
+        if budget is not None:
+            budget.apply_priority(process.pid)
     
     def check_ffmpeg_available(self):
         """Check if FFmpeg is available and has the required codecs.
@@ -34,6 +213,7 @@ class VideoProcessor:
         
         try:
             # Check if FFmpeg is installed
+            metrics.FFMPEG_SPAWNS.inc(2)
             process = subprocess.run(
                 ["ffmpeg", "-version"], 
                 stdout=subprocess.PIPE, 
@@ -56,7 +236,8 @@ class VideoProcessor:
                 return False, "Error checking FFmpeg encoders", codec_support
             
             # Check for ProRes support (could be prores or prores_ks depending on ffmpeg version)
-            if "prores" in encoders_process.stdout or "prores_ks" in encoders_process.stdout:
+            self._prores_encoders = self._parse_prores_encoders(encoders_process.stdout)
+            if self._prores_encoders:
                 codec_support['prores'] = True
                 
             # Check for H.264 support
@@ -81,116 +262,706 @@ class VideoProcessor:
         except Exception as e:
             return False, f"Error checking FFmpeg: {str(e)}", codec_support
         
-    def detect_scene_changes(self, video_path, threshold=30.0, max_duration=40.0, progress_callback=None):
+    @staticmethod
+    def _parse_prores_encoders(encoders_output):
+        """Return the ProRes encoders listed in the output of 'ffmpeg -encoders'."""
+        names = set()
+        for line in encoders_output.splitlines():
+            fields = line.split()
+            if len(fields) >= 2 and fields[1] in PRORES_ENCODERS:
+                names.add(fields[1])
+        return names
+    
+    def available_prores_encoders(self):
+        """Return the ProRes encoders supported by the installed FFmpeg.
+        
+        Returns:
+            set: Encoder names from PRORES_ENCODERS (empty if FFmpeg could not be queried)
+        """
+        if self._prores_encoders is None:
+            try:
+                metrics.FFMPEG_SPAWNS.inc()
+                process = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"],
+                                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                self._prores_encoders = self._parse_prores_encoders(process.stdout)
+            except OSError as e:
+                self.logger.warning(f"Could not list FFmpeg encoders: {str(e)}")
+                self._prores_encoders = set()
+        return self._prores_encoders
+    
+    def select_prores_encoder(self, profile, preference="auto"):
+        """Choose the ProRes encoder for a job.
+        
+        The 'auto' policy favours throughput for Proxy, LT and Standard, which
+        are usually offline or review deliveries, and quality for HQ.
+        
+        Args:
+            profile: ProRes profile number (see PRORES_PROFILES)
+            preference: 'auto' or an encoder name from PRORES_ENCODERS
+            
+        Returns:
+            str: Encoder name
+        """
+        available = self.available_prores_encoders()
+        if preference != "auto":
+            if preference in available:
+                return preference
+            self.logger.warning(f"ProRes encoder '{preference}' is not available. Choosing automatically")
+        
+        if int(profile) >= int(PRORES_KS_MIN_PROFILE):
+            order = ['prores_ks', 'prores_aw', 'prores']
+        else:
+            order = ['prores_aw', 'prores', 'prores_ks']
+        # Without an encoder list, keep the historical prores_ks
+        return next((name for name in order if name in available), 'prores_ks')
+    
+    def detect_scene_changes(self, video_path, threshold=30.0, max_duration=40.0, progress_callback=None,
+                             thumbnail_size=None, thumbnail_format=None, cache_thumbnails=True,
+                             audio_weight=0.0, workers=1):
         """Detect scene changes in the video.
         
+        With workers > 1, long videos are split into timeline chunks analyzed
+        by separate processes and merged to the same cuts as a sequential pass.
+        
+        With audio_weight > 0 an audio novelty curve (spectral flux and level
+        changes) is streamed alongside the frames and added to the visual
+        difference, so boundaries without a visual cut (talking heads, static
+        slides) can be found too. At audio_weight 1.0, audio novelty at
+        AUDIO_NOVELTY_THRESHOLD alone is enough for a cut.
+        
         Args:
             video_path: Path to the input video
             threshold: Threshold for scene change detection (higher = less sensitive)
             max_duration: Maximum duration in seconds to analyze (default: 40 seconds)
             progress_callback: Optional callback function for progress updates
+            thumbnail_size: Optional (width, height). If given, a thumbnail of the first
+                            frame of every detected scene is made from the frame already
+                            decoded for detection.
+            thumbnail_format: Optional 'JPEG' or 'WEBP' to return encoded bytes instead
+                              of PIL images
+            cache_thumbnails: Also store the thumbnails in the thumbnail cache, so later
+                              get_scene_thumbnails() calls need no decoding
+            audio_weight: Weight of the audio novelty relative to the visual threshold
+                          (0 disables the audio pass)
+            workers: Number of worker processes for chunked analysis (1 = sequential)
             
         Returns:
-            List of timestamps (in seconds) where scene changes occur
+            List of timestamps (in seconds) where scene changes occur. With
+            thumbnail_size, a tuple (timestamps, thumbnails) where thumbnails is a
+            list of (timestamp, image or bytes) tuples.
         """
-        self.logger.info(f"Detecting scene changes with threshold {threshold} in first {max_duration} seconds...")
+        if workers > 1:
+            scene_changes = list(self._iter_scenes_chunked(video_path, threshold, max_duration, workers,
+                                                           progress_callback, audio_weight))
+            if not thumbnail_size:
+                return scene_changes
+            # Workers keep no frames; decode the scene thumbnails in one pass
+            if cache_thumbnails:
+                thumbnails = self.get_scene_thumbnails(video_path, scene_changes, thumbnail_size)
+            else:
+                extracted = extract_thumbnails(video_path, scene_changes, thumbnail_size)
+                thumbnails = [(t, extracted[t]) for t in scene_changes if t in extracted]
+            if thumbnail_format:
+                thumbnails = [(t, encode_thumbnail(image, thumbnail_format)) for t, image in thumbnails]
+            return scene_changes, thumbnails
         
-        # Open the video file
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            self.logger.error(f"Could not open video file: {video_path}")
-            raise ValueError(f"Could not open video file: {video_path}")
+        scene_changes = []
+        thumbnails = []
+        for timestamp, thumbnail in self._iter_scenes(video_path, threshold, max_duration, progress_callback,
+                                                      thumbnail_size, thumbnail_format, cache_thumbnails,
+                                                      audio_weight):
+            scene_changes.append(timestamp)
+            if thumbnail is not None:
+                thumbnails.append(thumbnail)
+        
+        if thumbnail_size:
+            return scene_changes, thumbnails
+        return scene_changes
+    
+    def iter_scene_changes(self, video_path, threshold=30.0, max_duration=40.0, progress_callback=None,
+                           audio_weight=0.0, required_duration=None, lookahead=None):
+        """Yield scene changes as soon as they are found.
+        
+        Decoding stops when the caller stops iterating (or closes the
+        generator), so a caller that needs only the first few cuts never pays
+        for the rest of the analysis window. extract_sequences() accepts this
+        generator in place of a list and starts encoding at the first usable cut.
+        
+        With required_duration, detection is goal-directed: only cuts followed
+        by at least that much video are yielded, and decoding ends where no
+        later cut could qualify. Candidates are confirmed with a look-ahead
+        that rejects flashes, i.e. jumps that return to the previous shot.
+        
+        Args:
+            video_path: Path to the input video
+            threshold: Threshold for scene change detection (higher = less sensitive)
+            max_duration: Maximum duration in seconds to analyze
+            progress_callback: Optional callback function for progress updates
+            audio_weight: Weight of the audio novelty (0 disables the audio pass)
+            required_duration: Optional seconds of video a cut must be followed by,
+                               e.g. sequence_length * num_sequences
+            lookahead: Seconds used to confirm cuts (defaults to FLASH_LOOKAHEAD_SECONDS
+                       with required_duration, otherwise 0)
             
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        Yields:
+            float: Timestamp (in seconds) of each scene change
+        """
+        if lookahead is None:
+            lookahead = FLASH_LOOKAHEAD_SECONDS if required_duration else 0.0
+        for timestamp, _ in self._iter_scenes(video_path, threshold, max_duration, progress_callback,
+                                              audio_weight=audio_weight, required_duration=required_duration,
+                                              lookahead=lookahead):
+            yield timestamp
+    
+    async def aiter_scene_changes(self, video_path, threshold=30.0, max_duration=40.0,
+                                  progress_callback=None, audio_weight=0.0):
+        """Asynchronous variant of iter_scene_changes().
         
-        # Calculate max frames to process based on max_duration
-        max_frames = int(max_duration * fps)
-        frames_to_process = min(max_frames, total_frames)
+        Detection runs on a dedicated worker thread, so the event loop stays
+        free while frames are decoded. Leaving the async for loop early stops
+        the detection.
         
-        self.logger.info(f"Will process {frames_to_process} frames (max {max_duration} seconds at {fps} fps)")
+        Yields:
+            float: Timestamp (in seconds) of each scene change
+        """
+        loop = asyncio.get_running_loop()
+        # One thread for the whole iteration: the job instrumentation is thread-local
+        executor = ThreadPoolExecutor(max_workers=1)
+        scenes = self.iter_scene_changes(video_path, threshold, max_duration, progress_callback, audio_weight)
+        done = object()
+        try:
+            while True:
+                timestamp = await loop.run_in_executor(executor, next, scenes, done)
+                if timestamp is done:
+                    break
+                yield timestamp
+        finally:
+            await loop.run_in_executor(executor, scenes.close)
+            executor.shutdown(wait=False)
+    
+    def select_scenes(self, video_path, count, sequence_length, threshold=30.0, max_duration=None,
+                      progress_callback=None, audio_weight=0.0, workers=1):
+        """Choose the best start points for sequences across the whole video.
         
-        # Initialize variables
-        prev_frame = None
-        scene_changes = []
-        frame_count = 0
+        Every scene change (and the start of the video) is a candidate window
+        of sequence_length seconds, scored by its cut strength and discounted
+        for black and frozen frames. The best non-overlapping windows, spread
+        across the timeline, are returned. Pass the result to extract_sequences()
+        with mode='selected' to extract one sequence from each.
         
-        # Process each frame up to the maximum
-        while frame_count < frames_to_process:
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Convert frame to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        Args:
+            video_path: Path to the input video
+            count: Number of sequences to select
+            sequence_length: Length of each sequence in seconds
+            threshold: Threshold for scene change detection
+            max_duration: Optional seconds to analyze (default: the whole video)
+            progress_callback: Optional callback function for progress updates
+            audio_weight: Weight of the audio novelty (0 disables the audio pass)
+            workers: Number of worker processes for chunked analysis (1 = sequential)
             
-            # Skip the first frame
-            if prev_frame is None:
-                prev_frame = gray
-                frame_count += 1
-                continue
-                
-            # Calculate absolute difference between current and previous frame
-            frame_diff = cv2.absdiff(gray, prev_frame)
+        Returns:
+            List of start timestamps (in seconds) in timeline order
+        """
+        selector = SceneSelector(count, sequence_length)
+        selector.add_cut(0.0, strength=threshold)
+        if workers > 1:
+            scenes = self._iter_scenes_chunked(video_path, threshold, max_duration, workers, progress_callback,
+                                               audio_weight, FLASH_LOOKAHEAD_SECONDS, selector.add_level)
+        else:
+            scenes = (timestamp for timestamp, _ in self._iter_scenes(
+                video_path, threshold, max_duration, progress_callback, audio_weight=audio_weight,
+                lookahead=FLASH_LOOKAHEAD_SECONDS, frame_observer=selector.add_frame))
+        for timestamp in scenes:
+            selector.add_cut(timestamp)
+        selected = selector.finish()
+        self.logger.info(f"Selected sequence starts: {', '.join(f'{t:.2f}' for t in selected)}")
+        return selected
+    
+    def _iter_scenes(self, video_path, threshold, max_duration, progress_callback=None,
+                     thumbnail_size=None, thumbnail_format=None, cache_thumbnails=True,
+                     audio_weight=0.0, required_duration=None, lookahead=0.0, frame_observer=None):
+        """Run scene detection as a generator; see detect_scene_changes() and iter_scene_changes().
+        
+        frame_observer, if given, is called with (timestamp, mean difference,
+        gray analysis frame) for every analyzed frame.
+        
+        Yields:
+            tuple: (timestamp, thumbnail) where thumbnail is None without thumbnail_size
+        """
+        window = f"first {max_duration} seconds" if max_duration is not None else "whole video"
+        self.logger.info(f"Detecting scene changes with threshold {threshold} in {window}...")
+        
+        with self._job_scope(os.path.basename(video_path)) as job:
+            # Open the video file, with the job's share of decoder threads
+            with job.stage("probe"):
+                thread_plan = self._thread_plan()
+                cap = open_capture(video_path, thread_plan.threads if thread_plan is not None else None)
+                if not cap.isOpened():
+                    self.logger.error(f"Could not open video file: {video_path}")
+                    raise ValueError(f"Could not open video file: {video_path}")
+                    
+                # Get video properties
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            
+            # Calculate max frames to process based on max_duration
+            frames_to_process = total_frames
+            if max_duration is not None:
+                frames_to_process = min(int(max_duration * fps), total_frames)
+            
+            # A cut is only useful if enough video follows it; later frames need no analysis
+            lookahead_frames = int(round(lookahead * fps))
+            last_usable_frame = None
+            if required_duration is not None and total_frames > 0:
+                last_usable_frame = int((total_frames / fps - required_duration) * fps)
+                frames_to_process = max(0, min(frames_to_process, last_usable_frame + 1 + lookahead_frames))
+            
+            self.logger.info(f"Will process {frames_to_process} frames ({window} at {fps} fps)")
+            
+            # Size the analysis to the memory budget
+            plan = self.memory_budget.plan_detection(width, height)
+            analysis_size = None
+            if (plan.width, plan.height) != (width, height):
+                analysis_size = (plan.width, plan.height)
+            self.logger.info(f"Analyzing at {plan.width}x{plan.height} with {plan.prefetch} prefetched frames "
+                             f"(about {plan.estimated_bytes / 1024 ** 2:.0f} MB)")
+            if not plan.fits:
+                self.logger.warning(f"Decoding {width}x{height} frames needs more than the memory budget "
+                                    f"of {self.memory_budget.budget_bytes / 1024 ** 2:.0f} MB")
             
-            # Calculate the mean difference
-            mean_diff = np.mean(frame_diff)
+            # Initialize variables
+            prev_frame = None
+            last_change = None
+            changes_found = 0
+            candidate = None  # (timestamp, frame, gray before the cut, frames left to confirm)
+            frame_count = 0
+            frames_reported = 0
+            analysis_start = time.perf_counter()
+            convert_stage = job.stage("convert")
+            diff_stage = job.stage("diff")
+            audio_stage = job.stage("audio")
             
-            # If the difference is above the threshold, consider it a scene change
-            if mean_diff > threshold:
-                timestamp = frame_count / fps
-                scene_changes.append(timestamp)
-                self.logger.info(f"Scene change detected at {timestamp:.2f} seconds (diff: {mean_diff:.2f})")
+            # The audio curve is consumed in step with the frames, so memory stays flat
+            audio = None
+            if audio_weight > 0:
+                audio = AudioNoveltyCursor(iter_audio_novelty(video_path, max_duration))
+            
+            frames = self._read_frames(cap, frames_to_process, plan.prefetch, job)
+            try:
+                # Process each frame up to the maximum
+                for frame in frames:
+                    # Convert frame to grayscale, shrinking it first when the budget requires
+                    with convert_stage:
+                        small = frame
+                        if analysis_size:
+                            small = cv2.resize(frame, analysis_size, interpolation=cv2.INTER_AREA)
+                        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+                    
+                    # Skip the first frame
+                    if prev_frame is None:
+                        prev_frame = gray
+                        frame_count += 1
+                        continue
+                        
+                    with diff_stage:
+                        # Calculate absolute difference between current and previous frame
+                        frame_diff = cv2.absdiff(gray, prev_frame)
+                        
+                        # Calculate the mean difference
+                        mean_diff = np.mean(frame_diff)
+                    
+                    timestamp = frame_count / fps
+                    if frame_observer is not None:
+                        frame_observer(timestamp, mean_diff, gray)
+                    
+                    # Confirm or reject a pending candidate once its look-ahead has elapsed
+                    if candidate is not None:
+                        candidate[3] -= 1
+                        if candidate[3] <= 0:
+                            with diff_stage:
+                                reverted = np.mean(cv2.absdiff(gray, candidate[2])) <= threshold
+                            if reverted:
+                                self.logger.info(f"Rejected flash at {candidate[0]:.2f} seconds")
+                            else:
+                                changes_found += 1
+                                yield candidate[0], self._candidate_thumbnail(
+                                    video_path, candidate, thumbnail_size, thumbnail_format, cache_thumbnails)
+                            candidate = None
+                    
+                    # Fuse the audio novelty into the visual difference
+                    score = mean_diff
+                    if audio is not None:
+                        with audio_stage:
+                            novelty = audio.advance(timestamp)
+                        # The cursor reports one peak per audio boundary; keep it off a fresh visual cut
+                        if last_change is None or timestamp - last_change >= MIN_AUDIO_CUT_GAP:
+                            score += threshold * audio_weight * max(novelty, 0.0) / AUDIO_NOVELTY_THRESHOLD
+                    
+                    # Update variables for next iteration
+                    prev_gray = prev_frame
+                    prev_frame = gray
+                    frame_count += 1
+                    
+                    # Update progress if callback provided
+                    if progress_callback and frames_to_process > 0:
+                        progress = (frame_count / frames_to_process) * 100
+                        progress_callback(progress)
+                    
+                    # Log progress and publish frame metrics every 100 frames
+                    if frame_count % 100 == 0:
+                        metrics.FRAMES_ANALYZED.inc(frame_count - frames_reported)
+                        frames_reported = frame_count
+                        self.logger.info(f"Processed {frame_count}/{frames_to_process} frames ({frame_count/frames_to_process*100:.2f}%)")
+                    
+                    # If the difference is above the threshold, consider it a scene change
+                    usable = last_usable_frame is None or frame_count - 1 <= last_usable_frame
+                    if score > threshold and usable and candidate is None:
+                        last_change = timestamp
+                        self.logger.info(f"Scene change detected at {timestamp:.2f} seconds "
+                                         f"(diff: {mean_diff:.2f}, score: {score:.2f})")
+                        # Visual jumps are confirmed by the look-ahead; audio-driven cuts have no
+                        # visual change to revert, so they are accepted directly
+                        if lookahead_frames > 0 and mean_diff > threshold:
+                            candidate = [timestamp, frame, prev_gray, lookahead_frames]
+                            continue
+                        changes_found += 1
+                        yield timestamp, self._candidate_thumbnail(
+                            video_path, (timestamp, frame), thumbnail_size, thumbnail_format, cache_thumbnails)
                 
-            # Update variables for next iteration
-            prev_frame = gray
-            frame_count += 1
+                # A candidate still pending at the end could not be checked; keep it
+                if candidate is not None:
+                    changes_found += 1
+                    yield candidate[0], self._candidate_thumbnail(
+                        video_path, candidate, thumbnail_size, thumbnail_format, cache_thumbnails)
+            finally:
+                # Release the video capture and stop the audio pass, also when the caller stopped early
+                frames.close()
+                cap.release()
+                if audio is not None:
+                    audio.close()
+                job.count("frames_analyzed", frame_count)
+                metrics.FRAMES_ANALYZED.inc(frame_count - frames_reported)
+                analysis_time = time.perf_counter() - analysis_start
+                if analysis_time > 0:
+                    metrics.DETECTION_FPS.set(frame_count / analysis_time)
+                job.count("scene_changes", changes_found)
+                self.logger.info(f"Scene detection finished after {frame_count} frames. "
+                                 f"Found {changes_found} scene changes.")
+    
+    def _iter_scenes_chunked(self, video_path, threshold, max_duration, workers, progress_callback=None,
+                             audio_weight=0.0, lookahead=0.0, level_observer=None):
+        """Run scene detection on timeline chunks in worker processes.
+        
+        Each worker computes the frame differences, gray levels and flash
+        checks of one chunk (see analyze_chunk()). The signals are merged in
+        timeline order and the cut decisions of _iter_scenes() are replayed on
+        them in this process, so the result is the same as a sequential pass
+        whenever the video seeks frame-accurately. Videos too short to split
+        are analyzed sequentially.
+        
+        level_observer, if given, is called with (timestamp, mean difference,
+        mean gray level) for every analyzed frame.
+        
+        Yields:
+            float: Scene change timestamps in timeline order
+        """
+        with self._job_scope(os.path.basename(video_path)) as job:
+            with job.stage("probe"):
+                cap = cv2.VideoCapture(video_path)
+                if not cap.isOpened():
+                    self.logger.error(f"Could not open video file: {video_path}")
+                    raise ValueError(f"Could not open video file: {video_path}")
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                cap.release()
             
-            # Update progress if callback provided
-            if progress_callback and frames_to_process > 0:
-                progress = (frame_count / frames_to_process) * 100
-                progress_callback(progress)
+            frames_to_process = total_frames
+            if max_duration is not None:
+                frames_to_process = min(int(max_duration * fps), total_frames)
+            lookahead_frames = int(round(lookahead * fps))
+            
+            # Every worker decodes at the analysis size, so the memory budget caps the worker count;
+            # so does the job's share of the CPU (the whole machine without a CPU budget)
+            thread_plan = self._thread_plan()
+            cpus = thread_plan.threads if thread_plan is not None else (os.cpu_count() or 1)
+            workers = min(self.memory_budget.max_workers(workers), cpus)
+            chunk_count = min(workers, int(frames_to_process / (MIN_CHUNK_SECONDS * fps)))
+            if chunk_count < 2:
+                self.logger.info("Video too short to split; analyzing sequentially")
+                for timestamp, _ in self._iter_scenes(video_path, threshold, max_duration, progress_callback,
+                                                      audio_weight=audio_weight, lookahead=lookahead,
+                                                      frame_observer=self._level_observer(level_observer)):
+                    yield timestamp
+                return
             
-            # Log progress every 100 frames
-            if frame_count % 100 == 0:
-                self.logger.info(f"Processed {frame_count}/{frames_to_process} frames ({frame_count/frames_to_process*100:.2f}%)")
+            plan = self.memory_budget.plan_detection(width, height)
+            analysis_size = None
+            if (plan.width, plan.height) != (width, height):
+                analysis_size = (plan.width, plan.height)
+            # Start chunks at keyframes when the index is available
+            keyframes = None
+            index = self.get_keyframe_index(video_path)
+            if index is not None:
+                keyframes = sorted(set(int(round(t * fps)) for t in index.keyframe_times.tolist()))
+            chunks = plan_chunks(frames_to_process, chunk_count, keyframes)
+            self.logger.info(f"Analyzing {frames_to_process} frames in {len(chunks)} chunks "
+                             f"at {plan.width}x{plan.height}")
+            
+            # Compute the per-frame signals of all chunks in parallel
+            analysis_start = time.perf_counter()
+            results = []
+            frames_done = 0
+            worker_threads = None
+            if thread_plan is not None:
+                worker_threads = max(1, thread_plan.threads // len(chunks))
+            # Spawn fresh workers: forking this multithreaded process (GUI, batch workers,
+            # monitors) could leave inherited locks held in the children
+            with ProcessPoolExecutor(max_workers=min(len(chunks), workers),
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = [
+                    executor.submit(analyze_chunk, video_path, start, end,
+                                    min(end + lookahead_frames, frames_to_process),
+                                    analysis_size, threshold, lookahead_frames, worker_threads)
+                    for start, end in chunks
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    for stage, seconds in result['timings'].items():
+                        job.add_time(stage, seconds)
+                    frames_done += len(result['diffs'])
+                    if progress_callback:
+                        progress_callback(frames_done / frames_to_process * 100)
+            
+            # Merge in timeline order, stopping where a chunk could not read all of its frames
+            diffs = []
+            levels = []
+            reverts = {}
+            for (start, end), result in zip(chunks, sorted(results, key=lambda r: r['start'])):
+                diffs.append(result['diffs'])
+                levels.append(result['levels'])
+                reverts.update(result['reverts'])
+                if len(result['diffs']) < end - start:
+                    self.logger.warning(f"Could not read frame {start + len(result['diffs'])}; "
+                                        f"analysis ends there")
+                    break
+            diffs = np.concatenate(diffs)
+            levels = np.concatenate(levels)
+            frame_count = len(diffs) + 1
+            
+            # Replay the cut decisions of the sequential pass on the merged signals
+            changes_found = 0
+            last_change = None
+            candidate = None  # [timestamp, frame index, frames left to confirm]
+            audio = None
+            if audio_weight > 0:
+                audio = AudioNoveltyCursor(iter_audio_novelty(video_path, max_duration))
+            try:
+                for index in range(1, frame_count):
+                    mean_diff = diffs[index - 1]
+                    timestamp = index / fps
+                    if level_observer is not None:
+                        level_observer(timestamp, mean_diff, levels[index - 1])
+                    
+                    if candidate is not None:
+                        candidate[2] -= 1
+                        if candidate[2] <= 0:
+                            if reverts.get(candidate[1], threshold + 1) <= threshold:
+                                self.logger.info(f"Rejected flash at {candidate[0]:.2f} seconds")
+                            else:
+                                changes_found += 1
+                                yield candidate[0]
+                            candidate = None
+                    
+                    score = mean_diff
+                    if audio is not None:
+                        novelty = audio.advance(timestamp)
+                        if last_change is None or timestamp - last_change >= MIN_AUDIO_CUT_GAP:
+                            score += threshold * audio_weight * max(novelty, 0.0) / AUDIO_NOVELTY_THRESHOLD
+                    
+                    if score > threshold and candidate is None:
+                        last_change = timestamp
+                        self.logger.info(f"Scene change detected at {timestamp:.2f} seconds "
+                                         f"(diff: {mean_diff:.2f}, score: {score:.2f})")
+                        if lookahead_frames > 0 and mean_diff > threshold:
+                            candidate = [timestamp, index, lookahead_frames]
+                            continue
+                        changes_found += 1
+                        yield timestamp
                 
-        # Release the video capture
-        cap.release()
+                if candidate is not None:
+                    changes_found += 1
+                    yield candidate[0]
+            finally:
+                if audio is not None:
+                    audio.close()
+                job.count("frames_analyzed", frame_count)
+                metrics.FRAMES_ANALYZED.inc(frame_count)
+                analysis_time = time.perf_counter() - analysis_start
+                if analysis_time > 0:
+                    metrics.DETECTION_FPS.set(frame_count / analysis_time)
+                job.count("scene_changes", changes_found)
+                self.logger.info(f"Chunked scene detection finished after {frame_count} frames. "
+                                 f"Found {changes_found} scene changes.")
+    
+    @staticmethod
+    def _level_observer(level_observer):
+        """Adapt a (timestamp, diff, level) observer to the frame_observer of _iter_scenes()."""
+        if level_observer is None:
+            return None
+        return lambda timestamp, mean_diff, gray: level_observer(timestamp, mean_diff, float(gray.mean()))
+    
+    def _read_frames(self, cap, max_frames, prefetch, job):
+        """Yield up to max_frames decoded frames, reading ahead on a thread if prefetch > 0.
         
-        self.logger.info(f"Scene detection complete. Found {len(scene_changes)} scene changes in first {max_duration} seconds.")
-        return scene_changes
+        The read-ahead queue holds at most prefetch frames, so memory stays
+        within the plan while decoding overlaps with the analysis.
+        """
+        if prefetch <= 0:
+            decode_stage = job.stage("decode")
+            for _ in range(max_frames):
+                with decode_stage:
+                    ret, frame = cap.read()
+                if not ret:
+                    return
+                yield frame
+            return
+        
+        frames = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        
+        def decode():
+            decode_stage = job.stage("decode")
+            try:
+                for _ in range(max_frames):
+                    if stop.is_set():
+                        return
+                    with decode_stage:
+                        ret, frame = cap.read()
+                    if not ret:
+                        return
+                    while not stop.is_set():
+                        try:
+                            frames.put(frame, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+            finally:
+                frames.put(None)
+        
+        reader = threading.Thread(target=decode, daemon=True)
+        reader.start()
+        try:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            stop.set()
+            # Unblock the reader if it is waiting for room for its final sentinel
+            while reader.is_alive():
+                try:
+                    frames.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        
+    def _candidate_thumbnail(self, video_path, candidate, size, image_format, cache):
+        """Thumbnail for a confirmed cut given as (timestamp, frame, ...), or None without size."""
+        if not size:
+            return None
+        return self._scene_thumbnail(video_path, candidate[1], candidate[0], size, image_format, cache)
+    
+    def _scene_thumbnail(self, video_path, frame, timestamp, size, image_format, cache):
+        """Make a scene thumbnail from a frame decoded during detection.
+        
+        Returns:
+            tuple: (timestamp, PIL image or encoded bytes)
+        """
+        with self._stage("thumbnail"):
+            image = frame_to_thumbnail(frame, size)
+            if cache:
+                try:
+                    self.thumbnail_cache.put(video_path, timestamp, image, size)
+                except Exception as e:
+                    self.logger.warning(f"Could not cache scene thumbnail: {e}")
+            if image_format:
+                return timestamp, encode_thumbnail(image, image_format)
+            return timestamp, image
         
     def extract_sequences(self, video_path, output_folder, scene_changes, 
                          sequence_length=10, 
                          num_sequences=3,
                          output_format="prores",
                          quality="medium",
-                         progress_callback=None):
+                         progress_callback=None,
+                         mode="consecutive",
+                         speed_tier=DEFAULT_SPEED_TIER,
+                         prores_encoder="auto",
+                         renditions=None,
+                         encode_chunks=1):
         """Extract sequences from the video starting at scene changes.
         
+        In 'consecutive' mode, num_sequences back-to-back sequences start at the
+        first usable scene change. In 'selected' mode, one sequence starts at
+        each given timestamp (e.g. from select_scenes()).
+        
+        With renditions, every sequence is written once per rendition (e.g. a
+        ProRes master, an H.264 proxy and a small preview) by a single FFmpeg
+        process that decodes the sequence once and splits the frames to all
+        encoders. output_format and quality are then ignored.
+        
+        With encode_chunks > 1, each long sequence is split into up to that
+        many GOP-aligned chunks that are encoded concurrently and joined
+        without re-encoding (see _extract_chunked_sequence()).
+        
         Args:
             video_path: Path to the input video
             output_folder: Folder to save the extracted sequences
-            scene_changes: List of timestamps where scene changes occur
+            scene_changes: Timestamps where scene changes occur, as a list or as an
+                           iterator such as iter_scene_changes(). An iterator is only
+                           consumed up to the first usable scene change and then closed,
+                           so detection stops as soon as encoding can start.
             sequence_length: Length of each sequence in seconds
             num_sequences: Number of consecutive sequences to extract
             output_format: Output format ('prores' for ProRes 422, 'h264' for MP4)
             quality: Quality setting ('low', 'medium', 'high')
             progress_callback: Optional callback function for progress updates
+            mode: 'consecutive' or 'selected'
+            speed_tier: H.264/H.265 encode speed tier ('draft', 'standard', 'archival')
+            prores_encoder: 'auto' or a ProRes encoder from PRORES_ENCODERS
+            renditions: Optional list of rendition dicts with 'name', 'format', 'quality'
+                        and 'height' (see DELIVERY_RENDITIONS)
+            encode_chunks: Maximum number of chunks encoded in parallel per sequence
+                           (1 = one encode per sequence; not used with renditions)
             
         Returns:
-            List of paths to the extracted sequences
+            List of paths to the extracted sequences (all renditions of a sequence together)
         """
+        with self._job_scope(os.path.basename(video_path)):
+            return self._extract_sequences(video_path, output_folder, scene_changes,
+                                           sequence_length, num_sequences, output_format,
+                                           quality, progress_callback, mode, speed_tier,
+                                           prores_encoder, renditions, encode_chunks)
+    
+    def _extract_sequences(self, video_path, output_folder, scene_changes, sequence_length,
+                           num_sequences, output_format, quality, progress_callback,
+                           mode="consecutive", speed_tier=DEFAULT_SPEED_TIER, prores_encoder="auto",
+                           renditions=None, encode_chunks=1):
+        """Extract sequences inside the current job; see extract_sequences()."""
         # Check if FFmpeg is available with required codecs
-        ffmpeg_available, error_message, codec_support = self.check_ffmpeg_available()
+        with self._stage("probe"):
+            ffmpeg_available, error_message, codec_support = self.check_ffmpeg_available()
         if not ffmpeg_available:
             self.logger.error(f"FFmpeg error: {error_message}")
             raise RuntimeError(f"FFmpeg error: {error_message}")
         
         # If the requested format isn't supported, fall back to an alternative
-        if output_format not in codec_support or not codec_support[output_format]:
+        if not renditions and not codec_support.get(output_format):
             original_format = output_format
             # Try to find a supported format to fall back to
             for format_name, is_supported in codec_support.items():
@@ -208,101 +979,96 @@ class VideoProcessor:
         os.makedirs(output_folder, exist_ok=True)
         
         # Open the video to get properties
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            self.logger.error(f"Could not open video file: {video_path}")
-            raise ValueError(f"Could not open video file: {video_path}")
-        
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        video_duration = total_frames / fps
-        cap.release()  # Release the capture as we'll use FFmpeg for extraction
-        
-        # Filter scene changes
-        valid_scene_changes = [sc for sc in scene_changes 
-                              if sc + (sequence_length * num_sequences) <= video_duration]
-        
-        if not valid_scene_changes:
-            self.logger.warning("No valid scene changes found for sequence extraction")
-            if scene_changes:
-                self.logger.info("Using the first scene change and adjusting sequence length")
-                first_change = scene_changes[0]
-                max_sequences = int((video_duration - first_change) / sequence_length)
-                if max_sequences > 0:
-                    valid_scene_changes = [first_change]
-                    num_sequences = min(num_sequences, max_sequences)
-                else:
-                    self.logger.warning("Not enough video duration after first scene change")
-                    valid_scene_changes = [0.0]  # Start from beginning
-            else:
-                self.logger.warning("No scene changes detected. Using the beginning of the video.")
-                valid_scene_changes = [0.0]  # Start from the beginning if no scene changes detected
+        with self._stage("probe"):
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                self.logger.error(f"Could not open video file: {video_path}")
+                raise ValueError(f"Could not open video file: {video_path}")
+            
+            # Get video properties
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            video_duration = total_frames / fps
+            cap.release()  # Release the capture as we'll use FFmpeg for extraction
         
-        # Select the first scene change
-        start_time = valid_scene_changes[0]
+        # Plan the start time of every sequence
+        if mode == "selected":
+            sequence_starts = self._selected_starts(scene_changes, sequence_length, num_sequences,
+                                                    video_duration)
+        else:
+            sequence_starts = self._consecutive_starts(scene_changes, sequence_length, num_sequences,
+                                                       video_duration)
+        num_sequences = len(sequence_starts)
         
         # Set up output parameters based on format
-        if output_format == 'prores':
-            extension = '.mov'
-            # Quality settings for ProRes 422
-            profiles = {
-                "low": "0",      # ProRes 422 Proxy
-                "medium": "2",   # ProRes 422 LT
-                "high": "3"      # ProRes 422 HQ
-            }
-            profile = profiles.get(quality.lower(), "2")  # Default to ProRes 422 LT
-        elif output_format in ('h264', 'mp4'):
-            extension = '.mp4'
-            # CRF values for H.264 (lower = higher quality)
-            profiles = {
-                "low": "28",     # Lower quality
-                "medium": "23",  # Medium quality
-                "high": "18"     # High quality
-            }
-            profile = profiles.get(quality.lower(), "23")  # Default to medium
-        elif output_format == 'h265':
-            extension = '.mp4'
-            # CRF values for H.265 (lower = higher quality)
-            profiles = {
-                "low": "28",     # Lower quality
-                "medium": "23",  # Medium quality
-                "high": "18"     # High quality
-            }
-            profile = profiles.get(quality.lower(), "23")  # Default to medium
+        if renditions:
+            plan = self._plan_renditions(renditions, codec_support, prores_encoder)
+            output_label = "+".join(rendition['format'] for rendition in plan)
         else:
-            # Fallback to H.264
-            self.logger.warning(f"Unknown format '{output_format}'. Falling back to H.264")
-            output_format = 'h264'
-            extension = '.mp4'
-            profile = "23"  # Medium quality
+            output_format, extension, profile = self._output_settings(output_format, quality)
+            if output_format == 'prores':
+                encoder = self.select_prores_encoder(profile, prores_encoder)
+                self.logger.info(f"Encoding ProRes profile {profile} with {encoder}")
+            output_label = output_format
         
         # Get base filename without extension
         base_filename = os.path.splitext(os.path.basename(video_path))[0]
         
         output_paths = []
         
-        for i in range(num_sequences):
-            sequence_start = start_time + (i * sequence_length)
+        for i, sequence_start in enumerate(sequence_starts):
             sequence_end = sequence_start + sequence_length
             
             if sequence_end > video_duration:
                 self.logger.warning(f"Sequence {i+1} would exceed video duration. Skipping.")
                 continue
             
-            # Define output path with input filename as base
-            output_filename = f"{base_filename}_seq_{i+1}{extension}"
-            output_path = os.path.join(output_folder, output_filename)
+            # Define output paths with input filename as base, one per rendition
+            if renditions:
+                sequence_paths = [
+                    os.path.join(output_folder, f"{base_filename}_seq_{i+1}_{rendition['name']}{rendition['extension']}")
+                    for rendition in plan
+                ]
+            else:
+                output_path = os.path.join(output_folder, f"{base_filename}_seq_{i+1}{extension}")
+                sequence_paths = [output_path]
             
             # Extract the sequence using FFmpeg with appropriate codec
-            if output_format == 'prores':
+            encode_start = time.perf_counter()
+            chunks = min(encode_chunks, int(sequence_length / MIN_ENCODE_CHUNK_SECONDS))
+            if renditions:
+                # All renditions are encoded from a single decode
+                success = self._extract_renditions(
+                    video_path,
+                    sequence_paths,
+                    plan,
+                    sequence_start,
+                    sequence_length,
+                    progress_callback,
+                    speed_tier
+                )
+            elif chunks > 1:
+                success = self._extract_chunked_sequence(
+                    video_path,
+                    output_path,
+                    sequence_start,
+                    sequence_length,
+                    output_format,
+                    profile,
+                    chunks,
+                    progress_callback,
+                    speed_tier,
+                    encoder if output_format == 'prores' else None
+                )
+            elif output_format == 'prores':
                 success = self._extract_prores_sequence(
                     video_path, 
                     output_path, 
                     sequence_start, 
                     sequence_length, 
                     profile,
-                    progress_callback
+                    progress_callback,
+                    encoder
                 )
             else:  # h264 or h265
                 success = self._extract_h26x_sequence(
@@ -312,12 +1078,21 @@ class VideoProcessor:
                     sequence_length,
                     output_format,  # 'h264' or 'h265'
                     profile,
-                    progress_callback
+                    progress_callback,
+                    speed_tier
                 )
             
             if success:
-                output_paths.append(output_path)
-                self.logger.info(f"Saved sequence {i+1} ({sequence_start:.2f}s - {sequence_end:.2f}s) to {output_path}")
+                output_paths.extend(sequence_paths)
+                output_size = sum(os.path.getsize(path) for path in sequence_paths)
+                self._count("sequences_encoded")
+                self._count("encoded_seconds", sequence_length)
+                self._count("bytes_written", output_size)
+                metrics.BYTES_WRITTEN.inc(output_size)
+                metrics.ENCODE_REALTIME.observe(sequence_length / max(time.perf_counter() - encode_start, 1e-6),
+                                                format=output_label)
+                self.logger.info(f"Saved sequence {i+1} ({sequence_start:.2f}s - {sequence_end:.2f}s) to "
+                                 f"{', '.join(sequence_paths)}")
             else:
                 self.logger.error(f"Failed to save sequence {i+1}")
             
@@ -329,7 +1104,106 @@ class VideoProcessor:
         self.logger.info(f"Successfully extracted {len(output_paths)} sequences")
         return output_paths
     
-    def _extract_prores_sequence(self, input_path, output_path, start_time, duration, profile="2", progress_callback=None):
+    def _output_settings(self, output_format, quality):
+        """Map an output format and quality setting to encoder settings.
+        
+        Args:
+            output_format: Output format (prores, h264, h265)
+            quality: Quality setting (low, medium, high)
+            
+        Returns:
+            tuple: (output_format, extension, profile). Unknown formats fall back to H.264;
+                   profile is a ProRes profile number or a CRF value.
+        """
+        if output_format == 'prores':
+            extension = '.mov'
+            # Quality settings for ProRes 422
+            profiles = {
+                "low": PRORES_PROFILES['proxy'],
+                "medium": PRORES_PROFILES['standard'],
+                "high": PRORES_PROFILES['hq']
+            }
+            profile = profiles.get(quality.lower(), PRORES_PROFILES['standard'])
+        elif output_format in ('h264', 'mp4'):
+            extension = '.mp4'
+            # CRF values for H.264 (lower = higher quality)
+            profiles = {
+                "low": "28",     # Lower quality
+                "medium": "23",  # Medium quality
+                "high": "18"     # High quality
+            }
+            profile = profiles.get(quality.lower(), "23")  # Default to medium
+        elif output_format == 'h265':
+            extension = '.mp4'
+            # CRF values for H.265 (lower = higher quality)
+            profiles = {
+                "low": "28",     # Lower quality
+                "medium": "23",  # Medium quality
+                "high": "18"     # High quality
+            }
+            profile = profiles.get(quality.lower(), "23")  # Default to medium
+        else:
+            # Fallback to H.264
+            self.logger.warning(f"Unknown format '{output_format}'. Falling back to H.264")
+            output_format = 'h264'
+            extension = '.mp4'
+            profile = "23"  # Medium quality
+        
+        return output_format, extension, profile
+    
+    def _consecutive_starts(self, scene_changes, sequence_length, num_sequences, video_duration):
+        """Start times of back-to-back sequences from the first usable scene change.
+        
+        Returns:
+            list: Sequence start times in seconds
+        """
+        # Take the first scene change that leaves room for all sequences
+        valid_scene_changes = []
+        seen_changes = []
+        for sc in scene_changes:
+            seen_changes.append(sc)
+            if sc + (sequence_length * num_sequences) <= video_duration:
+                valid_scene_changes.append(sc)
+                break
+        close = getattr(scene_changes, 'close', None)
+        if close is not None:
+            close()
+        scene_changes = seen_changes
+        
+        if not valid_scene_changes:
+            self.logger.warning("No valid scene changes found for sequence extraction")
+            if scene_changes:
+                self.logger.info("Using the first scene change and adjusting sequence length")
+                first_change = scene_changes[0]
+                max_sequences = int((video_duration - first_change) / sequence_length)
+                if max_sequences > 0:
+                    valid_scene_changes = [first_change]
+                    num_sequences = min(num_sequences, max_sequences)
+                else:
+                    self.logger.warning("Not enough video duration after first scene change")
+                    valid_scene_changes = [0.0]  # Start from beginning
+            else:
+                self.logger.warning("No scene changes detected. Using the beginning of the video.")
+                valid_scene_changes = [0.0]  # Start from the beginning if no scene changes detected
+        
+        # Select the first scene change
+        start_time = valid_scene_changes[0]
+        return [start_time + (i * sequence_length) for i in range(num_sequences)]
+    
+    def _selected_starts(self, scene_changes, sequence_length, num_sequences, video_duration):
+        """Start times of one sequence per selected timestamp that fits in the video.
+        
+        Returns:
+            list: Sequence start times in seconds
+        """
+        starts = sorted(sc for sc in scene_changes if sc + sequence_length <= video_duration)
+        if not starts:
+            self.logger.warning("No selected start fits in the video. Using the beginning of the video.")
+            starts = [0.0]
+        return starts[:num_sequences]
+    
+    def _extract_prores_sequence(self, input_path, output_path, start_time, duration, profile="2",
+                                 progress_callback=None, encoder="prores_ks"):
         """Extract a sequence using FFmpeg with ProRes 422 codec and copy audio.
         
         Args:
@@ -339,6 +1213,7 @@ class VideoProcessor:
             duration: Duration in seconds
             profile: ProRes profile (0=Proxy, 1=LT, 2=Standard, 3=HQ)
             progress_callback: Optional callback function for progress updates
+            encoder: FFmpeg ProRes encoder from PRORES_ENCODERS
             
         Returns:
             bool: True if successful, False otherwise
@@ -353,10 +1228,11 @@ class VideoProcessor:
             progress_file_path = progress_file.name
             
             # Get video dimensions
-            cap = cv2.VideoCapture(input_path)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            cap.release()
+            with self._stage("probe"):
+                cap = cv2.VideoCapture(input_path)
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                cap.release()
             
             # Check if we need to scale down to HD (1920x1080)
             scale_filter = ""
@@ -378,26 +1254,32 @@ class VideoProcessor:
                 cmd.extend(scale_filter.split())
                 
             # Add codec options
+            cmd.extend(self._prores_codec_params(encoder, profile))
+            cmd.extend(self._ffmpeg_thread_args())
             cmd.extend([
-                "-c:v", "prores_ks",
-                "-profile:v", profile,
-                "-vendor", "ap10",
-                "-pix_fmt", "yuv422p10le",
                 "-c:a", "copy",  # Copy audio stream
                 "-progress", progress_file_path,  # Write progress to file
                 output_path
             ])
             
-            # Run FFmpeg
+            # Run FFmpeg; the encode stage spans the whole FFmpeg process lifetime
             self.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            
-            # Monitor progress with improved method
-            success = self._monitor_ffmpeg_progress(
-                process, 
-                progress_file_path, 
-                progress_callback
-            )
+            with self._stage("encode"):
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                self._lower_priority(process)
+                self._count("ffmpeg_processes")
+                metrics.FFMPEG_SPAWNS.inc()
+                metrics.FFMPEG_PROCESSES.inc()
+                
+                # Monitor progress with improved method
+                try:
+                    success = self._monitor_ffmpeg_progress(
+                        process, 
+                        progress_file_path, 
+                        progress_callback
+                    )
+                finally:
+                    metrics.FFMPEG_PROCESSES.dec()
             
             return success
         except Exception as e:
@@ -405,7 +1287,8 @@ class VideoProcessor:
             return False
             
     def _extract_h26x_sequence(self, input_path, output_path, start_time, duration, 
-                             codec='h264', quality="23", progress_callback=None):
+                             codec='h264', quality="23", progress_callback=None,
+                             speed_tier=DEFAULT_SPEED_TIER):
         """Extract a sequence using FFmpeg with H.264/H.265 codec.
         
         Args:
@@ -416,6 +1299,7 @@ class VideoProcessor:
             codec: Video codec ('h264' or 'h265')
             quality: CRF value (lower = higher quality)
             progress_callback: Optional callback function for progress updates
+            speed_tier: Encode speed tier from H26X_SPEED_TIERS
             
         Returns:
             bool: True if successful, False otherwise
@@ -427,10 +1311,11 @@ class VideoProcessor:
             progress_file_path = progress_file.name
             
             # Get video dimensions
-            cap = cv2.VideoCapture(input_path)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            cap.release()
+            with self._stage("probe"):
+                cap = cv2.VideoCapture(input_path)
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                cap.release()
             
             # Check if we need to scale down to HD (1920x1080)
             scale_filter = ""
@@ -451,21 +1336,8 @@ class VideoProcessor:
                 cmd.extend(scale_filter.split())
                 
             # Select the right codec
-            if codec == 'h265':
-                codec_params = [
-                    "-c:v", "libx265",
-                    "-crf", quality,
-                    "-preset", "medium",
-                ]
-            else:  # Default to h264
-                codec_params = [
-                    "-c:v", "libx264",
-                    "-crf", quality,
-                    "-preset", "medium",
-                    "-pix_fmt", "yuv420p",
-                ]
-                
-            cmd.extend(codec_params)
+            cmd.extend(self._h26x_codec_params(codec, quality, speed_tier))
+            cmd.extend(self._ffmpeg_thread_args())
             
             # Add audio and progress tracking
             cmd.extend([
@@ -475,29 +1347,539 @@ class VideoProcessor:
                 output_path
             ])
             
-            # Run FFmpeg
+            # Run FFmpeg; the encode stage spans the whole FFmpeg process lifetime
             self.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            
-            # Monitor progress with improved method
-            success = self._monitor_ffmpeg_progress(
-                process, 
-                progress_file_path, 
-                progress_callback
-            )
+            with self._stage("encode"):
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                self._lower_priority(process)
+                self._count("ffmpeg_processes")
+                metrics.FFMPEG_SPAWNS.inc()
+                metrics.FFMPEG_PROCESSES.inc()
+                
+                # Monitor progress with improved method
+                try:
+                    success = self._monitor_ffmpeg_progress(
+                        process, 
+                        progress_file_path, 
+                        progress_callback
+                    )
+                finally:
+                    metrics.FFMPEG_PROCESSES.dec()
             
             return success
         except Exception as e:
             self.logger.error(f"Error extracting sequence: {str(e)}")
             return False
             
-    def _monitor_ffmpeg_progress(self, process, progress_file, progress_callback):
+    def _h26x_codec_params(self, codec, quality, speed_tier):
+        """Build the libx264/libx265 arguments for a CRF and speed tier.
+        
+        Args:
+            codec: Video codec ('h264' or 'h265')
+            quality: CRF value
+            speed_tier: Tier name from H26X_SPEED_TIERS
+            
+        Returns:
+            list: FFmpeg arguments
+        """
+        tier = H26X_SPEED_TIERS.get(speed_tier)
+        if tier is None:
+            self.logger.warning(f"Unknown speed tier '{speed_tier}'. Using '{DEFAULT_SPEED_TIER}'")
+            tier = H26X_SPEED_TIERS[DEFAULT_SPEED_TIER]
+        
+        if codec == 'h265':
+            params = ["-c:v", "libx265", "-crf", quality, "-preset", tier['preset']]
+            x265_params = []
+            if tier['lookahead'] is not None:
+                x265_params.append(f"rc-lookahead={tier['lookahead']}")
+            if x265_params:
+                params.extend(["-x265-params", ":".join(x265_params)])
+            return params
+        
+        # Default to h264
+        params = ["-c:v", "libx264", "-crf", quality, "-preset", tier['preset']]
+        if tier['tune']:
+            params.extend(["-tune", tier['tune']])
+        if tier['lookahead'] is not None:
+            params.extend(["-rc-lookahead", str(tier['lookahead'])])
+        if tier['sliced_threads']:
+            params.extend(["-x264-params", "sliced-threads=1"])
+        params.extend(["-pix_fmt", "yuv420p"])
+        return params
+        
+    def _extract_chunked_sequence(self, input_path, output_path, start_time, duration, output_format,
+                                  profile, chunks, progress_callback=None,
+                                  speed_tier=DEFAULT_SPEED_TIER, encoder=None):
+        """Encode one sequence as chunks in parallel and join them losslessly.
+        
+        The sequence is split into frame ranges whose boundaries are moved
+        onto nearby source keyframes (from the keyframe index), so every
+        chunk seeks straight to a GOP start. Each chunk is encoded without
+        audio by its own FFmpeg process with a share of the CPU threads. The
+        video chunks are then joined with the concat demuxer by stream copy,
+        and the audio of the whole sequence is added in the same step.
+        
+        The joined file must have exactly the frame count of a single encode,
+        and the frames around every chunk boundary must be the source frames
+        at those positions (see _verify_chunk_boundaries()). If the check
+        fails, the sequence is encoded again in one piece.
+        
+        Args:
+            input_path: Path to the input video
+            output_path: Path to save the output video
+            start_time: Start time in seconds
+            duration: Duration in seconds
+            output_format: 'prores', 'h264' or 'h265'
+            profile: ProRes profile number or CRF value
+            chunks: Number of chunks
+            progress_callback: Optional callback function for progress updates
+            speed_tier: Encode speed tier for H.264/H.265
+            encoder: ProRes encoder name (ProRes only)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        with self._stage("probe"):
+            cap = cv2.VideoCapture(input_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+        
+        # Frames of a single encode: source frames with start <= pts < start + duration
+        first_frame = math.ceil(start_time * fps - 1e-6)
+        total_frames = math.ceil((start_time + duration) * fps - 1e-6) - first_frame
+        bounds = [total_frames * i // chunks for i in range(chunks + 1)]
+        
+        # Move chunk starts onto source keyframes where one is close
+        index = self.get_keyframe_index(input_path)
+        if index is not None:
+            tolerance = total_frames / chunks / 4
+            for i in range(1, chunks):
+                keyframe = index.keyframe_at_or_before((first_frame + bounds[i]) / fps)
+                if keyframe is None:
+                    continue
+                frame = int(round(keyframe * fps)) - first_frame
+                if bounds[i - 1] < frame < bounds[i + 1] and bounds[i] - frame <= tolerance:
+                    bounds[i] = frame
+        
+        scale_args = []
+        if width > 1920 or height > 1080:
+            scale_args = ["-vf", "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2"]
+        if output_format == 'prores':
+            codec_args = self._prores_codec_params(encoder or 'prores_ks', profile)
+            audio_args = ["-c:a", "copy"]
+        else:
+            codec_args = self._h26x_codec_params(output_format, profile, speed_tier)
+            audio_args = ["-c:a", "aac", "-b:a", "128k"]
+        # Chunks split the job's share of the CPU (the whole machine without a CPU budget).
+        # The job and its budget are thread-local, so they are read here and handed to the pool threads.
+        thread_args = (self._ffmpeg_thread_args(share=chunks)
+                       or ["-threads", str(max(1, (os.cpu_count() or chunks) // chunks))])
+        cpu_budget = getattr(self._local, 'cpu_budget', None)
+        job = self.current_job
+        
+        extension = os.path.splitext(output_path)[1]
+        chunk_dir = tempfile.mkdtemp(prefix="videoslicer_chunks_", dir=os.path.dirname(output_path) or None)
+        try:
+            chunk_paths = [os.path.join(chunk_dir, f"chunk_{i:03d}{extension}") for i in range(chunks)]
+            
+            def encode_chunk(i, cpu_budget, job):
+                # Seek half a frame early so the chunk's first frame is never dropped by rounding
+                seek = max(0.0, (first_frame + bounds[i] - 0.5) / fps) if i > 0 else start_time
+                cmd = ["ffmpeg", "-v", "error", "-y", "-ss", str(seek), "-i", input_path,
+                       "-frames:v", str(bounds[i + 1] - bounds[i]), "-an"]
+                cmd.extend(scale_args)
+                cmd.extend(codec_args)
+                cmd.extend(thread_args)
+                cmd.append(chunk_paths[i])
+                if job is not None:
+                    job.count("ffmpeg_processes")
+                metrics.FFMPEG_SPAWNS.inc()
+                metrics.FFMPEG_PROCESSES.inc()
+                try:
+                    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                    if cpu_budget is not None:
+                        cpu_budget.apply_priority(process.pid)
+                    stdout, stderr = process.communicate()
+                    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+                finally:
+                    metrics.FFMPEG_PROCESSES.dec()
+            
+            self.logger.info(f"Encoding {total_frames} frames in {chunks} chunks "
+                             f"(frames {', '.join(str(b) for b in bounds[:-1])})")
+            with self._stage("encode"):
+                with ThreadPoolExecutor(max_workers=chunks) as executor:
+                    futures = [executor.submit(encode_chunk, i, cpu_budget, job) for i in range(chunks)]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        if progress_callback:
+                            progress_callback(done / chunks * 90)
+                    failed = [future.result().stderr.strip() for future in futures if future.result().returncode != 0]
+            if failed:
+                self.logger.error(f"Chunk encode failed: {failed[0]}")
+                return False
+            
+            # Join the chunks by stream copy and add the audio of the whole sequence
+            list_path = os.path.join(chunk_dir, "chunks.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for path in chunk_paths:
+                    escaped = path.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            cmd = ["ffmpeg", "-v", "error", "-y",
+                   "-f", "concat", "-safe", "0", "-i", list_path,
+                   "-ss", str(start_time), "-t", str(duration), "-i", input_path,
+                   "-map", "0:v", "-map", "1:a?", "-c:v", "copy"]
+            cmd.extend(audio_args)
+            cmd.append(output_path)
+            with self._stage("mux"):
+                self._count("ffmpeg_processes")
+                metrics.FFMPEG_SPAWNS.inc()
+                metrics.FFMPEG_PROCESSES.inc()
+                try:
+                    process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                finally:
+                    metrics.FFMPEG_PROCESSES.dec()
+            if process.returncode != 0:
+                self.logger.error(f"Joining chunks failed: {process.stderr.strip()}")
+                return False
+            
+            verified = self._verify_chunk_boundaries(input_path, output_path, first_frame, bounds, fps,
+                                                     scale_args + codec_args, output_format == 'prores',
+                                                     chunk_dir)
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+        
+        if not verified:
+            self.logger.warning(f"Chunked encode of {os.path.basename(output_path)} failed verification; "
+                                f"encoding it in one piece")
+            if output_format == 'prores':
+                return self._extract_prores_sequence(input_path, output_path, start_time, duration, profile,
+                                                     progress_callback, encoder or 'prores_ks')
+            return self._extract_h26x_sequence(input_path, output_path, start_time, duration, output_format,
+                                               profile, progress_callback, speed_tier)
+        
+        if progress_callback:
+            progress_callback(100)
+        return True
+    
+    def frame_hashes(self, video_path, seek=None, frames=None, decode=True):
+        """Hash the frames of a video with FFmpeg's framemd5 muxer.
+        
+        Args:
+            video_path: Path to the video file
+            seek: Optional start time in seconds
+            frames: Optional number of frames to hash
+            decode: Hash the decoded frames. If False, the packets are hashed by
+                    stream copy, which is much faster, e.g. to count frames.
+            
+        Returns:
+            tuple: (time base in seconds, list of (pts, duration, md5) tuples of the first video stream)
+        """
+        cmd = ["ffmpeg", "-v", "error"]
+        if seek is not None:
+            cmd.extend(["-ss", str(seek)])
+        cmd.extend(["-i", video_path, "-map", "0:v:0"])
+        if frames is not None:
+            cmd.extend(["-frames:v", str(frames)])
+        if not decode:
+            cmd.extend(["-c", "copy"])
+        cmd.extend(["-f", "framemd5", "-"])
+        metrics.FFMPEG_SPAWNS.inc()
+        with self._stage("verify"):
+            process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f"framemd5 failed for {video_path}: {process.stderr.strip()}")
+        
+        time_base = None
+        frames = []
+        for line in process.stdout.splitlines():
+            if line.startswith("#tb 0:"):
+                numerator, denominator = line.split(":", 1)[1].strip().split("/")
+                time_base = int(numerator) / int(denominator)
+            elif line and not line.startswith("#"):
+                fields = [field.strip() for field in line.split(",")]
+                frames.append((int(fields[2]), int(fields[3]), fields[5]))
+        return time_base, frames
+    
+    def compare_frames(self, reference_path, video_path):
+        """Compare the decoded frames of an encode with a reference encode.
+        
+        Used to check a chunked encode against a single-pass encode of the
+        same sequence. Intra-only formats (ProRes) should hash identically;
+        long-GOP formats only match in frame count and timing.
+        
+        Args:
+            reference_path: Path of the reference (single-pass) encode
+            video_path: Path of the encode to check
+            
+        Returns:
+            dict: 'frames' (frame count of video_path) and the booleans
+                  'frame_count_matches', 'timing_matches' and 'hashes_match'
+        """
+        _, reference = self.frame_hashes(reference_path)
+        _, frames = self.frame_hashes(video_path)
+        return {
+            'frames': len(frames),
+            'frame_count_matches': len(frames) == len(reference),
+            'timing_matches': [f[:2] for f in frames] == [f[:2] for f in reference],
+            'hashes_match': frames == reference,
+        }
+    
+    def _verify_chunk_boundaries(self, input_path, output_path, first_frame, bounds, fps, encode_args,
+                                 intra_only, work_dir):
+        """Check a joined chunked encode against its source at every chunk boundary.
+        
+        Every chunk is capped with -frames:v and the concat demuxer lays the
+        chunks out evenly, so a chunk starting a frame early or late keeps the
+        count and spacing of the frames; only their content shows the error.
+        The output must have exactly the frame count of a single encode
+        (counted from the packets, without decoding). Around each boundary,
+        BOUNDARY_CHECK_FRAMES frames on either side are then compared with
+        the source:
+        
+        - Intra-only output (ProRes) codes every frame on its own, so the
+          same source frames encoded again in one piece with the same
+          settings must hash identically.
+        - Long-GOP output cannot match a reference bit for bit, so each
+          output frame must look most like the source frame at its own
+          position, which catches shifted, duplicated and dropped frames.
+        
+        Args:
+            input_path: Path to the source video
+            output_path: Path to the joined encode
+            first_frame: Source frame number of the sequence's first frame
+            bounds: Chunk boundaries as frame offsets into the sequence
+            fps: Source frame rate
+            encode_args: Scale and codec arguments the chunks were encoded with
+            intra_only: True for intra-only output (ProRes)
+            work_dir: Folder for the reference encodes
+            
+        Returns:
+            bool: True if the encode passed
+        """
+        name = os.path.basename(output_path)
+        total_frames = bounds[-1]
+        try:
+            _, packets = self.frame_hashes(output_path, decode=False)
+            if len(packets) != total_frames:
+                self.logger.warning(f"{name} has {len(packets)} frames, expected {total_frames}")
+                return False
+            
+            for i, boundary in enumerate(bounds[1:-1], 1):
+                low = max(0, boundary - BOUNDARY_CHECK_FRAMES)
+                count = min(total_frames, boundary + BOUNDARY_CHECK_FRAMES) - low
+                # Output timestamps start at zero; seek half a frame early as the chunks do
+                output_seek = max(0.0, (low - 0.5) / fps)
+                if intra_only:
+                    reference_path = os.path.join(work_dir, f"boundary_{i:03d}{os.path.splitext(output_path)[1]}")
+                    cmd = ["ffmpeg", "-v", "error", "-y",
+                           "-ss", str(max(0.0, (first_frame + low - 0.5) / fps)), "-i", input_path,
+                           "-frames:v", str(count), "-an"]
+                    cmd.extend(encode_args)
+                    cmd.append(reference_path)
+                    self._count("ffmpeg_processes")
+                    metrics.FFMPEG_SPAWNS.inc()
+                    with self._stage("verify"):
+                        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                    if process.returncode != 0:
+                        raise RuntimeError(process.stderr.strip())
+                    _, expected = self.frame_hashes(reference_path)
+                    _, actual = self.frame_hashes(output_path, seek=output_seek, frames=count)
+                    if [frame[2] for frame in actual] != [frame[2] for frame in expected]:
+                        self.logger.warning(f"{name}: frames {low}-{low + count - 1} around chunk boundary "
+                                            f"{boundary} do not match the source")
+                        return False
+                else:
+                    with self._stage("verify"):
+                        sources = self._gray_frames(input_path, first_frame + low, count)
+                        outputs = self._gray_frames(output_path, low, count)
+                    if len(sources) != count or len(outputs) != count:
+                        raise RuntimeError(f"could not read frames {low}-{low + count - 1}")
+                    for j, frame in enumerate(outputs):
+                        diffs = [float(np.mean(np.abs(frame - source))) for source in sources]
+                        if diffs[j] > min(diffs) + BOUNDARY_MATCH_TOLERANCE:
+                            self.logger.warning(f"{name}: frame {low + j} near chunk boundary {boundary} "
+                                                f"matches source frame {first_frame + low + diffs.index(min(diffs))}")
+                            return False
+        except Exception as e:
+            self.logger.warning(f"Could not verify {name}: {str(e)}")
+            return False
+        return True
+    
+    @staticmethod
+    def _gray_frames(video_path, start, count, size=(64, 36)):
+        """Read count frames from a frame number as small gray float images."""
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        try:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            for _ in range(count):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                gray = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+                frames.append(gray.astype(np.float32))
+        finally:
+            cap.release()
+        return frames
+    
+    def _prores_codec_params(self, encoder, profile):
+        """Build the FFmpeg arguments for a ProRes encoder and profile.
+        
+        Args:
+            encoder: Encoder name from PRORES_ENCODERS
+            profile: ProRes profile number
+            
+        Returns:
+            list: FFmpeg arguments
+        """
+        settings = PRORES_ENCODERS.get(encoder, PRORES_ENCODERS['prores_ks'])
+        params = ["-c:v", encoder, "-profile:v", profile]
+        if settings['vendor']:
+            params.extend(["-vendor", settings['vendor']])
+        params.extend(["-pix_fmt", settings['pix_fmt']])
+        return params
+        
+    def _plan_renditions(self, renditions, codec_support, prores_encoder="auto"):
+        """Resolve requested renditions to encoder settings.
+        
+        Renditions whose codec FFmpeg does not support are skipped.
+        
+        Args:
+            renditions: List of rendition dicts (see DELIVERY_RENDITIONS)
+            codec_support: Codec support from check_ffmpeg_available()
+            prores_encoder: 'auto' or a ProRes encoder name
+            
+        Returns:
+            list: Dicts with name, format, extension, profile, encoder and height
+        """
+        plan = []
+        for rendition in renditions:
+            name = rendition['name']
+            if not codec_support.get(rendition['format']):
+                self.logger.warning(f"Skipping rendition '{name}': format '{rendition['format']}' not supported")
+                continue
+            output_format, extension, profile = self._output_settings(rendition['format'],
+                                                                      rendition.get('quality', 'medium'))
+            encoder = None
+            if output_format == 'prores':
+                encoder = self.select_prores_encoder(profile, prores_encoder)
+            plan.append({'name': name, 'format': output_format, 'extension': extension,
+                         'profile': profile, 'encoder': encoder, 'height': rendition.get('height')})
+        if not plan:
+            raise RuntimeError("None of the requested renditions can be encoded by FFmpeg")
+        self.logger.info(f"Encoding renditions: {', '.join(r['name'] for r in plan)}")
+        return plan
+    
+    def _extract_renditions(self, input_path, output_paths, plan, start_time, duration,
+                            progress_callback=None, speed_tier=DEFAULT_SPEED_TIER):
+        """Encode one sequence to several renditions from a single decode.
+        
+        The decoded frames go through a split filter, and each branch is
+        scaled and encoded for its own output file, so decoding and seeking
+        are paid once however many renditions are written.
+        
+        Args:
+            input_path: Path to the input video
+            output_paths: Output path of each rendition, in plan order
+            plan: Renditions from _plan_renditions()
+            start_time: Start time in seconds
+            duration: Duration in seconds
+            progress_callback: Optional callback function for progress updates
+            speed_tier: Encode speed tier for H.264/H.265 renditions
+            
+        Returns:
+            bool: True if all renditions were written, False otherwise
+        """
+        try:
+            # Create a temporary file for FFmpeg output
+            progress_file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
+            progress_file.close()
+            progress_file_path = progress_file.name
+            
+            # Get video dimensions
+            with self._stage("probe"):
+                cap = cv2.VideoCapture(input_path)
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                cap.release()
+            
+            # Split the decoded frames once per rendition, then scale each branch
+            branches = [f"[s{k}]" for k in range(len(plan))]
+            graph = [f"[0:v]split={len(plan)}{''.join(branches)}"]
+            for k, rendition in enumerate(plan):
+                if rendition['height']:
+                    scale = f"scale=-2:'min(ih,{rendition['height']})'"
+                elif width > 1920 or height > 1080:
+                    scale = "scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2"
+                else:
+                    scale = "null"
+                graph.append(f"{branches[k]}{scale}[v{k}]")
+            
+            # Seek on the input so the trim applies to every output
+            cmd = [
+                "ffmpeg", "-y",
+                "-ss", str(start_time),
+                "-t", str(duration),
+                "-i", input_path,
+                "-filter_complex", ";".join(graph),
+                "-progress", progress_file_path,  # Write progress to file
+            ]
+            # The filter graph gets the job's filter threads; its encoders split the job's threads
+            thread_plan = self._thread_plan()
+            encoder_threads = []
+            if thread_plan is not None:
+                cmd.extend(["-filter_complex_threads", str(thread_plan.filter_threads)])
+                encoder_threads = ["-threads", str(max(1, thread_plan.threads // len(plan)))]
+            for k, (rendition, output_path) in enumerate(zip(plan, output_paths)):
+                cmd.extend(["-map", f"[v{k}]", "-map", "0:a?"])
+                cmd.extend(encoder_threads)
+                if rendition['format'] == 'prores':
+                    cmd.extend(self._prores_codec_params(rendition['encoder'], rendition['profile']))
+                    cmd.extend(["-c:a", "copy"])
+                else:
+                    cmd.extend(self._h26x_codec_params(rendition['format'], rendition['profile'], speed_tier))
+                    cmd.extend(["-c:a", "aac", "-b:a", "128k"])
+                cmd.append(output_path)
+            
+            # Run FFmpeg; the encode stage spans the whole FFmpeg process lifetime
+            self.logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
+            with self._stage("encode"):
+                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                self._lower_priority(process)
+                self._count("ffmpeg_processes")
+                metrics.FFMPEG_SPAWNS.inc()
+                metrics.FFMPEG_PROCESSES.inc()
+                
+                try:
+                    success = self._monitor_ffmpeg_progress(
+                        process, 
+                        progress_file_path, 
+                        progress_callback
+                    )
+                finally:
+                    metrics.FFMPEG_PROCESSES.dec()
+            
+            if not success:
+                # Do not leave partial renditions behind
+                for path in output_paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+                return False
+            return all(os.path.exists(path) for path in output_paths)
+        except Exception as e:
+            self.logger.error(f"Error extracting renditions: {str(e)}")
+            return False
+    
+    def _monitor_ffmpeg_progress(self, process, progress_file, progress_callback,
+                                 stall_timeout=FFMPEG_STALL_TIMEOUT):
         """Monitor FFmpeg progress from a progress file.
         
         Args:
             process: Subprocess running FFmpeg
             progress_file: Path to the progress file
             progress_callback: Callback function for progress updates
+            stall_timeout: Seconds without progress after which FFmpeg is stopped
         
         Returns:
             bool: True if successful, False otherwise
@@ -508,7 +1890,8 @@ class VideoProcessor:
         try:
             # Wait for progress file to be created
             while not os.path.exists(progress_file) or os.path.getsize(progress_file) == 0:
-                time.sleep(0.1)
+                with self._stage("progress_wait"):
+                    time.sleep(0.1)
                 # Check if process is still running
                 if process.poll() is not None:
                     break
@@ -516,14 +1899,14 @@ class VideoProcessor:
             # Reset tracking variables
             duration = None
             last_position = 0
-            start_time = time.time()
-            timeout = 30  # 30 seconds timeout for processing
+            furthest_position = 0
+            last_progress = time.time()  # When the output position last advanced
             
             try:
                 while process.poll() is None:
-                    # Check for timeout
-                    if time.time() - start_time > timeout:
-                        self.logger.warning("FFmpeg process timed out")
+                    # Check for a stall
+                    if time.time() - last_progress > stall_timeout:
+                        self.logger.warning(f"FFmpeg made no progress for {stall_timeout:.0f} seconds")
                         process.terminate()
                         break
                     
@@ -537,6 +1920,9 @@ class VideoProcessor:
                                 try:
                                     time_ms = int(line.split('=')[1])
                                     position = time_ms / 1000000  # Convert to seconds
+                                    if position > furthest_position:
+                                        furthest_position = position
+                                        last_progress = time.time()
                                     last_position = position
                                 except (ValueError, IndexError):
                                     pass
@@ -552,7 +1938,8 @@ class VideoProcessor:
                             if progress_callback:
                                 progress_callback(percent)
                     
-                    time.sleep(0.5)
+                    with self._stage("progress_wait"):
+                        time.sleep(0.5)
                 
                 # Ensure process is terminated
                 if process.poll() is None:
@@ -589,9 +1976,45 @@ class VideoProcessor:
             self.logger.error(f"Error monitoring FFmpeg progress: {str(e)}")
             return False
     
+    @property
+    def thumbnail_cache(self):
+        """The ThumbnailCache used for scene thumbnails."""
+        if self._thumbnail_cache is None:
+            self._thumbnail_cache = ThumbnailCache()
+        return self._thumbnail_cache
+    
+    @property
+    def keyframe_cache(self):
+        """The KeyframeIndexCache used for keyframe lookups."""
+        if self._keyframe_cache is None:
+            self._keyframe_cache = KeyframeIndexCache()
+        return self._keyframe_cache
+    
+    def get_keyframe_index(self, video_path):
+        """Get the keyframe and packet index of a video.
+        
+        The index is built with ffprobe on first use and cached by content
+        fingerprint, so later jobs on the same file look keyframes up directly.
+        
+        Args:
+            video_path: Path to the video file
+            
+        Returns:
+            KeyframeIndex: The index, or None if it could not be built
+        """
+        try:
+            with self._stage("probe"):
+                return self.keyframe_cache.get(video_path)
+        except Exception as e:
+            self.logger.warning(f"Could not index keyframes of {os.path.basename(video_path)}: {str(e)}")
+            return None
+    
     def get_scene_thumbnails(self, video_path, scene_changes, size=(320, 180)):
         """Get thumbnails for each scene change.
         
+        Cached thumbnails are returned directly; the rest are extracted in one
+        pass over the video and added to the cache.
+        
         Args:
             video_path: Path to the video file
             scene_changes: List of scene change timestamps
@@ -600,12 +2023,8 @@ class VideoProcessor:
         Returns:
             list: List of (timestamp, thumbnail) tuples
         """
-        from utils import create_thumbnail
-        
-        thumbnails = []
-        for timestamp in scene_changes:
-            thumbnail = create_thumbnail(video_path, timestamp, size)
-            if thumbnail:
-                thumbnails.append((timestamp, thumbnail))
-                
-        return thumbnails
\ No newline at end of file
+        try:
+            return self.thumbnail_cache.get_thumbnails(video_path, scene_changes, size)
+        except Exception as e:
+            self.logger.error(f"Error creating scene thumbnails: {str(e)}")
+            return []
\ No newline at end of file
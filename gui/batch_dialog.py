@@ -4,6 +4,13 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
+from collections import deque
+
+from core.file_scanner import scan_videos
+from gui.event_channel import UIEventChannel
+
+# Tree rows inserted per Tk tick while a folder scan is delivering files
+TREE_INSERT_CHUNK = 200
 
 class BatchDialog:
     """Dialog for batch processing of videos."""
@@ -29,8 +36,9 @@ class BatchDialog:
         self.dialog.minsize(600, 400)
         self.dialog.grab_set()
         
-        # Video files list
+        # Video files list; tree rows use the full path as their item id
         self.video_files = []
+        self.video_file_set = set()
         
         # Processing parameters
         self.sequence_length = config_manager.get('sequence_length', 10)
@@ -47,8 +55,31 @@ class BatchDialog:
         self.processing_thread = None
         self.stop_processing = False
         
+        # Progress of the running batch, only touched on the Tk thread
+        self._batch_total = 0
+        self._finished_files = 0
+        self._running_progress = {}
+        
+        # Folder scan state; found paths wait in a queue and are inserted a chunk per tick
+        self.scan_thread = None
+        self.stop_scanning = False
+        self._scanned_paths = deque()
+        self._insert_scheduled = False
+        
         self.create_widgets()
         
+        # All events from the processing thread and batch workers reach the UI through
+        # this channel, so Tk widgets are only ever touched on the Tk thread
+        self.events = UIEventChannel(self.dialog)
+        self.events.subscribe('file_status', self._apply_file_status)
+        self.events.subscribe('file_progress', self._on_file_progress)
+        self.events.subscribe('file_finished', self._on_file_finished)
+        self.events.subscribe('batch_status', self.status_var.set)
+        self.events.subscribe('batch_done', self._on_batch_done)
+        self.events.subscribe('files_found', self._queue_scanned_files)
+        self.events.subscribe('scan_done', self._on_scan_done)
+        self.events.start()
+        
     def create_widgets(self):
         """Create the dialog widgets."""
         main_frame = ttk.Frame(self.dialog, padding=10)
@@ -188,10 +219,21 @@ class BatchDialog:
             
         # Add files to the list
         for file in files:
-            if file not in self.video_files:
-                self.video_files.append(file)
-                self.status_map[file] = self.i18n.get('pending')
-                self.file_tree.insert('', 'end', values=(os.path.basename(file), self.i18n.get('pending'), ''))
+            self._add_file(file)
+                
+    def _add_file(self, file_path):
+        """Add one file to the batch unless it is already queued.
+        
+        Args:
+            file_path: Path to the video file.
+        """
+        if file_path in self.video_file_set:
+            return
+        self.video_files.append(file_path)
+        self.video_file_set.add(file_path)
+        self.status_map[file_path] = self.i18n.get('pending')
+        self.file_tree.insert('', 'end', iid=file_path,
+                              values=(os.path.basename(file_path), self.i18n.get('pending'), ''))
                 
     def add_folder(self):
         """Add all video files from a folder."""
@@ -206,16 +248,52 @@ class BatchDialog:
         # Remember this directory
         self.config_manager.set('input_folder', folder)
         
-        # Find all video files in the folder
-        video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.wmv')
-        for root, dirs, files in os.walk(folder):
-            for file in files:
-                if file.lower().endswith(video_extensions):
-                    file_path = os.path.join(root, file)
-                    if file_path not in self.video_files:
-                        self.video_files.append(file_path)
-                        self.status_map[file_path] = self.i18n.get('pending')
-                        self.file_tree.insert('', 'end', values=(os.path.basename(file_path), self.i18n.get('pending'), ''))
+        if self.scan_thread and self.scan_thread.is_alive():
+            return
+            
+        # Scan in the background; large network folders would otherwise hang the dialog
+        batch_settings = self.config_manager.get('batch_settings', {})
+        sniff = batch_settings.get('sniff_content', False)
+        self.stop_scanning = False
+        self.status_var.set(f"{self.i18n.get('scanning')} {folder}")
+        self.scan_thread = threading.Thread(target=self._scan_folder, args=(folder, sniff), daemon=True)
+        self.scan_thread.start()
+        
+    def _scan_folder(self, folder, sniff):
+        """Scan a folder for videos (runs on the scan thread)."""
+        try:
+            found = scan_videos(
+                folder,
+                sniff=sniff,
+                on_chunk=lambda paths: self.events.post('files_found', paths),
+                should_stop=lambda: self.stop_scanning
+            )
+            self.events.post('scan_done', len(found), None)
+        except Exception as e:
+            self.events.post('scan_done', 0, str(e))
+            
+    def _queue_scanned_files(self, paths):
+        """Queue scanned paths for insertion into the tree (runs on the Tk thread)."""
+        self._scanned_paths.extend(paths)
+        if not self._insert_scheduled:
+            self._insert_scheduled = True
+            self.dialog.after(0, self._insert_scanned_files)
+            
+    def _insert_scanned_files(self):
+        """Insert one chunk of scanned paths, then yield to the event loop."""
+        for _ in range(min(TREE_INSERT_CHUNK, len(self._scanned_paths))):
+            self._add_file(self._scanned_paths.popleft())
+        if self._scanned_paths:
+            self.dialog.after(1, self._insert_scanned_files)
+        else:
+            self._insert_scheduled = False
+            
+    def _on_scan_done(self, count, error):
+        """Report the result of a folder scan (runs on the Tk thread)."""
+        if error:
+            self.status_var.set(f"{self.i18n.get('error')}: {error}")
+        else:
+            self.status_var.set(f"{self.i18n.get('files_found')}: {count}")
                         
     def remove_files(self):
         """Remove selected files from the batch."""
@@ -223,37 +301,28 @@ class BatchDialog:
         if not selected:
             return
             
-        # Get the file paths for the selected items
-        selected_files = []
-        for item_id in selected:
-            item = self.file_tree.item(item_id)
-            filename = item['values'][0]
-            
-            # Find the full path
-            for file_path in self.video_files:
-                if os.path.basename(file_path) == filename:
-                    selected_files.append(file_path)
-                    break
-                    
+        # Item ids are the full file paths
+        selected_files = set(selected)
+        
         # Remove from the list and tree
+        self.video_files = [f for f in self.video_files if f not in selected_files]
+        self.video_file_set -= selected_files
         for file_path in selected_files:
-            self.video_files.remove(file_path)
-            del self.status_map[file_path]
-            if file_path in self.output_map:
-                del self.output_map[file_path]
+            self.status_map.pop(file_path, None)
+            self.output_map.pop(file_path, None)
                 
-        for item_id in selected:
-            self.file_tree.delete(item_id)
+        self.file_tree.delete(*selected)
             
     def clear_files(self):
         """Clear all files from the batch."""
         self.video_files = []
+        self.video_file_set = set()
         self.status_map = {}
         self.output_map = {}
+        self._scanned_paths.clear()
         
         # Clear the tree
-        for item in self.file_tree.get_children():
-            self.file_tree.delete(item)
+        self.file_tree.delete(*self.file_tree.get_children())
             
     def browse_output_folder(self):
         """Browse for output folder."""
@@ -268,20 +337,52 @@ class BatchDialog:
     def update_file_status(self, file_path, status, output=''):
         """Update the status of a file in the tree.
         
+        Safe to call from worker threads: the update is posted to the event
+        channel, coalesced per file and applied on the Tk thread.
+        
         Args:
             file_path: Path to the file.
             status: New status string.
             output: Output information.
         """
         self.status_map[file_path] = status
+        self.events.post('file_status', file_path, status, output, coalesce=file_path)
+        
+    def _apply_file_status(self, file_path, status, output):
+        """Show a file's status in the tree (runs on the Tk thread)."""
+        if self.file_tree.exists(file_path):
+            self.file_tree.item(file_path, values=(os.path.basename(file_path), status, output))
+            
+    def _on_file_progress(self, file_path, percent):
+        """Track the progress of a running file (runs on the Tk thread)."""
+        self._running_progress[file_path] = percent
+        self._show_overall_progress()
+        
+    def _on_file_finished(self, file_path, output_paths):
+        """Count a finished file (runs on the Tk thread)."""
+        self._running_progress.pop(file_path, None)
+        self._finished_files += 1
+        if output_paths:
+            self.output_map[file_path] = output_paths
+        self._show_overall_progress()
+        
+    def _show_overall_progress(self):
+        """Set the progress bar from finished files plus partial progress of running ones."""
+        if not self._batch_total:
+            return
+        done = self._finished_files + sum(self._running_progress.values()) / 100
+        self.progress_var.set(min(done / self._batch_total * 100, 100))
+        
+    def _on_batch_done(self, error=None):
+        """Show the batch result and re-enable the UI (runs on the Tk thread)."""
+        if error:
+            self.status_var.set(f"{self.i18n.get('error')}: {error}")
+        else:
+            self.status_var.set(
+                f"{self.i18n.get('processing_complete')} ({len(self.output_map)}/{self._batch_total})"
+            )
+        self.start_button.config(state='normal')
         
-        # Find the item in the tree
-        for item_id in self.file_tree.get_children():
-            item = self.file_tree.item(item_id)
-            if item['values'][0] == os.path.basename(file_path):
-                self.file_tree.item(item_id, values=(os.path.basename(file_path), status, output))
-                break
-                
     def start_batch(self):
         """Start batch processing."""
         if not self.video_files:
@@ -296,6 +397,10 @@ class BatchDialog:
         # Disable UI during processing
         self.start_button.config(state='disabled')
         self.progress_var.set(0)
+        self._batch_total = len(self.video_files)
+        self._finished_files = 0
+        self._running_progress = {}
+        self.output_map = {}
         self.status_var.set(self.i18n.get('processing'))
         
         # Get parameters
@@ -309,6 +414,18 @@ class BatchDialog:
         batch_settings = self.config_manager.get('batch_settings', {})
         parallel = batch_settings.get('parallel_processing', True)
         max_workers = batch_settings.get('max_workers', 2)
+        deduplicate = batch_settings.get('deduplicate', True)
+        verify_duplicates = batch_settings.get('verify_duplicates', False)
+        memory_budget_mb = batch_settings.get('memory_budget_mb')
+        audio_weight = self.config_manager.get('audio_weight', 0.0)
+        scene_selection = self.config_manager.get('scene_selection', 'first')
+        speed_tier = self.config_manager.get('encode_speed_tier', 'standard')
+        prores_encoder = self.config_manager.get('prores_encoder', 'auto')
+        renditions = self.config_manager.get('renditions') or None
+        storyboard = self.config_manager.get('storyboard_settings')
+        analysis_workers = self.config_manager.get('analysis_workers', 1)
+        encode_chunks = self.config_manager.get('encode_chunks', 1)
+        cpu_governor = self.config_manager.get('cpu_governor')
         
         # Reset stop flag
         self.stop_processing = False
@@ -317,13 +434,20 @@ class BatchDialog:
         self.processing_thread = threading.Thread(
             target=self._process_batch,
             args=(output_folder, sequence_length, threshold, num_sequences, 
-                 output_format, quality, parallel, max_workers),
+                 output_format, quality, parallel, max_workers,
+                 deduplicate, verify_duplicates, memory_budget_mb, audio_weight, scene_selection,
+                 speed_tier, prores_encoder, renditions, storyboard, analysis_workers,
+                 encode_chunks, cpu_governor),
             daemon=True
         )
         self.processing_thread.start()
         
     def _process_batch(self, output_folder, sequence_length, threshold, 
-                      num_sequences, output_format, quality, parallel, max_workers):
+                      num_sequences, output_format, quality, parallel, max_workers,
+                      deduplicate=True, verify_duplicates=False, memory_budget_mb=None,
+                      audio_weight=0.0, scene_selection='first', speed_tier='standard',
+                      prores_encoder='auto', renditions=None, storyboard=None, analysis_workers=1,
+                      encode_chunks=1, cpu_governor=None):
         """Process the batch of videos.
         
         Args:
@@ -335,70 +459,87 @@ class BatchDialog:
             quality: Quality setting (low, medium, high).
             parallel: Whether to process videos in parallel.
             max_workers: Maximum number of parallel workers.
+            deduplicate: Process files with identical content only once.
+            verify_duplicates: Confirm duplicates with a full-file hash.
+            memory_budget_mb: Optional memory budget per worker in MB.
+            audio_weight: Weight of audio novelty in scene detection.
+            scene_selection: 'first' or 'best' start point selection.
+            speed_tier: H.264/H.265 encode speed tier.
+            prores_encoder: ProRes encoder, or 'auto' to choose per job.
+            renditions: Optional renditions written per sequence from one decode.
+            storyboard: Optional contact sheet and sprite track settings.
+            analysis_workers: Processes analyzing chunks of one video.
+            encode_chunks: Chunks encoded in parallel per long sequence.
+            cpu_governor: Optional settings for sharing the CPU between parallel jobs.
         """
+        video_files = list(self.video_files)
+        total = len(video_files)
+        started = [0]
+        
+        # Called on this thread by the batch processor's scheduler
+        def on_status(file_path, status, detail=None):
+            if status == 'completed':
+                self.update_file_status(file_path, self.i18n.get('completed'),
+                                        f"{len(detail)} {self.i18n.get('sequences')}")
+                self.events.post('file_finished', file_path, detail)
+            elif status == 'failed':
+                self.update_file_status(file_path, self.i18n.get('failed'), detail or "")
+                self.events.post('file_finished', file_path, [])
+            elif status == 'waiting_for_space':
+                self.update_file_status(file_path, self.i18n.get('waiting_for_space'))
+                self.events.post('batch_status', self.i18n.get('waiting_for_space'), coalesce='batch')
+            else:
+                started[0] += 1
+                self.update_file_status(file_path, self.i18n.get('processing'))
+                self.events.post(
+                    'batch_status',
+                    f"{self.i18n.get('processing')} {started[0]}/{total}: {os.path.basename(file_path)}",
+                    coalesce='batch'
+                )
+                
+        # Called from the worker threads; coalesced so only the latest value per file is drawn
+        def on_progress(file_path, percent):
+            self.events.post('file_progress', file_path, percent, coalesce=file_path)
+            
+        error = None
         try:
             # Update all files to 'pending'
-            for file_path in self.video_files:
+            for file_path in video_files:
                 self.update_file_status(file_path, self.i18n.get('pending'))
                 
-            # Process videos
-            for i, file_path in enumerate(self.video_files):
-                if self.stop_processing:
-                    break
-                    
-                # Update status
-                self.update_file_status(file_path, self.i18n.get('processing'))
-                self.dialog.after(0, lambda: self.status_var.set(
-                    f"{self.i18n.get('processing')} {i+1}/{len(self.video_files)}: {os.path.basename(file_path)}"
-                ))
-                
-                try:
-                    # Create output directory for this file
-                    base_name = os.path.splitext(os.path.basename(file_path))[0]
-                    file_output_dir = os.path.join(output_folder, f"{base_name}_sequences")
-                    os.makedirs(file_output_dir, exist_ok=True)
-                    
-                    # Process the file
-                    success, output_paths = self.batch_processor._process_single_video(
-                        file_path,
-                        output_folder,
-                        sequence_length,
-                        threshold,
-                        num_sequences,
-                        output_format,
-                        quality,
-                        lambda p: self.dialog.after(0, lambda: self.progress_var.set(p))
-                    )
-                    
-                    # Update status
-                    if success:
-                        status = self.i18n.get('completed')
-                        output_info = f"{len(output_paths)} {self.i18n.get('sequences')}"
-                        self.output_map[file_path] = output_paths
-                    else:
-                        status = self.i18n.get('failed')
-                        output_info = ""
-                        
-                    self.update_file_status(file_path, status, output_info)
-                    
-                except Exception as e:
-                    self.update_file_status(file_path, self.i18n.get('failed'), str(e))
-                    
-                # Update progress
-                overall_progress = ((i + 1) / len(self.video_files)) * 100
-                self.dialog.after(0, lambda p=overall_progress: self.progress_var.set(p))
-                
-            # Processing complete
-            self.dialog.after(0, lambda: self.status_var.set(
-                f"{self.i18n.get('processing_complete')} ({len(self.output_map)}/{len(self.video_files)})"
-            ))
+            # Process videos; the batch processor pauses admission while the disk is full
+            self.batch_processor.process_batch(
+                video_files,
+                output_folder,
+                sequence_length,
+                threshold,
+                num_sequences,
+                output_format,
+                quality,
+                max_workers=max_workers if parallel else 1,
+                status_callback=on_status,
+                progress_callback=on_progress,
+                should_stop=lambda: self.stop_processing,
+                deduplicate=deduplicate,
+                verify_duplicates=verify_duplicates,
+                memory_budget_mb=memory_budget_mb,
+                audio_weight=audio_weight,
+                scene_selection=scene_selection,
+                speed_tier=speed_tier,
+                prores_encoder=prores_encoder,
+                renditions=renditions,
+                storyboard=storyboard,
+                analysis_workers=analysis_workers,
+                encode_chunks=encode_chunks,
+                cpu_governor=cpu_governor
+            )
             
         except Exception as e:
-            self.dialog.after(0, lambda: self.status_var.set(f"{self.i18n.get('error')}: {str(e)}"))
+            error = str(e)
             
         finally:
-            # Re-enable UI
-            self.dialog.after(0, lambda: self.start_button.config(state='normal'))
+            # Show the result and re-enable the UI
+            self.events.post('batch_done', error)
             
     def cancel_batch(self):
         """Cancel batch processing and close the dialog."""
@@ -408,6 +549,8 @@ class BatchDialog:
             # Wait for thread to finish
             self.processing_thread.join(0.1)
             
+        self.stop_scanning = True
+        self.events.stop()
         self.dialog.destroy()
         
     def on_close(self):
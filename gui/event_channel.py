@@ -0,0 +1,93 @@
+"""Channel carrying events from worker threads to the Tk thread."""
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from itertools import count
+
+# Milliseconds between drains of the channel
+DRAIN_INTERVAL = 50
+
+# Maximum number of events handled per drain, to bound the time spent per tick
+DRAIN_BATCH = 500
+
+
+class UIEventChannel:
+    """Producer/consumer queue between worker threads and Tk.
+
+    Workers call post() from any thread; handlers registered with subscribe()
+    run on the Tk thread from a periodic drain. Events posted with a
+    coalesce key replace any undelivered event of the same kind and key, so
+    progress reports from many workers cost one UI update per tick.
+    """
+
+    def __init__(self, widget, interval=DRAIN_INTERVAL, batch=DRAIN_BATCH):
+        """Initialize the channel.
+
+        Args:
+            widget: Any Tk widget, used to schedule the drain timer.
+            interval: Milliseconds between drains.
+            batch: Maximum number of events handled per drain.
+        """
+        self.widget = widget
+        self.interval = interval
+        self.batch = batch
+        self._handlers = {}
+        self._pending = OrderedDict()
+        self._sequence = count()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def subscribe(self, kind, handler):
+        """Register the handler called on the Tk thread for events of a kind.
+
+        Args:
+            kind: Event kind.
+            handler: Callable receiving the event's arguments.
+        """
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def post(self, kind, *args, coalesce=None):
+        """Queue an event. Safe to call from any thread.
+
+        Args:
+            kind: Event kind.
+            *args: Arguments passed to the handlers.
+            coalesce: Optional key; a pending event with the same kind and key is replaced.
+        """
+        key = (kind, coalesce) if coalesce is not None else (kind, None, next(self._sequence))
+        with self._lock:
+            self._pending[key] = (kind, args)
+
+    def start(self):
+        """Start draining events on the Tk thread."""
+        if self._timer is None:
+            self._timer = self.widget.after(self.interval, self._drain)
+
+    def stop(self):
+        """Stop draining and drop undelivered events."""
+        if self._timer is not None:
+            try:
+                self.widget.after_cancel(self._timer)
+            except tk.TclError:
+                pass
+            self._timer = None
+        with self._lock:
+            self._pending.clear()
+
+    def drain(self):
+        """Deliver pending events now (must be called on the Tk thread)."""
+        with self._lock:
+            events = []
+            while self._pending and len(events) < self.batch:
+                events.append(self._pending.popitem(last=False)[1])
+        for kind, args in events:
+            for handler in self._handlers.get(kind, ()):
+                handler(*args)
+
+    def _drain(self):
+        self.drain()
+        try:
+            self._timer = self.widget.after(self.interval, self._drain)
+        except tk.TclError:
+            # Widget was destroyed
+            self._timer = None
@@ -0,0 +1,202 @@
+"""Scrollable scene filmstrip with virtualized thumbnail rendering."""
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import ImageTk
+
+from gui.theme import COLORS
+from utils import format_time
+
+# Thumbnail and tile geometry in pixels
+THUMB_WIDTH = 160
+THUMB_HEIGHT = 90
+TILE_PADDING = 6
+TILE_WIDTH = THUMB_WIDTH + 2 * TILE_PADDING
+TILE_HEIGHT = THUMB_HEIGHT + 30
+
+# Extra tiles materialized on each side of the visible range
+OVERSCAN = 3
+
+
+class SceneFilmstrip(ttk.Frame):
+    """Horizontal strip of scene thumbnails.
+
+    Only the tiles in (or next to) the visible part of the canvas exist as
+    canvas items and PhotoImages; the rest are created when scrolled into
+    view and dropped again when scrolled out. Thumbnails are loaded lazily
+    through the thumbnail cache on a background worker.
+    """
+
+    def __init__(self, parent, thumbnail_cache, on_select=None, **kwargs):
+        """Initialize the filmstrip.
+
+        Args:
+            parent: Parent widget.
+            thumbnail_cache: ThumbnailCache used to load thumbnails.
+            on_select: Optional callback receiving the timestamp of the selected scene.
+        """
+        super().__init__(parent, **kwargs)
+        self.thumbnail_cache = thumbnail_cache
+        self.on_select = on_select
+
+        self.video_path = None
+        self.scenes = []
+        self.selected_index = None
+
+        self._tiles = {}  # Maps scene index to its canvas item ids
+        self._images = {}  # Maps scene index to its PhotoImage (visible tiles only)
+        self._requested = set()
+        self._generation = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self.canvas = tk.Canvas(self, height=TILE_HEIGHT, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self._on_scroll)
+        self.canvas.config(xscrollcommand=self.scrollbar.set)
+        self.canvas.pack(fill=tk.X, expand=True)
+        self.scrollbar.pack(fill=tk.X)
+
+        self.canvas.bind("<Configure>", lambda event: self._refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self._scroll_units(-1))
+        self.canvas.bind("<Button-5>", lambda event: self._scroll_units(1))
+
+    def set_scenes(self, video_path, scenes):
+        """Show the scenes of a video.
+
+        Args:
+            video_path: Path to the video file.
+            scenes: Scene start timestamps in seconds.
+        """
+        self._generation += 1
+        self.video_path = video_path
+        self.scenes = list(scenes)
+        self.selected_index = None
+        self._clear_tiles()
+        self.canvas.config(scrollregion=(0, 0, len(self.scenes) * TILE_WIDTH, TILE_HEIGHT))
+        self.canvas.xview_moveto(0)
+        self._refresh()
+
+    def clear(self):
+        """Remove all scenes."""
+        self.set_scenes(None, [])
+
+    @property
+    def selected_timestamp(self):
+        """Timestamp of the selected scene, or None."""
+        if self.selected_index is None:
+            return None
+        return self.scenes[self.selected_index]
+
+    def _clear_tiles(self):
+        self.canvas.delete("all")
+        self._tiles.clear()
+        self._images.clear()
+        self._requested.clear()
+
+    def _visible_range(self):
+        """Indices of the tiles to materialize."""
+        width = max(self.canvas.winfo_width(), 1)
+        left = self.canvas.canvasx(0)
+        first = max(int(left // TILE_WIDTH) - OVERSCAN, 0)
+        last = min(int((left + width) // TILE_WIDTH) + OVERSCAN, len(self.scenes) - 1)
+        return first, last
+
+    def _refresh(self):
+        """Create tiles scrolled into view and drop the ones scrolled out."""
+        if not self.scenes:
+            return
+        first, last = self._visible_range()
+
+        for index in [i for i in self._tiles if i < first or i > last]:
+            for item in self._tiles.pop(index):
+                self.canvas.delete(item)
+            self._images.pop(index, None)
+            self._requested.discard(index)
+
+        missing = []
+        for index in range(first, last + 1):
+            if index not in self._tiles:
+                self._create_tile(index)
+            if index not in self._images and index not in self._requested:
+                missing.append(index)
+
+        if missing:
+            self._requested.update(missing)
+            generation = self._generation
+            timestamps = [self.scenes[i] for i in missing]
+            self._executor.submit(self._load_thumbnails, generation, self.video_path, missing, timestamps)
+
+    def _create_tile(self, index):
+        x = index * TILE_WIDTH + TILE_PADDING
+        outline = COLORS['primary'] if index == self.selected_index else COLORS['secondary']
+        width = 3 if index == self.selected_index else 1
+        frame_item = self.canvas.create_rectangle(x - 2, TILE_PADDING - 2, x + THUMB_WIDTH + 2,
+                                                  TILE_PADDING + THUMB_HEIGHT + 2,
+                                                  outline=outline, width=width, tags=("frame",))
+        label_item = self.canvas.create_text(x + THUMB_WIDTH // 2, TILE_PADDING + THUMB_HEIGHT + 12,
+                                             text=f"#{index + 1}  {format_time(self.scenes[index])}",
+                                             fill=COLORS['text_secondary'])
+        self._tiles[index] = [frame_item, label_item]
+
+    def _load_thumbnails(self, generation, video_path, indices, timestamps):
+        """Load thumbnails on the worker thread and hand them to the Tk thread."""
+        if generation != self._generation:
+            return
+        try:
+            loaded = dict(self.thumbnail_cache.get_thumbnails(video_path, timestamps,
+                                                              (THUMB_WIDTH, THUMB_HEIGHT)))
+        except Exception:
+            loaded = {}
+        images = [(index, loaded.get(timestamp)) for index, timestamp in zip(indices, timestamps)]
+        self.after(0, lambda: self._install_thumbnails(generation, images))
+
+    def _install_thumbnails(self, generation, images):
+        if generation != self._generation:
+            return
+        for index, image in images:
+            self._requested.discard(index)
+            # Tiles scrolled out of view while loading are not materialized
+            if index not in self._tiles or image is None:
+                continue
+            photo = ImageTk.PhotoImage(image)
+            self._images[index] = photo
+            x = index * TILE_WIDTH + TILE_PADDING
+            item = self.canvas.create_image(x, TILE_PADDING, image=photo, anchor=tk.NW)
+            self._tiles[index].append(item)
+
+    def _on_scroll(self, *args):
+        self.canvas.xview(*args)
+        self._refresh()
+
+    def _scroll_units(self, units):
+        self.canvas.xview_scroll(units, "units")
+        self._refresh()
+
+    def _on_mousewheel(self, event):
+        self._scroll_units(-1 if event.delta > 0 else 1)
+
+    def _on_click(self, event):
+        index = int(self.canvas.canvasx(event.x) // TILE_WIDTH)
+        if 0 <= index < len(self.scenes):
+            self.select(index)
+
+    def select(self, index):
+        """Select a scene and notify the callback.
+
+        Args:
+            index: Index of the scene in the filmstrip.
+        """
+        previous = self.selected_index
+        self.selected_index = index
+        for changed in (previous, index):
+            if changed is not None and changed in self._tiles:
+                self.canvas.itemconfig(
+                    self._tiles[changed][0],
+                    outline=COLORS['primary'] if changed == index else COLORS['secondary'],
+                    width=3 if changed == index else 1
+                )
+        if self.on_select:
+            self.on_select(self.scenes[index])
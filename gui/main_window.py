@@ -3,13 +3,15 @@ import os
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 import threading
+import time
 from PIL import Image, ImageTk
 import webbrowser
 import platform
 import subprocess
 
 from core.video_processor import VideoProcessor
-from utils import check_ffmpeg_installed, get_free_disk_space, format_file_size, get_videos_folder, create_thumbnail, format_time
+from core.disk_space import OutputSizeEstimator
+from utils import check_ffmpeg_installed, get_free_disk_space, format_file_size, get_videos_folder, format_time
 from config import (
     DEFAULT_SEQUENCE_LENGTH, 
     DEFAULT_SCENE_THRESHOLD,
@@ -28,6 +30,8 @@ from constants import (
     MAX_ANALYSIS_DURATION
 )
 from gui.theme import COLORS, apply_custom_styles, get_theme_mode, toggle_theme_mode
+from gui.filmstrip import SceneFilmstrip, THUMB_WIDTH, THUMB_HEIGHT
+from gui.event_channel import UIEventChannel
 
 class VideoSlicerGUI:
     """Modern GUI for the VideoSlicer application."""
@@ -57,6 +61,7 @@ class VideoSlicerGUI:
         
         # Create the video processor
         self.processor = VideoProcessor()
+        self.size_estimator = OutputSizeEstimator()
         
         # Create variables
         self.input_path_var = tk.StringVar()
@@ -69,13 +74,31 @@ class VideoSlicerGUI:
         self.progress_var = tk.DoubleVar(value=0)
         self.status_var = tk.StringVar(value="Ready to process videos")
         self.description_var = tk.StringVar()
+        self.start_scene_var = tk.StringVar(value="Run scene detection to review cuts")
+        
+        # Scenes detected for the current input, as (input_path, threshold, timestamps)
+        self.detected_scenes = None
         
         # Thumbnail image
         self.thumbnail_image = None
         
+        # Thumbnails are made on background threads; only the latest request is shown
+        self._thumbnail_request = 0
+        self._thumbnail_pending = None
+        
         # Create the GUI
         self.create_widgets()
         
+        # Progress and results from the detection and processing threads reach
+        # the widgets through this channel, on the Tk thread
+        self.events = UIEventChannel(self.root)
+        self.events.subscribe('progress', self.update_progress)
+        self.events.subscribe('status', self.update_status)
+        self.events.subscribe('scenes_detected', self.show_detected_scenes)
+        self.events.subscribe('detection_done', self.detection_complete)
+        self.events.subscribe('processing_done', self.processing_complete)
+        self.events.start()
+        
         # Check FFmpeg on startup
         self.check_ffmpeg()
         
@@ -367,6 +390,23 @@ class VideoSlicerGUI:
             textvariable=self.status_var
         ).pack(fill=tk.X, pady=5)
         
+        # Scenes Card
+        scenes_card = ttk.LabelFrame(self.main_container, text="Scenes", padding=10)
+        scenes_card.pack(fill=tk.X, pady=(15, 0))
+        
+        self.filmstrip = SceneFilmstrip(
+            scenes_card,
+            self.processor.thumbnail_cache,
+            on_select=self.select_start_scene
+        )
+        self.filmstrip.pack(fill=tk.X)
+        
+        ttk.Label(
+            scenes_card, 
+            textvariable=self.start_scene_var,
+            style="Info.TLabel"
+        ).pack(anchor="w", pady=(5, 0))
+        
         # Action buttons
         button_frame = ttk.Frame(self.main_container)
         button_frame.pack(fill=tk.X, pady=(10, 0))
@@ -380,6 +420,14 @@ class VideoSlicerGUI:
         )
         self.process_button.pack(side=tk.RIGHT, padx=5)
         
+        # Detect button to review scenes before extracting
+        self.detect_button = ttk.Button(
+            button_frame, 
+            text="Detect Scenes", 
+            command=self.detect_scenes
+        )
+        self.detect_button.pack(side=tk.RIGHT, padx=5)
+        
         # Exit button
         ttk.Button(
             button_frame, 
@@ -423,38 +471,150 @@ class VideoSlicerGUI:
             # Update the thumbnail
             self.update_thumbnail(file_path)
             
+            # Scenes of the previous video no longer apply
+            self.detected_scenes = None
+            self.filmstrip.clear()
+            self.start_scene_var.set("Run scene detection to review cuts")
+            
     def update_thumbnail(self, video_path):
-        """Update the thumbnail preview with a frame from the video."""
-        # Clear existing thumbnail
+        """Update the thumbnail preview with a frame from the video.
+        
+        A placeholder is shown immediately while the thumbnail is made on a
+        background thread; selecting another file makes the pending request stale.
+        Every request gets its own thread, so a slow decode of a file that is
+        no longer selected does not hold up the preview of the new one.
+        """
+        self._thumbnail_request += 1
+        request_id = self._thumbnail_request
+        self._thumbnail_pending = request_id
+        
+        # Show a placeholder right away
+        self._show_thumbnail_message(f"Loading preview of {os.path.basename(video_path)}...")
+        self._watch_ui_latency(request_id, time.perf_counter(), time.perf_counter(), 0.0)
+        
+        threading.Thread(target=self._load_thumbnail, args=(request_id, video_path), daemon=True).start()
+        
+    def _load_thumbnail(self, request_id, video_path):
+        """Make a thumbnail on a background thread and hand it to the Tk thread."""
+        try:
+            thumbnails = self.processor.thumbnail_cache.get_thumbnails(video_path, [0], (320, 180))
+            thumbnail = thumbnails[0][1] if thumbnails else None
+        except Exception as e:
+            self.processor.logger.error(f"Error creating thumbnail: {str(e)}")
+            thumbnail = None
+        self.root.after(0, lambda: self._show_thumbnail(request_id, video_path, thumbnail))
+        
+    def _show_thumbnail(self, request_id, video_path, thumbnail):
+        """Display a finished thumbnail unless a newer file was selected meanwhile."""
+        if request_id != self._thumbnail_request:
+            return
+        self._thumbnail_pending = None
+        if not thumbnail:
+            # Display error message if thumbnail creation failed
+            self._show_thumbnail_message("Could not create thumbnail")
+            return
+            
+        # Clear the placeholder
         for widget in self.thumbnail_frame.winfo_children():
             widget.destroy()
             
-        # Create a new thumbnail
-        thumbnail = create_thumbnail(video_path)
+        # Convert PIL image to Tkinter PhotoImage
+        self.thumbnail_image = ImageTk.PhotoImage(thumbnail)
         
-        if thumbnail:
-            # Convert PIL image to Tkinter PhotoImage
-            self.thumbnail_image = ImageTk.PhotoImage(thumbnail)
-            
-            # Display the thumbnail
-            thumbnail_label = ttk.Label(
-                self.thumbnail_frame, 
-                image=self.thumbnail_image
+        # Display the thumbnail
+        thumbnail_label = ttk.Label(
+            self.thumbnail_frame, 
+            image=self.thumbnail_image
+        )
+        thumbnail_label.pack(pady=10)
+        
+        # Add video name
+        ttk.Label(
+            self.thumbnail_frame, 
+            text=os.path.basename(video_path)
+        ).pack()
+        
+    def _show_thumbnail_message(self, message):
+        """Replace the preview with a text message."""
+        for widget in self.thumbnail_frame.winfo_children():
+            widget.destroy()
+        ttk.Label(
+            self.thumbnail_frame, 
+            text=message
+        ).pack(fill=tk.BOTH, expand=True, pady=50)
+        
+    def _watch_ui_latency(self, request_id, started, expected, worst, interval=16):
+        """Measure Tk event loop latency while a thumbnail request is pending.
+        
+        A tick is scheduled every interval ms; the delay beyond that is time the
+        UI could not redraw. The worst delay is logged when the request ends.
+        """
+        now = time.perf_counter()
+        worst = max(worst, now - expected)
+        if self._thumbnail_pending != request_id:
+            self.processor.logger.info(
+                f"Thumbnail request {request_id}: {(now - started) * 1000:.0f} ms total, "
+                f"worst UI frame latency {worst * 1000:.1f} ms"
             )
-            thumbnail_label.pack(pady=10)
-            
-            # Add video name
-            ttk.Label(
-                self.thumbnail_frame, 
-                text=os.path.basename(video_path)
-            ).pack()
+            return
+        expected = time.perf_counter() + interval / 1000
+        self.root.after(interval, lambda: self._watch_ui_latency(
+            request_id, started, expected, worst, interval))
+        
+    def select_start_scene(self, timestamp):
+        """Use the scene picked in the filmstrip as the extraction start point."""
+        self.start_scene_var.set(f"Extraction starts at the scene at {format_time(timestamp)} ({timestamp:.2f} s)")
+        
+    def show_detected_scenes(self, input_path, threshold, scene_changes):
+        """Show detected scenes in the filmstrip (called on the Tk thread)."""
+        self.detected_scenes = (input_path, threshold, scene_changes)
+        self.filmstrip.set_scenes(input_path, scene_changes)
+        if scene_changes:
+            self.start_scene_var.set(f"{len(scene_changes)} scenes detected. "
+                                     f"Click a scene to start extraction there.")
         else:
-            # Display error message if thumbnail creation failed
-            ttk.Label(
-                self.thumbnail_frame, 
-                text="Could not create thumbnail"
-            ).pack(fill=tk.BOTH, expand=True, pady=50)
+            self.start_scene_var.set("No scene changes detected")
+        
+    def _detect_with_thumbnails(self, input_path, threshold, progress_scale):
+        """Detect scenes, seeding the thumbnail cache with filmstrip-sized thumbnails."""
+        scene_changes, _ = self.processor.detect_scene_changes(
+            input_path,
+            threshold,
+            max_duration=MAX_ANALYSIS_DURATION,
+            progress_callback=lambda p: self.events.post('progress', p * progress_scale, coalesce='main'),
+            thumbnail_size=(THUMB_WIDTH, THUMB_HEIGHT),
+            audio_weight=self.config_manager.get('audio_weight', 0.0) if self.config_manager else 0.0
+        )
+        self.events.post('scenes_detected', input_path, threshold, scene_changes)
+        return scene_changes
+        
+    def detect_scenes(self):
+        """Detect scenes of the selected video and show them in the filmstrip."""
+        input_path = self.input_path_var.get()
+        if not input_path or not os.path.exists(input_path):
+            messagebox.showerror("Error", "Please select an existing input video")
+            return
+        threshold = self.threshold_var.get()
+        
+        self.detect_button.config(state="disabled")
+        self.progress_var.set(0)
+        self.update_status("Detecting scene changes...")
+        
+        def run_detection():
+            try:
+                scene_changes = self._detect_with_thumbnails(input_path, threshold, 1.0)
+                message = f"Detected {len(scene_changes)} scene changes"
+            except Exception as e:
+                message = f"Error: {str(e)}"
+            self.events.post('detection_done', message)
             
+        threading.Thread(target=run_detection, daemon=True).start()
+        
+    def detection_complete(self, message):
+        """Handle the completion of scene detection."""
+        self.update_status(message)
+        self.detect_button.config(state="normal")
+        
     def browse_output(self):
         """Open a folder dialog to select the output directory."""
         folder_path = filedialog.askdirectory(
@@ -529,10 +689,11 @@ class VideoSlicerGUI:
         output_format = self.output_format_var.get()
         quality = self.quality_var.get()
         
-        # Check disk space
+        # Check disk space against the bitrate model of the chosen format and quality
         try:
-            input_size = os.path.getsize(input_path)
-            estimated_output_size = input_size * num_sequences * 1.5  # Conservative estimate
+            estimated_output_size = self.size_estimator.estimate_job_bytes(
+                input_path, sequence_length, num_sequences, output_format, quality
+            )
             free_space = get_free_disk_space(os.path.dirname(output_folder))
             
             if free_space < estimated_output_size:
@@ -552,22 +713,31 @@ class VideoSlicerGUI:
         # Reset progress
         self.progress_var.set(0)
         
+        # Reuse scenes already reviewed in the filmstrip for this input and threshold
+        reviewed_scenes = None
+        if self.detected_scenes and self.detected_scenes[:2] == (input_path, threshold):
+            reviewed_scenes = self.detected_scenes[2]
+            start_timestamp = self.filmstrip.selected_timestamp
+            if start_timestamp is not None:
+                reviewed_scenes = [t for t in reviewed_scenes if t >= start_timestamp]
+        
         # Run processing in a separate thread to keep UI responsive
         def run_processing():
             try:
                 # Create output folder if it doesn't exist
                 os.makedirs(output_folder, exist_ok=True)
                 
-                # Detect scene changes in the first 40 seconds only
-                self.update_status("Detecting scene changes in first 40 seconds...")
-                scene_changes = self.processor.detect_scene_changes(
-                    input_path,
-                    threshold,
-                    max_duration=40.0,  # Analyze only first 40 seconds
-                    progress_callback=lambda p: self.root.after(0, lambda: self.update_progress(p * 0.5))
-                )
+                # Collect per-stage timings for detection and extraction as one job
+                self.processor.begin_job(os.path.basename(input_path))
                 
-                self.root.after(0, lambda: self.update_status("Extracting sequences..."))
+                if reviewed_scenes is not None:
+                    scene_changes = reviewed_scenes
+                else:
+                    # Detect scene changes in the first 40 seconds only
+                    self.events.post('status', "Detecting scene changes in first 40 seconds...", coalesce='main')
+                    scene_changes = self._detect_with_thumbnails(input_path, threshold, 0.5)
+                
+                self.events.post('status', "Extracting sequences...", coalesce='main')
                 
                 # Extract sequences
                 output_paths = self.processor.extract_sequences(
@@ -578,14 +748,22 @@ class VideoSlicerGUI:
                     num_sequences,
                     output_format,
                     quality,
-                    progress_callback=lambda p: self.root.after(0, lambda: self.update_progress(50 + p * 0.5))
+                    progress_callback=lambda p: self.events.post('progress', 50 + p * 0.5, coalesce='main')
                 )
                 
+                # Refine the bitrate model with the sizes actually written
+                self.size_estimator.record_output(input_path, output_paths, sequence_length,
+                                                  output_format, quality)
+                self.size_estimator.save_history()
+                
                 # Update UI from the main thread
-                self.root.after(0, lambda: self.processing_complete(True, output_paths))
+                self.events.post('processing_done', True, output_paths)
                 
             except Exception as e:
-                self.root.after(0, lambda: self.processing_complete(False, str(e)))
+                self.events.post('processing_done', False, str(e))
+                
+            finally:
+                self.processor.end_job()
                 
         # Start processing thread
         threading.Thread(target=run_processing, daemon=True).start()
@@ -10,6 +10,7 @@ from gui.main_window import VideoSlicerGUI
 from utils import check_ffmpeg_installed, setup_logger
 from constants import APP_NAME
 from config import ConfigManager
+from core import metrics
 
 def main():
     """Start the application."""
@@ -17,6 +18,10 @@ def main():
     parser = argparse.ArgumentParser(description="Video Slicer Application")
     parser.add_argument("--theme", choices=["light", "dark"], default=None, 
                        help="Set the application theme")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                       help="Serve Prometheus-style metrics on this local port")
+    parser.add_argument("--metrics-json", default=None,
+                       help="Periodically dump metrics as JSON to this file")
     args = parser.parse_args()
     
     # Set up logger
@@ -32,6 +37,19 @@ def main():
     # Load configuration
     config_manager = ConfigManager()
     
+    # Start metrics exporters if requested on the command line or in the config
+    metrics_settings = config_manager.get('metrics_settings', {})
+    metrics_port = args.metrics_port
+    metrics_json = args.metrics_json
+    if metrics_settings.get('enabled'):
+        metrics_port = metrics_port or metrics_settings.get('port', metrics.DEFAULT_METRICS_PORT)
+        metrics_json = metrics_json or metrics_settings.get('json_path')
+    exporters = metrics.start_exporters(
+        port=metrics_port,
+        json_path=metrics_json,
+        interval=metrics_settings.get('dump_interval', metrics.DEFAULT_DUMP_INTERVAL)
+    )
+    
     # Create the root window
     root = tk.Tk()
     root.title(APP_NAME)
@@ -85,6 +103,10 @@ def main():
     # Save configuration on exit
     if config_manager:
         config_manager.save_config()
+    
+    # Stop exporters (writes a final JSON dump)
+    for exporter in exporters:
+        exporter.stop()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
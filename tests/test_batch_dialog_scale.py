@@ -0,0 +1,113 @@
+"""UI update cost of the batch dialog with a large queue, without a display."""
+from collections import deque
+
+import pytest
+
+from gui.batch_dialog import BatchDialog
+from gui.event_channel import DRAIN_BATCH, UIEventChannel
+
+# Files queued by the scale test
+QUEUED_FILES = 10000
+
+
+class FakeTreeview:
+    """Stands in for ttk.Treeview and counts the calls the dialog makes."""
+
+    def __init__(self):
+        self.rows = {}
+        self.calls = 0
+
+    def insert(self, parent, index, iid=None, values=()):
+        self.calls += 1
+        self.rows[iid] = values
+        return iid
+
+    def exists(self, iid):
+        self.calls += 1
+        return iid in self.rows
+
+    def item(self, iid, values=None):
+        self.calls += 1
+        self.rows[iid] = values
+
+
+class FakeWidget:
+    """Stands in for the Tk widget the event channel schedules its drain on."""
+
+    def after(self, delay, callback=None):
+        return "after#0"
+
+    def after_cancel(self, timer):
+        pass
+
+
+class FakeI18n:
+    def get(self, key):
+        return key
+
+
+@pytest.fixture
+def dialog():
+    """A BatchDialog with its Tk widgets replaced by fakes."""
+    dialog = BatchDialog.__new__(BatchDialog)
+    dialog.i18n = FakeI18n()
+    dialog.video_files = []
+    dialog.video_file_set = set()
+    dialog.status_map = {}
+    dialog.output_map = {}
+    dialog._scanned_paths = deque()
+    dialog.file_tree = FakeTreeview()
+    dialog.events = UIEventChannel(FakeWidget())
+    dialog.events.subscribe('file_status', dialog._apply_file_status)
+    return dialog
+
+
+def _paths(count):
+    return [f"/videos/folder_{i % 97}/clip_{i:05d}.mp4" for i in range(count)]
+
+
+def test_add_file_cost_does_not_grow_with_queue(dialog):
+    paths = _paths(QUEUED_FILES)
+    for path in paths[:1000]:
+        dialog._add_file(path)
+    first = dialog.file_tree.calls
+    for path in paths[1000:]:
+        dialog._add_file(path)
+    rest = dialog.file_tree.calls - first
+
+    assert len(dialog.video_files) == QUEUED_FILES
+    # One insert per file, however many files are already queued
+    assert first == 1000
+    assert rest == QUEUED_FILES - 1000
+
+    # Re-adding queued files is a set lookup that touches no rows
+    dialog._add_file(paths[-1])
+    assert dialog.file_tree.calls == QUEUED_FILES
+
+
+def test_status_updates_are_coalesced_and_drained_in_bounded_batches(dialog):
+    paths = _paths(QUEUED_FILES)
+    for path in paths:
+        dialog._add_file(path)
+    dialog.file_tree.calls = 0
+
+    # Several updates per file leave one pending event per file and touch no rows until drained
+    for status in ('processing', 'completed'):
+        for path in paths:
+            dialog.update_file_status(path, status)
+    assert len(dialog.events._pending) == QUEUED_FILES
+    assert dialog.file_tree.calls == 0
+
+    # Every drain handles at most DRAIN_BATCH events, with a constant number of tree calls each
+    drains = 0
+    while dialog.events._pending:
+        pending = len(dialog.events._pending)
+        calls = dialog.file_tree.calls
+        dialog.events.drain()
+        drains += 1
+        handled = pending - len(dialog.events._pending)
+        assert 0 < handled <= DRAIN_BATCH
+        assert dialog.file_tree.calls - calls == 2 * handled  # exists() + item() per row
+
+    assert drains == -(-QUEUED_FILES // DRAIN_BATCH)
+    assert all(values[1] == 'completed' for values in dialog.file_tree.rows.values())